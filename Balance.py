@@ -0,0 +1,190 @@
+# Balance.py - weight/displacement balance of the v3 design with the fuel weight fed back
+# Fuel depends on displacement through the resistance estimate and the weight depends on fuel, so the length at
+# which displacement equals weight is found with the whole Fuel -> WeightsNoFuel -> displacement loop closed
+
+# package, function, and class imports
+from __future__ import division, print_function
+import openmdao.api as om
+import numpy as np
+from fuelEstimate import missionFuel1FWVec, missionFuel1FWVecDeriv
+from estParam import wettedSurfVec, displacementVec, wettedSurfVecDeriv, displacementVecDeriv
+from weightCurves import grubisicWtsNoFuelVec, grubisicWtsNoFuelVecDeriv #modify this if using a different weight estimation
+
+# ---------
+# 'excess' displacement over the weight including mission fuel, zero where the design balances
+# NOTE: the parameter estimates are called with (L, B, T, Cb) as in Fuel.py, so fuel matches the recorded cases
+def balanceExcessVec(L, B, T, Cb, fwCap) : # inputs in meters, meters, meters, unitless, megajoules - arrays or scalars
+    Displ = displacementVec(L,B,T,Cb)
+    S = wettedSurfVec(L,B,T,Cb)
+    fuel, MCR, etaRun, nStarts, PBratio = missionFuel1FWVec(L, S, Displ, Cb, fwCap)
+    return Displ - grubisicWtsNoFuelVec(Cb, T, L, B, MCR, fuel) # metric tonnes
+
+# partial derivatives of balanceExcessVec with respect to (L, B, T, Cb, fwCap)
+def balanceExcessVecDeriv(L, B, T, Cb, fwCap) : # inputs in meters, meters, meters, unitless, megajoules - arrays or scalars
+    Displ = displacementVec(L,B,T,Cb)
+    S = wettedSurfVec(L,B,T,Cb)
+    dDispl = displacementVecDeriv(L,B,T,Cb)
+    dS = wettedSurfVecDeriv(L,B,T,Cb)
+    fuel, MCR, etaRun, nStarts, PBratio = missionFuel1FWVec(L, S, Displ, Cb, fwCap)
+    dFuel, dMCR, detaRun, dnStarts, dPBratio = missionFuel1FWVecDeriv(L, S, Displ, Cb, fwCap)
+
+    # fuel and MCR gradients chained through S and Displ to (L, B, T, Cb), as in Fuel.compute_partials
+    zero = np.zeros_like(dFuel[:1])
+    dFuelLBTC = dFuel[1]*dS + dFuel[2]*dDispl + np.concatenate([dFuel[:1], zero, zero, dFuel[3:4]])
+    dMCRLBTC = dMCR[1]*dS + dMCR[2]*dDispl + np.concatenate([dMCR[:1], zero, zero, dMCR[3:4]])
+    dFuelX = np.concatenate([dFuelLBTC, dFuel[4:5]])
+    dMCRX = np.concatenate([dMCRLBTC, dMCR[4:5]])
+
+    # weight gradients over (Cb, T, L, B, MCR, fuel) reordered to (L, B, T, Cb, fwCap)
+    dW = grubisicWtsNoFuelVecDeriv(Cb, T, L, B, MCR, fuel)
+    dWt = np.stack([dW[2], dW[3], dW[1], dW[0], np.zeros_like(dW[0])]) + (dW[4]*dMCRX) + (dW[5]*dFuelX)
+    return np.concatenate([dDispl, zero]) - dWt
+
+# ---------
+# balance length for arrays of designs, each design runs its own safeguarded Newton iteration
+# the first sign change on a 1 m grid of lengths brackets the root, Newton steps that leave the bracket are replaced
+# by bisection, and designs stop iterating as soon as their step is below tol
+# the excess jumps where a length leaves the resistance regression, a bracket around such a jump closes on the jump
+# rather than a root, so designs still off balance by more than ftol at the end are flagged as not balanced
+def balanceLengthVec(B, T, Cb, fwCap, tol=1e-8, ftol=1e-3, maxiter=20, lower_length=19, upper_length=51) : # inputs in meters, meters, unitless, megajoules, length and excess tolerances in meters and metric tonnes, bounds in meters
+    B, T, Cb, fwCap = np.broadcast_arrays(*[np.asarray(np.real(x), dtype=float) for x in (B, T, Cb, fwCap)])
+    shape = B.shape
+    B, T, Cb, fwCap = [x.ravel() for x in (B, T, Cb, fwCap)]
+    n = B.size
+
+    # coarse grid of every design at once, the first crossing is taken so each design lands on a consistent root
+    Ls = np.linspace(lower_length, upper_length, int(np.ceil(upper_length - lower_length)) + 1)
+    f = balanceExcessVec(Ls[:,np.newaxis], B, T, Cb, fwCap)
+    cross = np.sign(f[:-1])*np.sign(f[1:]) <= 0
+    inBound = np.any(cross, axis=0).astype(int)
+    i = np.argmax(cross, axis=0)
+    cols = np.arange(n)
+    lo = Ls[i]
+    hi = Ls[i+1]
+    fLo = f[i,cols]
+
+    # start from the linear interpolation across the bracket
+    fHi = f[i+1,cols]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        L = np.where(fHi != fLo, lo - fLo*(hi - lo)/(fHi - fLo), 0.5*(lo + hi))
+    L = np.clip(np.where(np.isfinite(L), L, 0.5*(lo + hi)), lo, hi)
+    L = np.where(inBound == 1, L, upper_length)
+
+    # per design iteration count, only designs still iterating are evaluated
+    nIter = np.zeros(n, dtype=int)
+    active = np.nonzero(inBound == 1)[0]
+    while active.size > 0:
+        x = L[active]
+        args = (B[active], T[active], Cb[active], fwCap[active])
+        fx = balanceExcessVec(x, *args)
+        dfx = balanceExcessVecDeriv(x, *args)[0]
+        nIter[active] += 1
+
+        # shrink the bracket to the side that still holds the sign change
+        left = np.sign(fx) == np.sign(fLo[active])
+        lo[active] = np.where(left, x, lo[active])
+        fLo[active] = np.where(left, fx, fLo[active])
+        hi[active] = np.where(left, hi[active], x)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            xNew = x - fx/dfx
+        bisect = ~np.isfinite(xNew) | (xNew <= lo[active]) | (xNew >= hi[active])
+        xNew = np.where(bisect, 0.5*(lo[active] + hi[active]), xNew)
+        L[active] = xNew
+
+        done = (np.abs(xNew - x) <= tol) | (fx == 0) | (nIter[active] >= maxiter)
+        active = active[~done]
+
+    solved = np.nonzero(inBound == 1)[0]
+    fx = balanceExcessVec(L[solved], B[solved], T[solved], Cb[solved], fwCap[solved])
+    inBound[solved] = (np.abs(fx) <= ftol).astype(int)
+    L = np.where(inBound == 1, L, upper_length)
+
+    return L.reshape(shape), inBound.reshape(shape), nIter.reshape(shape)
+
+# the definition of the Balance IMPLICIT component
+class Balance(om.ImplicitComponent):
+    """
+    Solves the length at which displacement equals weight including the mission fuel
+    """
+
+    def initialize(self):
+        self.options.declare('num_nodes', types=int, default=1, desc='number of designs evaluated in each solve')
+        self.options.declare('maxiter', types=int, default=20, desc='Newton iteration limit for each design')
+        self.options.declare('tol', default=1e-8, desc='length step at which a design is converged, meters')
+
+    def setup(self):
+        nn = self.options['num_nodes']
+        self.add_input('Cb', shape=nn) #unitless
+        self.add_input('T', shape=nn, units='m')
+        self.add_input('B', shape=nn, units='m')
+        self.add_input('fwCap', shape=nn, units='MJ')
+
+        self.add_output('L', 30*np.ones(nn), units='m', lower=19, upper=51)
+        # 1 for designs that balance between 19 and 51 m, 0 for those held at 51 m
+        self.add_output('inBound', np.ones(nn)) #unitless
+
+        # designs whose weight and displacement do not cross between 19 and 51 m, and the iterations each design used,
+        # set by solve_nonlinear
+        self.inBound = np.ones(nn, dtype=int)
+        self.nIter = np.zeros(nn, dtype=int)
+
+        # each design only depends on its own inputs
+        ar = np.arange(nn)
+        self.declare_partials('L', ['L', 'Cb', 'T', 'B', 'fwCap'], rows=ar, cols=ar)
+        self.declare_partials('inBound', 'inBound', rows=ar, cols=ar, val=1.0)
+
+    def apply_nonlinear(self, inputs, outputs, residuals):
+        L = outputs['L']
+        # designs that cannot balance are held at the last length and keep a nonzero Excess downstream
+        residuals['L'] = np.where(self.inBound == 1, balanceExcessVec(L, inputs['B'], inputs['T'], inputs['Cb'], inputs['fwCap']), L-51)
+        residuals['inBound'] = outputs['inBound'] - self.inBound
+
+    def solve_nonlinear(self, inputs, outputs):
+        outputs['L'], self.inBound, self.nIter = balanceLengthVec(inputs['B'], inputs['T'], inputs['Cb'], inputs['fwCap'],
+                                                                  tol=self.options['tol'], maxiter=self.options['maxiter'])
+        outputs['inBound'] = self.inBound
+
+    def linearize(self, inputs, outputs, partials):
+        # gradients of the excess over (L, B, T, Cb, fwCap)
+        dR = balanceExcessVecDeriv(outputs['L'], inputs['B'], inputs['T'], inputs['Cb'], inputs['fwCap'])
+
+        inBound = self.inBound
+        self.dR_dL = np.where(inBound == 1, dR[0], 1.0)
+        partials['L', 'L'] = self.dR_dL
+        partials['L', 'B'] = dR[1]*inBound
+        partials['L', 'T'] = dR[2]*inBound
+        partials['L', 'Cb'] = dR[3]*inBound
+        partials['L', 'fwCap'] = dR[4]*inBound
+
+    # the jacobian of each design's residual with respect to its own length is a scalar and inBound has an identity
+    # jacobian, so no linear solver is needed
+    def solve_linear(self, d_outputs, d_residuals, mode):
+        if mode == 'fwd':
+            d_outputs['L'] = d_residuals['L']/self.dR_dL
+            d_outputs['inBound'] = d_residuals['inBound']
+        else:
+            d_residuals['L'] = d_outputs['L']/self.dR_dL
+            d_residuals['inBound'] = d_outputs['inBound']
+
+
+# debugging code, verifies that inputs, outputs, and calculations are working properly within the component
+if __name__ == "__main__":
+    prob = om.Problem()
+    model = prob.model
+
+    model.add_subsystem('balance', Balance(), promotes=['*'])
+
+    #setup problem and run with initial definitions
+    prob.setup(force_alloc_complex=True)
+    prob['Cb'] = 0.41
+    prob['T'] = 3.66
+    prob['B'] = 7.68
+    prob['fwCap'] = 485
+    prob.run_model()
+    print("-- Cb = 0.41, T = 3.66, B = 7.68, fwCap = 485 --")
+    print("L = ", prob['L'])
+    print("Excess = ", balanceExcessVec(prob['L'], prob['B'], prob['T'], prob['Cb'], prob['fwCap']))
+    print("inBound = ", prob['inBound'])
+    print("Newton iterations = ", prob.model.balance.nIter)
+    prob.check_partials(compact_print=True)
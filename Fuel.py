@@ -4,9 +4,10 @@
 # package, function, and class imports
 from __future__ import division, print_function
 import openmdao.api as om
+import numpy as np
 import math
-from fuelEstimate import missionFuel1, missionFuel1FW
-from estParam import wettedSurf, displacement
+from fuelEstimate import missionFuel1Vec, missionFuel1FWVec, missionFuel1FWVecDeriv
+from estParam import wettedSurfVec, displacementVec, wettedSurfVecDeriv, displacementVecDeriv
 
 # the definition of the Fuel component
 class Fuel(om.ExplicitComponent):
@@ -14,22 +15,30 @@ class Fuel(om.ExplicitComponent):
     Evaluates the fuel weight for a mission using resistance and powering estimates
     """
 
+    def initialize(self) :
+        self.options.declare('num_nodes', types=int, default=1, desc='number of designs evaluated in each compute call')
+        self.options.declare('deriv_method', default='exact', values=['exact', 'cs', 'fd'], desc='exact uses compute_partials, cs or fd approximates the same partials')
+
     # setup input and output variables for the component
     def setup(self) :
-        self.add_input('L', units='m')
-        self.add_input('B', units='m')
-        self.add_input('T', units='m')
-        self.add_input('Cb')
-        self.add_input('fwCap', units='MJ')
+        nn = self.options['num_nodes']
+        self.add_input('L', shape=nn, units='m')
+        self.add_input('B', shape=nn, units='m')
+        self.add_input('T', shape=nn, units='m')
+        self.add_input('Cb', shape=nn)
+        self.add_input('fwCap', shape=nn, units='MJ')
 
-        self.add_output('fuelWt', units='t')
-        self.add_output('MCR', units='kW')
-        self.add_output('etaRun')
-        self.add_output('nStarts')
-        self.add_output('PBratio')
+        self.add_output('fuelWt', shape=nn, units='t')
+        self.add_output('MCR', shape=nn, units='kW')
+        self.add_output('etaRun', shape=nn)
+        self.add_output('nStarts', shape=nn)
+        self.add_output('PBratio', shape=nn)
 
-        # Finite difference all partials.
-        self.declare_partials('*', '*', method='fd')
+        # Analytic partials unless deriv_method requests an approximation
+        # each design only depends on its own inputs and powering does not depend on fwCap
+        ar = np.arange(nn)
+        self.declare_partials(['fuelWt', 'etaRun', 'nStarts'], '*', rows=ar, cols=ar, method=self.options['deriv_method'])
+        self.declare_partials(['MCR', 'PBratio'], ['L', 'B', 'T', 'Cb'], rows=ar, cols=ar, method=self.options['deriv_method'])
 
 
     def compute(self, inputs, outputs) :
@@ -41,7 +50,69 @@ class Fuel(om.ExplicitComponent):
         fwCap = inputs['fwCap']
 
         # calls parameter estimation functions
-        Displ = displacement(L,B,T,Cb)
-        S = wettedSurf(L,B,T,Cb)
-        # calls the missionFuel1 function - note that other missions could be used
-        outputs['fuelWt'], outputs['MCR'], outputs['etaRun'], outputs['nStarts'], outputs['PBratio'] = missionFuel1FW(L, S, Displ, Cb, fwCap) # inputs in meters, meters^2, metric tonnes, unitless, megajoules
+        # NOTE: arguments are passed in (L, B, T, Cb) order, as in all recorded cases, not the (Cb, T, L, B) of the signatures
+        Displ = displacementVec(L,B,T,Cb)
+        S = wettedSurfVec(L,B,T,Cb)
+        # calls the missionFuel1FWVec function - note that other missions could be used
+        outputs['fuelWt'], outputs['MCR'], outputs['etaRun'], outputs['nStarts'], outputs['PBratio'] = missionFuel1FWVec(L, S, Displ, Cb, fwCap) # inputs in meters, meters^2, metric tonnes, unitless, megajoules
+
+    def compute_partials(self, inputs, partials) :
+        if self.options['deriv_method'] != 'exact':
+            return
+
+        #inputs
+        L = inputs['L']
+        B = inputs['B']
+        T = inputs['T']
+        Cb = inputs['Cb']
+        fwCap = inputs['fwCap']
+
+        # same argument order as compute, so the gradients come out with respect to (L, B, T, Cb)
+        Displ = displacementVec(L,B,T,Cb)
+        S = wettedSurfVec(L,B,T,Cb)
+        dDispl = displacementVecDeriv(L,B,T,Cb)
+        dS = wettedSurfVecDeriv(L,B,T,Cb)
+
+        # chain the mission gradients, taken with respect to (L, S, Displ, Cb, fwCap), through S and Displ
+        derivs = missionFuel1FWVecDeriv(L, S, Displ, Cb, fwCap)
+        for name, d in zip(['fuelWt', 'MCR', 'etaRun', 'nStarts', 'PBratio'], derivs):
+            partials[name, 'L'] = d[0] + (d[1]*dS[0]) + (d[2]*dDispl[0])
+            partials[name, 'B'] = (d[1]*dS[1]) + (d[2]*dDispl[1])
+            partials[name, 'T'] = (d[1]*dS[2]) + (d[2]*dDispl[2])
+            partials[name, 'Cb'] = d[3] + (d[1]*dS[3]) + (d[2]*dDispl[3])
+        for name, d in zip(['fuelWt', 'etaRun', 'nStarts'], [derivs[0], derivs[2], derivs[3]]):
+            partials[name, 'fwCap'] = d[4]
+
+# debugging code, verifies that inputs, outputs, and calculations are working properly within the component
+if __name__ == "__main__":
+    #define the model
+    model = om.Group()
+    #setup independent variables, will be chosen
+    #units defined within OpenMDAO for completeness
+    ivc = om.IndepVarComp()
+    ivc.add_output('L', 37.1, units='m') #meters
+    ivc.add_output('B', 7.68, units='m') #meters
+    ivc.add_output('T', 3.66, units='m') #meters
+    ivc.add_output('Cb', 0.41) #unitless
+    ivc.add_output('fwCap', 485, units='MJ') #megajoules
+
+    #define subsystems to reference variables
+    model.add_subsystem('des_vars', ivc)
+    model.add_subsystem('fuel_comp', Fuel())
+
+    #connect variables
+    model.connect('des_vars.L', 'fuel_comp.L')
+    model.connect('des_vars.B', 'fuel_comp.B')
+    model.connect('des_vars.T', 'fuel_comp.T')
+    model.connect('des_vars.Cb', 'fuel_comp.Cb')
+    model.connect('des_vars.fwCap', 'fuel_comp.fwCap')
+
+    #setup problem and run with initial definitions
+    prob = om.Problem(model)
+    prob.setup()
+    prob.run_model()
+    print("Fuel Weight: " + str(prob['fuel_comp.fuelWt']))
+    print("Max MCR: " + str(prob['fuel_comp.MCR']))
+    print("Runtime Frac: " + str(prob['fuel_comp.etaRun']))
+    print("Number of Starts: " + str(prob['fuel_comp.nStarts']))
+    prob.check_partials(compact_print=True)
@@ -1,19 +1,39 @@
 import math
 import numpy as np
+from scipy.optimize import brentq
 from Weights import Weights
-from weightCurves import parsonsWts, grubisicWts, grubisicWtsNoFuel #modify this if using a different weight estimation
+from weightCurves import parsonsWts, grubisicWts, grubisicWtsNoFuel, grubisicWtsVec, grubisicWtsVecDeriv #modify this if using a different weight estimation
 
 #Cb = 0.4
 #T_to_L = .15
 #L_to_B = 4
 #B_to_T = 2
 
+# constants of the balance, shared with the partials of Ratios and RatiosImp
+rho = 1.0260 # t/m^3
+MCR = 500 # kW
+Vk = 16 # knots
+
+# complex step through the balance: the root solves work on the real parts, then one Newton step on the excess with
+# the complex inputs adds the imaginary part of L the implicit function theorem gives, dL = -(dR/dx)/(dR/dL)
+# designs that do not balance are held at a fixed length and keep a real L
+def balanceStep(L, B_to_T, T_to_L, Cb, inBound) : # real balance length in meters, inputs unitless, balance flags
+    if not any(np.iscomplexobj(x) for x in (B_to_T, T_to_L, Cb)):
+        return L
+    T = T_to_L*L
+    B = B_to_T*T
+    R = grubisicWtsVec(Cb, T, L, B, MCR, Vk) - (L*B*T*Cb*rho)
+
+    # total derivative of the excess along the ratio line, T = TL*L and B = BT*TL*L
+    BT, TL, Cbr = np.real(B_to_T), np.real(T_to_L), np.real(Cb)
+    Tr = TL*L
+    Br = BT*Tr
+    dW = grubisicWtsVecDeriv(Cbr, Tr, L, Br, MCR, Vk)
+    dR_dL = dW[1]*TL + dW[2] + dW[3]*BT*TL - 3*(L*Br*Tr*Cbr*rho)/L
+    return L - 1j*np.where(inBound == 1, np.imag(R)/dR_dL, 0.0)
 
 def RatioWeights(L_to_B, B_to_T, T_to_L, Cb) : #inputs in meters, meters^2, metric tonnes, unitless, knots
     #constants
-    rho = 1.0260 #kg/m^3
-    MCR = 500
-    Vk = 16
     lower_length = 19
     upper_length = 51
 
@@ -22,34 +42,78 @@ def RatioWeights(L_to_B, B_to_T, T_to_L, Cb) : #inputs in meters, meters^2, metr
 
     #g = 9.81 #m/s^2
 
-    #Iterate through all Lengths, solves for displacement and weight
-    for L in np.arange(lower_length,upper_length,0.1): #use np.arange to give decimal range steps
-        T = T_to_L*L
-        B = B_to_T*T
-        Wt = grubisicWts(Cb, T, L, B, MCR, Vk)
-        Displ = (L*B*T*Cb*rho)
-        if (Wt*0.9 < Displ and Displ < Wt*1.1):
-            # debugging text --
-            # print("--Matched!!--")
-            # print("Wt: ",Wt)
-            # print("Displ: ",Displ)
-            # end debugging --
-            inBound = 1
-            break
-        else:
-            # debugging text --
-            # print("--Failed! At L = ",L," m --")
-            # print("Wt: ",Wt)
-            # print("Displ: ",Displ)
-            # end debugging --
-            #not strictly needed, but helps track the flow of code
-            inBound = 0
-
-    return L,B,T,inBound # "can only concatenate str (not "tuple") to str" error when running Ratios.py
+    # the root solve works on the real parts of the ratios as scalars, component inputs arrive as 1 element arrays,
+    # balanceStep carries any complex step back into L
+    BT = np.real(np.squeeze(B_to_T)).item()
+    TL = np.real(np.squeeze(T_to_L)).item()
+    Cbr = np.real(np.squeeze(Cb)).item()
+
+    # excess weight over displacement, zero where the design balances
+    def excess(L) :
+        T = TL*L
+        B = BT*T
+        return grubisicWts(Cbr, T, L, B, MCR, Vk) - (L*B*T*Cbr*rho)
+
+    #Evaluate a coarse grid of lengths at once to bracket the first balance point
+    Ls = np.linspace(lower_length,upper_length,9) # 4 meter steps
+    Ts = TL*Ls
+    Bs = BT*Ts
+    f = grubisicWtsVec(Cbr, Ts, Ls, Bs, MCR, Vk) - (Ls*Bs*Ts*Cbr*rho)
+    brackets = np.nonzero(np.sign(f[:-1])*np.sign(f[1:]) <= 0)[0]
+
+    # solve for the balance length inside the bracket, or take the last length if weight and displacement never cross
+    if len(brackets) > 0:
+        i = brackets[0]
+        L, result = brentq(excess, Ls[i], Ls[i+1], xtol=1e-6, full_output=True)
+        inBound = int(result.converged)
+    else:
+        L = Ls[-1]
+    L = balanceStep(L, np.squeeze(B_to_T), np.squeeze(T_to_L), np.squeeze(Cb), inBound)
+    T = T_to_L*L
+    B = B_to_T*T
+
+    return L,B,T,inBound
+
+# balances weight and displacement for arrays of ratio sets at once, using a bisection on Wt - Displ that
+# halves every design's length bracket in each pass, one grubisicWtsVec call per pass for the whole batch
+# the bisection runs on the real parts of the ratios, complex inputs get their imaginary part from balanceStep
+def RatioWeightsVec(L_to_B, B_to_T, T_to_L, Cb, tol=1e-6, lower_length=19, upper_length=51) : #inputs unitless, length tolerance and bounds in meters
+    B_to_T, T_to_L, Cb = np.broadcast_arrays(*[np.asarray(x) for x in (B_to_T, T_to_L, Cb)])
+    BT, TL, Cbr = np.real(B_to_T), np.real(T_to_L), np.real(Cb)
+
+    # excess weight over displacement, zero where the design balances
+    def excess(L) :
+        T = TL*L
+        B = BT*T
+        return grubisicWtsVec(Cbr, T, L, B, MCR, Vk) - (L*B*T*Cbr*rho)
+
+    # weight and displacement cross once between the length bounds or not at all
+    lo = np.full(Cb.shape, float(lower_length))
+    hi = np.full(Cb.shape, float(upper_length))
+    fLo = excess(lo)
+    inBound = (np.sign(fLo)*np.sign(excess(hi)) <= 0).astype(int)
+
+    # bisection, keep the half of each bracket where the sign changes
+    nIter = int(np.ceil(np.log2((upper_length - lower_length)/tol)))
+    for i in range(nIter):
+        mid = 0.5*(lo + hi)
+        fMid = excess(mid)
+        right = np.sign(fMid) == np.sign(fLo)
+        lo = np.where(right, mid, lo)
+        fLo = np.where(right, fMid, fLo)
+        hi = np.where(right, hi, mid)
+
+    # designs that do not balance take the last length, as in RatioWeights
+    L = np.where(inBound == 1, 0.5*(lo + hi), float(upper_length))
+    L = balanceStep(L, B_to_T, T_to_L, Cb, inBound)
+    T = T_to_L*L
+    B = B_to_T*T
+
+    return L,B,T,inBound
 
 # debugging text --
 # print("~Design 1~")
-# (L,B,T,Cb) = RatioWeights(4, 2, 0.15,0.4)
+# (L,B,T,inBound) = RatioWeights(4, 2, 0.15,0.4)
 # print("--Final Dimensions--")
 # print("L: ", L)
 # print("B: ", B)
@@ -57,7 +121,7 @@ def RatioWeights(L_to_B, B_to_T, T_to_L, Cb) : #inputs in meters, meters^2, metr
 # print("Cb: ", Cb)
 #
 # print("~Design 2~")
-# (L,B,T,Cb) = RatioWeights(4.2, 2.1, 0.153,0.4)
+# (L,B,T,inBound) = RatioWeights(4.2, 2.1, 0.153,0.4)
 # print("--Final Dimensions--")
 # print("L: ", L)
 # print("B: ", B)
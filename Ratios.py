@@ -1,8 +1,10 @@
 # package, function, and class imports
 from __future__ import division, print_function
 import openmdao.api as om
-import math
-from RatioWeights import RatioWeights
+import numpy as np
+from RatioWeights import RatioWeights, RatioWeightsVec, rho, MCR, Vk
+from ratioTable import RatioTable
+from weightCurves import grubisicWtsVecDeriv
 
 # the definition of the Ratios component
 class Ratios(om.ExplicitComponent):
@@ -10,41 +12,101 @@ class Ratios(om.ExplicitComponent):
     Evaluates Displacement = weight for reasonable L/B/T Ratios
     """
 
+    def initialize(self) :
+        self.options.declare('num_nodes', types=int, default=1, desc='number of designs evaluated in each compute call')
+        self.options.declare('deriv_method', default='exact', values=['exact', 'cs', 'fd'], desc='exact uses compute_partials, cs or fd approximates the same partials')
+        self.options.declare('table', default=None, types=str, allow_none=True, desc='.npz file from ratioTable.buildRatioTable, balance lengths are interpolated from it instead of solved')
+
     # setup input and output variables for the component
     def setup(self) :
-        self.add_input('LB') #unitless
-        self.add_input('BT') #unitless
-        self.add_input('TL') #unitless
-        self.add_input('Cb')  #unitless
+        nn = self.options['num_nodes']
+        self.table = None
+        if self.options['table'] is not None:
+            self.table = RatioTable(self.options['table'])
+        self.add_input('LB', shape=nn) #unitless
+        self.add_input('BT', shape=nn) #unitless
+        self.add_input('TL', shape=nn) #unitless
+        self.add_input('Cb', shape=nn)  #unitless
+
+        self.add_output('L', shape=nn, units='m', lower=19, upper=51)
+        self.add_output('B', shape=nn, units='m', lower=2, upper=12)
+        self.add_output('T', shape=nn, units='m', lower=1, upper=5)
+        # 1 for designs that balance between 19 and 51 m, 0 for those set to 1.0, no partials
+        self.add_output('inBound', shape=nn) #unitless
 
-        self.add_output('L', units='m', lower=19, upper=51)
-        self.add_output('B', units='m', lower=2, upper=12)
-        self.add_output('T', units='m', lower=1, upper=5)
+        # Analytic partials unless deriv_method requests an approximation
+        # L is the root of Wt - Displ, so its partials come from the implicit function theorem,
+        # L/B does not enter the balance and has no partials
+        ar = np.arange(nn)
+        self.declare_partials(['L', 'B', 'T'], ['BT', 'TL', 'Cb'], rows=ar, cols=ar, method=self.options['deriv_method'])
 
-        # Finite difference all partials.
-        self.declare_partials('*', '*', method='fd')
+        # inputs, L and inBound of the last balance, reused by compute_partials at the same inputs
+        self.balanced = None
 
+    # Brent's method needs the fewest weight evaluations for a single design, batches use the vectorized bisection,
+    # a lookup table replaces both when given
+    def balance(self, inputs) :
+        if self.table is not None:
+            L,inBound = self.table.lookup(inputs['BT'], inputs['TL'], inputs['Cb'])
+            T = inputs['TL']*L
+            B = inputs['BT']*T
+        elif self.options['num_nodes'] == 1:
+            L,B,T,inBound = RatioWeights(inputs['LB'], inputs['BT'], inputs['TL'], inputs['Cb']) # inputs are unitless
+        else:
+            L,B,T,inBound = RatioWeightsVec(inputs['LB'], inputs['BT'], inputs['TL'], inputs['Cb']) # inputs are unitless
+        return L,B,T,inBound
 
     def compute(self, inputs, outputs) :
+        # calls the RatioWeights function
+        L,B,T,inBound = self.balance(inputs)
+        self.balanced = ([inputs[name].copy() for name in ('BT', 'TL', 'Cb')], L, inBound)
+        # primative error handling, designs that failed to converge are set to 1.0
+        outputs['L'] = np.where(inBound == 1, L, 1.0)
+        outputs['B'] = np.where(inBound == 1, B, 1.0)
+        outputs['T'] = np.where(inBound == 1, T, 1.0)
+        outputs['inBound'] = inBound
+
+    def compute_partials(self, inputs, partials) :
+        if self.options['deriv_method'] != 'exact':
+            return
+
         #inputs
-        L_to_B = inputs['LB']
         B_to_T = inputs['BT']
         T_to_L = inputs['TL']
         Cb = inputs['Cb']
 
-        # calls the RatioWeights function
-        L,B,T,inBound = RatioWeights(L_to_B, B_to_T, T_to_L, Cb) # inputs are unitless
-        # primative error handling
-        if inBound == 1:
-            #print("Success! Converged to: ")
-            outputs['L'] = L
-            outputs['B'] = B
-            outputs['T'] = T
-        if inBound == 0:
-            #print("Failed to converge!!!")
-            outputs['L'] = 1.0
-            outputs['B'] = 1.0
-            outputs['T'] = 1.0
+        # the balance of compute at these inputs, solved again only if compute was skipped (e.g. by a cache hit)
+        # failed designs are held at 1.0 and have zero derivatives
+        if self.balanced is None or not all(np.array_equal(inputs[name], x) for name, x in zip(('BT', 'TL', 'Cb'), self.balanced[0])):
+            L,B,T,inBound = self.balance(inputs)
+            self.balanced = ([inputs[name].copy() for name in ('BT', 'TL', 'Cb')], L, inBound)
+        L,inBound = self.balanced[1:]
+        T = T_to_L*L
+        B = B_to_T*T
+        Displ = L*B*T*Cb*rho
+
+        # partials of the residual Wt - Displ, with T = TL*L and B = BT*TL*L substituted
+        # with a table these are the partials of the exact balance at the interpolated length
+        dW = grubisicWtsVecDeriv(Cb, T, L, B, MCR, Vk)
+        dR_dL = dW[1]*T_to_L + dW[2] + dW[3]*B_to_T*T_to_L - 3*Displ/L
+        dR_dBT = dW[3]*T_to_L*L - Displ/B_to_T
+        dR_dTL = (dW[1] + dW[3]*B_to_T)*L - 2*Displ/T_to_L
+        dR_dCb = dW[0] - Displ/Cb
+
+        # implicit function theorem, dL/dx = -(dR/dx)/(dR/dL)
+        dL_dBT = -dR_dBT/dR_dL
+        dL_dTL = -dR_dTL/dR_dL
+        dL_dCb = -dR_dCb/dR_dL
+
+        partials['L', 'BT'] = dL_dBT*inBound
+        partials['L', 'TL'] = dL_dTL*inBound
+        partials['L', 'Cb'] = dL_dCb*inBound
+        partials['T', 'BT'] = T_to_L*dL_dBT*inBound
+        partials['T', 'TL'] = (L + T_to_L*dL_dTL)*inBound
+        partials['T', 'Cb'] = T_to_L*dL_dCb*inBound
+        partials['B', 'BT'] = (T_to_L*L + B_to_T*T_to_L*dL_dBT)*inBound
+        partials['B', 'TL'] = (B_to_T*L + B_to_T*T_to_L*dL_dTL)*inBound
+        partials['B', 'Cb'] = B_to_T*T_to_L*dL_dCb*inBound
 
 
 # debugging code, verifies that inputs, outputs, and calculations are working properly within the component
@@ -55,8 +117,8 @@ if __name__ == "__main__":
     #units defined within OpenMDAO for completeness
     ivc = om.IndepVarComp()
     ivc.add_output('LB', 4.0,) #unitless
-    ivc.add_output('BT', 2.0, ) #unitless
-    ivc.add_output('TL', 0.15,) #unitless
+    ivc.add_output('BT', 3.0, ) #unitless
+    ivc.add_output('TL', 0.1,) #unitless
     ivc.add_output('Cb', 0.4) #unitless
 
     # define subsystems to reference variables
@@ -78,6 +140,7 @@ if __name__ == "__main__":
     print(prob['ratio_comp.B'])
     print(prob['ratio_comp.T'])
     print(prob['ratio_comp.Cb'])
+    prob.check_partials(compact_print=True)
 
 
     #change definitions and rerun
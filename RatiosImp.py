@@ -1,31 +1,52 @@
 # package, function, and class imports
 from __future__ import division, print_function
 import openmdao.api as om
-import math
-from RatioWeights import RatioWeights
-from weightCurves import grubisicWts #modify this if using a different weight estimation
+import numpy as np
+from RatioWeights import RatioWeightsVec, rho, Vk
+from weightCurves import grubisicWtsVec, grubisicWtsVecDeriv #modify this if using a different weight estimation
 
 
 # the definition of the Ratios IMPLICIT component, based on residuals
-
+# L/B, B/T and T/L are only independent through two of them (L/B*B/T*T/L = 1), so B/T and T/L are enforced together
+# with the weight = displacement balance, and err1 reports how far L/B of the balanced design is from the input
 class RatiosImp(om.ImplicitComponent):
-    """Computes dimensions of roughly balanced vessel based on dimensionless ratios."""
-
-    def setup(self):
-        self.add_input('LB') #unitless
-        self.add_input('BT') #unitless
-        self.add_input('TL') #unitless
-        self.add_input('Cb')  #unitless
+    """Computes dimensions of a balanced vessel based on dimensionless ratios."""
 
-        self.add_output('L', units='m', lower=19, upper=51)
-        self.add_output('B', units='m', lower=2, upper=12)
-        self.add_output('T', units='m', lower=1, upper=5)
-        self.add_output('Excess', units='t')
-        self.add_output('err1')
-        self.add_output('err2')
-        self.add_output('err3')
+    def initialize(self):
+        self.options.declare('num_nodes', types=int, default=1, desc='number of designs evaluated in each solve')
+        self.options.declare('MCR', default=500.0, desc='engine power used in the weight estimate, kilowatts')
 
-        self.declare_partials(of='*', wrt='*')
+    def setup(self):
+        nn = self.options['num_nodes']
+        self.add_input('LB', shape=nn) #unitless
+        self.add_input('BT', shape=nn) #unitless
+        self.add_input('TL', shape=nn) #unitless
+        self.add_input('Cb', shape=nn)  #unitless
+
+        self.add_output('L', 30*np.ones(nn), units='m', lower=19, upper=51)
+        # B and T are set by the ratios, so only the length search is bounded
+        self.add_output('B', 9*np.ones(nn), units='m')
+        self.add_output('T', 3*np.ones(nn), units='m')
+        self.add_output('Excess', shape=nn, units='t')
+        self.add_output('err1', shape=nn)
+        self.add_output('err2', shape=nn)
+        self.add_output('err3', shape=nn)
+        # 1 for designs that balance between 19 and 51 m, 0 for those held at 51 m
+        self.add_output('inBound', np.ones(nn)) #unitless
+
+        # designs whose weight and displacement do not cross between 19 and 51 m, set by guess_nonlinear
+        self.inBound = np.ones(nn, dtype=int)
+
+        # each design only depends on its own inputs and outputs
+        ar = np.arange(nn)
+        self.declare_partials('L', ['L', 'B', 'T', 'Cb'], rows=ar, cols=ar)
+        self.declare_partials('B', ['B', 'T', 'BT'], rows=ar, cols=ar)
+        self.declare_partials('T', ['T', 'L', 'TL'], rows=ar, cols=ar)
+        self.declare_partials('Excess', ['Excess', 'L', 'B', 'T', 'Cb'], rows=ar, cols=ar)
+        self.declare_partials('err1', ['err1', 'L', 'B', 'LB'], rows=ar, cols=ar)
+        self.declare_partials('err2', ['err2', 'B', 'T', 'BT'], rows=ar, cols=ar)
+        self.declare_partials('err3', ['err3', 'T', 'L', 'TL'], rows=ar, cols=ar)
+        self.declare_partials('inBound', 'inBound', rows=ar, cols=ar, val=1.0)
 
     def apply_nonlinear(self, inputs, outputs, residuals):
         LB = inputs['LB']
@@ -37,19 +58,22 @@ class RatiosImp(om.ImplicitComponent):
         B = outputs['B']
         T = outputs['T']
 
-        rho = 1.026 # t/m^3
-        Wt = grubisicWts(Cb, T, L, B, 1000, 16)
+        Wt = grubisicWtsVec(Cb, T, L, B, self.options['MCR'], Vk)
         Displ = (L*B*T*Cb*rho)
 
-        residuals['Excess'] = (Wt-Displ)
-        # residuals['err1'] = ((L/B)-LB)
-        # residuals['err2'] = ((B/T)-BT)
-        # residuals['err3'] = ((T/L)-TL)
-        # residuals['Excess'] = grubisicWts(Cb, T, L, B, 1000, 16) - (L*B*T*Cb*rho)
-        #residuals['Excess'] = (Cb*rho*(L*B*T)*(LB*BT*TL)) - grubisicWts(Cb, T, L, B, 1000, 16)
-
-    def solve_nonlinear(self, inputs, outputs):
-        LB = inputs['LB']
+        # L balances weight and displacement, B and T follow from the ratios
+        # designs that cannot balance are held at the last length and keep a nonzero Excess
+        residuals['L'] = np.where(self.inBound == 1, Wt-Displ, L-51)
+        residuals['B'] = B - (BT*T)
+        residuals['T'] = T - (TL*L)
+        # explicit definitions, zero once the outputs are updated
+        residuals['Excess'] = outputs['Excess'] - (Displ-Wt)
+        residuals['err1'] = outputs['err1'] - ((L/B)-LB)
+        residuals['err2'] = outputs['err2'] - ((B/T)-BT)
+        residuals['err3'] = outputs['err3'] - ((T/L)-TL)
+        residuals['inBound'] = outputs['inBound'] - self.inBound
+
+    def linearize(self, inputs, outputs, partials):
         BT = inputs['BT']
         TL = inputs['TL']
         Cb = inputs['Cb']
@@ -58,47 +82,88 @@ class RatiosImp(om.ImplicitComponent):
         B = outputs['B']
         T = outputs['T']
 
-        rho = 1.026 # t/m^3
-        Wt = grubisicWts(Cb, T, L, B, 1000, 16)
-        Displ = (L*B*T*Cb*rho)
-
-        outputs['Excess'] = (Cb*rho*(L*B*T)*(LB*BT*TL)) - grubisicWts(Cb, T, L, B, 1000, 16)
-
-
-
-prob = om.Problem()
-model = prob.model
-
-model.add_subsystem('ratio_comp', RatiosImp())
-
-newton = model.nonlinear_solver = om.NewtonSolver(solve_subsystems=False)
-newton.options['maxiter'] = 50
-model.linear_solver = om.ScipyKrylov()
-
-#setup problem and run with initial definitions
-prob.setup()
-prob['ratio_comp.LB'] = 4.0
-prob['ratio_comp.BT'] = 2.0
-prob['ratio_comp.TL'] = 0.15
-prob['ratio_comp.Cb'] = .40
-prob.run_model()
-print("-- L/B = 4.0, B/T = 2.0, T/L =0.15, Cb = 0.40 --")
-print("Excess = ", prob['ratio_comp.Excess'])
-print("err1 = ", prob['ratio_comp.err1'])
-print("L = ", prob['ratio_comp.L'])
-print("B = ", prob['ratio_comp.B'])
-print("T = ", prob['ratio_comp.T'])
-print("Cb = ", prob['ratio_comp.Cb'])
-
-
-#change definitions and rerun
-prob['ratio_comp.LB'] = 3
-prob['ratio_comp.BT'] = 2.5
-prob['ratio_comp.TL'] = 0.15
-prob['ratio_comp.Cb'] = .39
-prob.run_model()
-print("-- L/B = 3.0, B/T = 2.5, T/L =0.15, Cb = 0.39 --")
-print("L = ", prob['ratio_comp.L'])
-print("B = ", prob['ratio_comp.B'])
-print("T = ", prob['ratio_comp.T'])
-print("Cb = ", prob['ratio_comp.Cb'])
+        # gradients of weight over (Cb, T, L, B, MCR) and displacement over (Cb, T, L, B)
+        dW = grubisicWtsVecDeriv(Cb, T, L, B, self.options['MCR'], Vk)
+        dD = rho*np.array([L*B*T, L*B*Cb, B*T*Cb, L*T*Cb])
+
+        inBound = self.inBound
+        partials['L', 'Cb'] = (dW[0] - dD[0])*inBound
+        partials['L', 'T'] = (dW[1] - dD[1])*inBound
+        partials['L', 'L'] = np.where(inBound == 1, dW[2] - dD[2], 1.0)
+        partials['L', 'B'] = (dW[3] - dD[3])*inBound
+
+        partials['B', 'B'] = 1.0
+        partials['B', 'T'] = -BT
+        partials['B', 'BT'] = -T
+
+        partials['T', 'T'] = 1.0
+        partials['T', 'L'] = -TL
+        partials['T', 'TL'] = -L
+
+        partials['Excess', 'Excess'] = 1.0
+        partials['Excess', 'Cb'] = dW[0] - dD[0]
+        partials['Excess', 'T'] = dW[1] - dD[1]
+        partials['Excess', 'L'] = dW[2] - dD[2]
+        partials['Excess', 'B'] = dW[3] - dD[3]
+
+        partials['err1', 'err1'] = 1.0
+        partials['err1', 'L'] = -1/B
+        partials['err1', 'B'] = L/(B*B)
+        partials['err1', 'LB'] = 1.0
+
+        partials['err2', 'err2'] = 1.0
+        partials['err2', 'B'] = -1/T
+        partials['err2', 'T'] = B/(T*T)
+        partials['err2', 'BT'] = 1.0
+
+        partials['err3', 'err3'] = 1.0
+        partials['err3', 'T'] = -1/L
+        partials['err3', 'L'] = T/(L*L)
+        partials['err3', 'TL'] = 1.0
+
+    def guess_nonlinear(self, inputs, outputs, residuals):
+        # start Newton from a coarse bisection of the balance, a few vectorized passes to within 0.5 m
+        L,B,T,self.inBound = RatioWeightsVec(inputs['LB'], inputs['BT'], inputs['TL'], inputs['Cb'], tol=0.5)
+        outputs['L'] = L
+        outputs['B'] = B
+        outputs['T'] = T
+
+
+# debugging code, verifies that inputs, outputs, and calculations are working properly within the component
+if __name__ == "__main__":
+    prob = om.Problem()
+    model = prob.model
+
+    model.add_subsystem('ratio_comp', RatiosImp(), promotes=['*'])
+
+    newton = model.nonlinear_solver = om.NewtonSolver(solve_subsystems=False)
+    newton.options['maxiter'] = 20
+    newton.options['iprint'] = 2
+    newton.linesearch = om.BoundsEnforceLS()
+    model.linear_solver = om.DirectSolver()
+
+    #setup problem and run with initial definitions
+    prob.setup()
+    prob['LB'] = 3.33
+    prob['BT'] = 3.0
+    prob['TL'] = 0.1
+    prob['Cb'] = .40
+    prob.run_model()
+    print("-- L/B = 3.33, B/T = 3.0, T/L =0.1, Cb = 0.40 --")
+    print("Excess = ", prob['Excess'])
+    print("err1 = ", prob['err1'])
+    print("L = ", prob['L'])
+    print("B = ", prob['B'])
+    print("T = ", prob['T'])
+    prob.check_partials(compact_print=True)
+
+    #change definitions and rerun
+    prob['LB'] = 5
+    prob['BT'] = 2.0
+    prob['TL'] = 0.06
+    prob['Cb'] = .40
+    prob.run_model()
+    print("-- L/B = 5.0, B/T = 2.0, T/L =0.06, Cb = 0.40 --")
+    print("L = ", prob['L'])
+    print("B = ", prob['B'])
+    print("T = ", prob['T'])
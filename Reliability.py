@@ -4,6 +4,7 @@
 # package, function, and class imports
 from __future__ import division, print_function
 import openmdao.api as om
+import numpy as np
 import math
 
 # the definition of the Reliability component
@@ -12,18 +13,25 @@ class Reliability(om.ExplicitComponent):
     Evaluates the probability of failure for a mission using empirical estimates
     """
 
+    def initialize(self) :
+        self.options.declare('num_nodes', types=int, default=1, desc='number of designs evaluated in each compute call')
+        self.options.declare('deriv_method', default='exact', values=['exact', 'cs', 'fd'], desc='exact uses compute_partials, cs or fd approximates the same partials')
+
     # setup input and output variables for the component
     def setup(self) :
-        self.add_input('MCR', units='kW') #kilowatts
-        self.add_input('etaRun')
-        self.add_input('nStarts')
-        self.add_input('tMission', units='h') #hours
-        self.add_input('fwCap', units='MJ') #megajoules
+        nn = self.options['num_nodes']
+        self.add_input('MCR', shape=nn, units='kW') #kilowatts
+        self.add_input('etaRun', shape=nn)
+        self.add_input('nStarts', shape=nn)
+        self.add_input('tMission', shape=nn, units='h') #hours
+        self.add_input('fwCap', shape=nn, units='MJ') #megajoules
 
-        self.add_output('failProb')
+        self.add_output('failProb', shape=nn)
 
-        # Finite difference all partials.
-        self.declare_partials('*', '*', method='fd')
+        # Analytic partials unless deriv_method requests an approximation
+        # each design only depends on its own inputs
+        ar = np.arange(nn)
+        self.declare_partials('failProb', ['etaRun', 'nStarts', 'tMission'], rows=ar, cols=ar, method=self.options['deriv_method'])
 
 
     def compute(self, inputs, outputs) :
@@ -50,6 +58,20 @@ class Reliability(om.ExplicitComponent):
         # combine probabilities
         outputs['failProb'] = runProb + startProb + fesdProb;
 
+    def compute_partials(self, inputs, partials) :
+        if self.options['deriv_method'] != 'exact':
+            return
+
+        etaRun = inputs['etaRun']
+        tMission = inputs['tMission']
+        engineMTBF = 10000 # hours
+        failPerStart = (1/10000)
+        fesdMTBF = 10000 # hours
+
+        partials['failProb', 'etaRun'] = (tMission/engineMTBF) - (tMission/fesdMTBF)
+        partials['failProb', 'nStarts'] = failPerStart
+        partials['failProb', 'tMission'] = (etaRun/engineMTBF) + ((1-etaRun)/fesdMTBF)
+
 # debugging code, verifies that inputs, outputs, and calculations are working properly within the component
 if __name__ == "__main__":
     #define the model
@@ -80,6 +102,8 @@ if __name__ == "__main__":
     prob = om.Problem(model)
     prob.setup()
     prob.run_model()
+    print(prob['rel_comp.failProb'])
+    prob.check_partials(compact_print=True)
     # print("Fuel Weight: " + str(prob['rel_comp.fuelWt']))
     # print("Max MCR: " + str(prob['rel_comp.MCR']))
     # print("Runtime Frac: " + str(prob['rel_comp.etaRun']))
@@ -4,8 +4,10 @@
 # package, function, and class imports
 from __future__ import division, print_function
 import openmdao.api as om
+import numpy as np
 import math
-from resistanceCurves import series64 #modify this if using a different resistance curve
+from resistanceCurves import series64Vec, series64VecDeriv #modify this if using a different resistance curve
+from resistanceCurves import series64SmoothVec, series64SmoothVecDeriv
 
 # the definition of the Resistance component
 class Resistance(om.ExplicitComponent):
@@ -13,18 +15,25 @@ class Resistance(om.ExplicitComponent):
     Evaluates the hull resistance using Series 64 model test data
     """
 
+    def initialize(self) :
+        self.options.declare('num_nodes', types=int, default=1, desc='number of designs evaluated in each compute call')
+        self.options.declare('deriv_method', default='exact', values=['exact', 'cs', 'fd'], desc='exact uses compute_partials, cs or fd approximates the same partials')
+
     # setup input and output variables for the component
     def setup(self) :
-        self.add_input('L', units='m')
-        self.add_input('S', units='m*m')
-        self.add_input('Displ', units='t')
-        self.add_input('Cb')
+        nn = self.options['num_nodes']
+        self.add_input('L', shape=nn, units='m')
+        self.add_input('S', shape=nn, units='m*m')
+        self.add_input('Displ', shape=nn, units='t')
+        self.add_input('Cb', shape=nn)
         #self.add_input('Vk', units='kn') - Ignoring Vk because we do not intend for velocity to vary during an optimization
 
-        self.add_output('R', units='N')
+        self.add_output('R', shape=nn, units='N')
 
-        # Finite difference all partials.
-        self.declare_partials('*', '*', method='fd')
+        # Analytic partials unless deriv_method requests an approximation
+        # each design only depends on its own inputs and Cb only selects the regression bin
+        ar = np.arange(nn)
+        self.declare_partials('R', ['L', 'S', 'Displ'], rows=ar, cols=ar, method=self.options['deriv_method'])
 
 
     def compute(self, inputs, outputs) :
@@ -35,8 +44,61 @@ class Resistance(om.ExplicitComponent):
         Cb = inputs['Cb']
         #Vk = inputs['Vk']
 
-        # calls the series64 function - note that other resistance curves could be used
-        outputs['R'] = series64(L, S, Displ, Cb, 16) # inputs in meters, meters^2,
+        # calls the series64Vec function - note that other resistance curves could be used
+        outputs['R'], inRange = series64Vec(L, S, Displ, Cb, 16) # inputs in meters, meters^2, metric tonnes, unitless, knots
+
+    def compute_partials(self, inputs, partials) :
+        if self.options['deriv_method'] != 'exact':
+            return
+
+        dR = series64VecDeriv(inputs['L'], inputs['S'], inputs['Displ'], inputs['Cb'], 16)
+        partials['R', 'L'] = dR[0]
+        partials['R', 'S'] = dR[1]
+        partials['R', 'Displ'] = dR[2]
+
+# the definition of the ResistanceSmooth component
+# same inputs and output as Resistance, but the resistance is interpolated from a table built on the Series 64
+# regression so it is smooth across the Cb and Froude number bins and has a gradient with respect to Cb
+# inRange is 1 for designs inside the table and 0 for designs evaluated at the nearest table edge
+class ResistanceSmooth(om.ExplicitComponent):
+    """
+    Evaluates the hull resistance from a smooth table of the Series 64 model test data
+    """
+
+    def initialize(self) :
+        self.options.declare('num_nodes', types=int, default=1, desc='number of designs evaluated in each compute call')
+        self.options.declare('deriv_method', default='exact', values=['exact', 'cs', 'fd'], desc='exact uses compute_partials, cs or fd approximates the same partials')
+
+    # setup input and output variables for the component
+    def setup(self) :
+        nn = self.options['num_nodes']
+        self.add_input('L', shape=nn, units='m')
+        self.add_input('S', shape=nn, units='m*m')
+        self.add_input('Displ', shape=nn, units='t')
+        self.add_input('Cb', shape=nn)
+
+        self.add_output('R', shape=nn, units='N')
+        self.add_output('inRange', np.ones(nn)) #1 inside the table, 0 outside
+
+        # Analytic partials unless deriv_method requests an approximation
+        # each design only depends on its own inputs, inRange is a flag and has no partials
+        ar = np.arange(nn)
+        self.declare_partials('R', ['L', 'S', 'Displ', 'Cb'], rows=ar, cols=ar, method=self.options['deriv_method'])
+
+    def compute(self, inputs, outputs) :
+        R, inRange = series64SmoothVec(inputs['L'], inputs['S'], inputs['Displ'], inputs['Cb'], 16) # inputs in meters, meters^2, metric tonnes, unitless, knots
+        outputs['R'] = R
+        outputs['inRange'] = inRange
+
+    def compute_partials(self, inputs, partials) :
+        if self.options['deriv_method'] != 'exact':
+            return
+
+        dR = series64SmoothVecDeriv(inputs['L'], inputs['S'], inputs['Displ'], inputs['Cb'], 16)
+        partials['R', 'L'] = dR[0]
+        partials['R', 'S'] = dR[1]
+        partials['R', 'Displ'] = dR[2]
+        partials['R', 'Cb'] = dR[3]
 
 # debugging code, verifies that inputs, outputs, and calculations are working properly within the component
 if __name__ == "__main__":
@@ -54,12 +116,15 @@ if __name__ == "__main__":
     # define subsystems to reference variables
     model.add_subsystem('des_vars', ivc)
     model.add_subsystem('resist_comp', Resistance()) # this is the component defined above
+    model.add_subsystem('smooth_comp', ResistanceSmooth())
 
     #connect variables, note naming convention
     model.connect('des_vars.L', 'resist_comp.L')
     model.connect('des_vars.S', 'resist_comp.S')
     model.connect('des_vars.Displ', 'resist_comp.Displ')
     model.connect('des_vars.Cb', 'resist_comp.Cb')
+    for name in ['L', 'S', 'Displ', 'Cb']:
+        model.connect('des_vars.'+name, 'smooth_comp.'+name)
     # model.connect('des_vars.Vk', 'resist_comp.Vk')
 
     #setup problem and run with initial definitions
@@ -67,6 +132,8 @@ if __name__ == "__main__":
     prob.setup()
     prob.run_model()
     print(prob['resist_comp.R'])
+    print(prob['smooth_comp.R'], prob['smooth_comp.inRange'])
+    prob.check_partials(compact_print=True)
 
     #change definitions and rerun
     prob['des_vars.L'] = 40
@@ -76,3 +143,4 @@ if __name__ == "__main__":
     # prob['des_vars.Vk'] = 16
     prob.run_model()
     print(prob['resist_comp.R'])
+    print(prob['smooth_comp.R'], prob['smooth_comp.inRange'])
@@ -3,8 +3,9 @@
 
 # package, function, and class imports
 from __future__ import division, print_function
-from estGMT import estGMT
+from estGMT import estGMTVec, estGMTVecDeriv
 import openmdao.api as om
+import numpy as np
 import math
 
 # the definition of the Weights component
@@ -12,18 +13,25 @@ class Stability(om.ExplicitComponent):
     """
     Evaluates the metacentric height based on rudimentary equations
     """
+    def initialize(self) :
+        self.options.declare('num_nodes', types=int, default=1, desc='number of designs evaluated in each compute call')
+        self.options.declare('deriv_method', default='exact', values=['exact', 'cs', 'fd'], desc='exact uses compute_partials, cs or fd approximates the same partials')
+
     # setup input and output variables for the component
     def setup(self) :
+        nn = self.options['num_nodes']
         #setup inputs or variables needed for function
-        self.add_input('Cb')
-        self.add_input('T', units='m')
-        self.add_input('L', units='m')
-        self.add_input('B', units='m')
+        self.add_input('Cb', shape=nn)
+        self.add_input('T', shape=nn, units='m')
+        self.add_input('L', shape=nn, units='m')
+        self.add_input('B', shape=nn, units='m')
 
-        self.add_output('GMT', units='m')
+        self.add_output('GMT', shape=nn, units='m')
 
-        # Finite difference all partials.
-        self.declare_partials('*', '*', method='fd')
+        # Analytic partials unless deriv_method requests an approximation
+        # each design only depends on its own inputs and GMT does not depend on L
+        ar = np.arange(nn)
+        self.declare_partials('GMT', ['Cb', 'T', 'B'], rows=ar, cols=ar, method=self.options['deriv_method'])
 
     def compute(self, inputs, outputs) :
         # inputs
@@ -32,8 +40,17 @@ class Stability(om.ExplicitComponent):
         L = inputs['L']
         B = inputs['B']
 
-        # calls the estGMT function - note that other estimations could be used
-        outputs['GMT'] = estGMT(Cb, T, L, B) # inputs in unitless, meters, meters, meters
+        # calls the estGMTVec function - note that other estimations could be used
+        outputs['GMT'], KB, BM, KG = estGMTVec(Cb, T, L, B) # inputs in unitless, meters, meters, meters
+
+    def compute_partials(self, inputs, partials) :
+        if self.options['deriv_method'] != 'exact':
+            return
+
+        dGMT = estGMTVecDeriv(inputs['Cb'], inputs['T'], inputs['L'], inputs['B'])
+        partials['GMT', 'Cb'] = dGMT[0]
+        partials['GMT', 'T'] = dGMT[1]
+        partials['GMT', 'B'] = dGMT[3]
 
 # debugging code, verifies that inputs, outputs, and calculations are working properly within the component
 if __name__ == "__main__":
@@ -62,6 +79,7 @@ if __name__ == "__main__":
     prob.setup()
     prob.run_model()
     print(prob['stab_comp.GMT'])
+    prob.check_partials(compact_print=True)
 
     #change definitions and rerun
     prob['des_vars.Cb'] = 0.5
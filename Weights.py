@@ -3,8 +3,9 @@
 
 # package, function, and class imports
 from __future__ import division, print_function
-from weightCurves import parsonsWts, grubisicWts, grubisicWtsNoFuel #modify this if using a different weight estimation
+from weightCurves import parsonsWts, grubisicWtsVec, grubisicWtsNoFuelVec, grubisicWtsVecDeriv, grubisicWtsNoFuelVecDeriv #modify this if using a different weight estimation
 import openmdao.api as om
+import numpy as np
 import math
 
 # the definition of the Weights component
@@ -12,22 +13,29 @@ class Weights(om.ExplicitComponent):
     """
     Evaluates the weights based on regressions
     """
+    def initialize(self) :
+        self.options.declare('num_nodes', types=int, default=1, desc='number of designs evaluated in each compute call')
+        self.options.declare('deriv_method', default='exact', values=['exact', 'cs', 'fd'], desc='exact uses compute_partials, cs or fd approximates the same partials')
+
     # setup input and output variables for the component
     def setup(self) :
+        nn = self.options['num_nodes']
         #setup inputs or variables needed for function
-        self.add_input('Cb')
+        self.add_input('Cb', shape=nn)
         #self.add_input('D', units='m') - Depth implicitly calculated in grubisicWeights
-        self.add_input('T', units='m')
-        self.add_input('L', units='m')
-        self.add_input('B', units='m')
+        self.add_input('T', shape=nn, units='m')
+        self.add_input('L', shape=nn, units='m')
+        self.add_input('B', shape=nn, units='m')
         #self.add_input('MCR', units='kW') - Fixing power as it is an objective in RFP
         #self.add_input('Vk', units='kn') - Ignoring Vk because we do not intend for velocity to vary during an optimization
 
-        self.add_output('Disp', units='t')
-        self.add_output('Wt', units='t')
+        self.add_output('Disp', shape=nn, units='t')
+        self.add_output('Wt', shape=nn, units='t')
 
-        # Finite difference all partials.
-        self.declare_partials('*', '*', method='fd')
+        # Analytic partials unless deriv_method requests an approximation
+        # each design only depends on its own inputs
+        ar = np.arange(nn)
+        self.declare_partials('*', '*', rows=ar, cols=ar, method=self.options['deriv_method'])
 
     def compute(self, inputs, outputs) :
         # inputs
@@ -41,29 +49,57 @@ class Weights(om.ExplicitComponent):
 
         # calls the parsonsWts function - note that other estimations could be used
         #outputs['Wt'] = parsonsWts(Cb, D, T, L, B, MCR, 16) # inputs in unitless, meters, meters, meters, meters, kilowatts, knots
-        outputs['Wt'] = grubisicWts(Cb, T, L, B, 500, 16) # inputs in unitless, meters, meters, meters, meters, kilowatts, knots
+        outputs['Wt'] = grubisicWtsVec(Cb, T, L, B, 500, 16) # inputs in unitless, meters, meters, meters, meters, kilowatts, knots
         outputs['Disp'] = (1.026*Cb*L*B*T) #metric tonnes, vessel displacement
 
+    def compute_partials(self, inputs, partials) :
+        if self.options['deriv_method'] != 'exact':
+            return
+
+        Cb = inputs['Cb']
+        T = inputs['T']
+        L = inputs['L']
+        B = inputs['B']
+
+        dWt = grubisicWtsVecDeriv(Cb, T, L, B, 500, 16)
+        partials['Wt', 'Cb'] = dWt[0]
+        partials['Wt', 'T'] = dWt[1]
+        partials['Wt', 'L'] = dWt[2]
+        partials['Wt', 'B'] = dWt[3]
+
+        partials['Disp', 'Cb'] = 1.026*L*B*T
+        partials['Disp', 'T'] = 1.026*Cb*L*B
+        partials['Disp', 'L'] = 1.026*Cb*B*T
+        partials['Disp', 'B'] = 1.026*Cb*L*T
+
 # the definition of the Weights component
 class WeightsNoFuel(om.ExplicitComponent):
     """
     Evaluates the weights based on regressions
     """
+    def initialize(self) :
+        self.options.declare('num_nodes', types=int, default=1, desc='number of designs evaluated in each compute call')
+        self.options.declare('deriv_method', default='exact', values=['exact', 'cs', 'fd'], desc='exact uses compute_partials, cs or fd approximates the same partials')
+
     # setup input and output variables for the component
     def setup(self) :
+        nn = self.options['num_nodes']
         #setup inputs or variables needed for function
-        self.add_input('Cb')
-        self.add_input('T', units='m')
-        self.add_input('L', units='m')
-        self.add_input('B', units='m')
-        self.add_input('MCR', units='kW')
-        self.add_input('fuelWt', units='t')
-
-        self.add_output('Disp', units='t')
-        self.add_output('Wt', units='t')
-
-        # Finite difference all partials.
-        self.declare_partials('*', '*', method='fd')
+        self.add_input('Cb', shape=nn)
+        self.add_input('T', shape=nn, units='m')
+        self.add_input('L', shape=nn, units='m')
+        self.add_input('B', shape=nn, units='m')
+        self.add_input('MCR', shape=nn, units='kW')
+        self.add_input('fuelWt', shape=nn, units='t')
+
+        self.add_output('Disp', shape=nn, units='t')
+        self.add_output('Wt', shape=nn, units='t')
+
+        # Analytic partials unless deriv_method requests an approximation
+        # each design only depends on its own inputs
+        ar = np.arange(nn)
+        self.declare_partials('Wt', '*', rows=ar, cols=ar, method=self.options['deriv_method'])
+        self.declare_partials('Disp', ['Cb', 'T', 'L', 'B'], rows=ar, cols=ar, method=self.options['deriv_method'])
 
     def compute(self, inputs, outputs) :
         # inputs
@@ -76,9 +112,31 @@ class WeightsNoFuel(om.ExplicitComponent):
 
         # calls the parsonsWts function - note that other estimations could be used
         #outputs['Wt'] = parsonsWts(Cb, D, T, L, B, MCR, 16) # inputs in unitless, meters, meters, meters, meters, kilowatts, knots
-        outputs['Wt'] = grubisicWtsNoFuel(Cb, T, L, B, MCR, fuelWt) # inputs in unitless, meters, meters, meters, meters, kilowatts, metric tonnes
+        outputs['Wt'] = grubisicWtsNoFuelVec(Cb, T, L, B, MCR, fuelWt) # inputs in unitless, meters, meters, meters, meters, kilowatts, metric tonnes
         outputs['Disp'] = (1.026*Cb*L*B*T) #metric tonnes, vessel displacement
 
+    def compute_partials(self, inputs, partials) :
+        if self.options['deriv_method'] != 'exact':
+            return
+
+        Cb = inputs['Cb']
+        T = inputs['T']
+        L = inputs['L']
+        B = inputs['B']
+
+        dWt = grubisicWtsNoFuelVecDeriv(Cb, T, L, B, inputs['MCR'], inputs['fuelWt'])
+        partials['Wt', 'Cb'] = dWt[0]
+        partials['Wt', 'T'] = dWt[1]
+        partials['Wt', 'L'] = dWt[2]
+        partials['Wt', 'B'] = dWt[3]
+        partials['Wt', 'MCR'] = dWt[4]
+        partials['Wt', 'fuelWt'] = dWt[5]
+
+        partials['Disp', 'Cb'] = 1.026*L*B*T
+        partials['Disp', 'T'] = 1.026*Cb*L*B
+        partials['Disp', 'L'] = 1.026*Cb*B*T
+        partials['Disp', 'B'] = 1.026*Cb*L*T
+
 # debugging code, verifies that inputs, outputs, and calculations are working properly within the component
 if __name__ == "__main__":
     #define the model
@@ -112,6 +170,7 @@ if __name__ == "__main__":
     prob.setup()
     prob.run_model()
     print(prob['wts_comp.Wt'])
+    prob.check_partials(compact_print=True)
 
     #change definitions and rerun
     prob['des_vars.Cb'] = 0.5
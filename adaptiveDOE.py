@@ -0,0 +1,119 @@
+# adaptiveDOE.py - sequential design of experiment that concentrates samples on the feasible region
+# AdaptiveFeasibleGenerator is a DOEDriver case generator that runs in rounds: an initial Latin hypercube, then in
+# every round a nearest neighbour estimate of the feasible region, built from the cases run so far, places most new
+# samples around feasible designs and along the feasible boundary, while the rest keep exploring empty space
+# DOEDriver runs each case before asking the generator for the next one, so feasibility is read from the model
+# after every case; under run_parallel each rank would only see its own cases, so run it serially
+
+# package, function, and class imports
+from __future__ import division, print_function
+from openmdao.drivers.doe_generators import DOEGenerator
+from constraints import feasibleMask, constraintVariables
+import numpy as np
+
+# ---------
+# feasibility of the case just run by a v3 model, the constraints of constraints.py as in the case plotters
+def v3Feasible(model) : # model group after run_model
+    return bool(np.all(feasibleMask({name: model.get_val(name) for name in constraintVariables()})))
+
+# ---------
+# sequential sampling generator for om.DOEDriver
+class AdaptiveFeasibleGenerator(DOEGenerator):
+    """
+    Generates cases in rounds, placing new samples near the feasible designs found so far
+    """
+
+    def __init__(self, feasible, samples=1500, rounds=10, explore=0.2, k=5, spread=0.05, seed=None) : # function of the model returning True for a feasible case, total cases, number of rounds, fraction of each round spent exploring, neighbours in the feasibility estimate, perturbation size as a fraction of each range, random seed
+        super(AdaptiveFeasibleGenerator, self).__init__()
+        self.feasible = feasible
+        self.samples = samples
+        self.rounds = rounds
+        self.explore = explore
+        self.k = k
+        self.spread = spread
+        self.rng = np.random.default_rng(seed)
+
+        # every case run so far, design variables scaled to the unit cube
+        self.X = np.zeros((0, 0))
+        self.y = np.zeros(0, dtype=bool)
+
+    def __call__(self, design_vars, model=None) :
+        # only bounded design variables are sampled, the rest keep the values set in the model
+        names = [name for name, meta in design_vars.items() if meta['lower'] is not None and meta['upper'] is not None]
+        sizes = [design_vars[name]['size'] for name in names]
+        lower = np.concatenate([np.broadcast_to(design_vars[name]['lower'], (size,)) for name, size in zip(names, sizes)])
+        upper = np.concatenate([np.broadcast_to(design_vars[name]['upper'], (size,)) for name, size in zip(names, sizes)])
+        splits = np.cumsum(sizes)[:-1]
+
+        self.X = np.zeros((0, len(lower)))
+        self.y = np.zeros(0, dtype=bool)
+        for n in self.roundSizes():
+            for u in self.nextRound(n):
+                values = np.split(lower + (u*(upper - lower)), splits)
+                yield list(zip(names, values))
+                # the driver has run the case by the time the generator is resumed
+                self.X = np.vstack([self.X, u])
+                self.y = np.append(self.y, self.feasible(model))
+
+    # cases per round, the first round is a Latin hypercube of the same size as the others
+    def roundSizes(self) :
+        sizes = np.full(self.rounds, self.samples//self.rounds)
+        sizes[:self.samples % self.rounds] += 1
+        return sizes[sizes > 0]
+
+    # ---------
+    # next n points in the unit cube from the cases run so far
+    def nextRound(self, n) :
+        d = self.X.shape[1]
+        if len(self.X) == 0:
+            # Latin hypercube, one stratum per sample in every variable
+            return (np.column_stack([self.rng.permutation(n) for i in range(d)]) + self.rng.random((n, d)))/n
+
+        nExploit = int(round(n*(1 - self.explore))) if np.any(self.y) else 0
+        points = self.exploit(nExploit)
+        return np.vstack([points, self.exploreSpace(n - len(points), points)])
+
+    # estimated probability of feasibility, distance weighted vote of the k nearest cases run so far
+    def feasibility(self, points) :
+        dist = np.sqrt(((points[:,np.newaxis,:] - self.X[np.newaxis,:,:])**2).sum(axis=-1))
+        k = min(self.k, len(self.X))
+        nearest = np.argpartition(dist, k - 1, axis=1)[:,:k]
+        w = 1/(np.take_along_axis(dist, nearest, axis=1) + 1e-9)
+        return (w*self.y[nearest]).sum(axis=1)/w.sum(axis=1)
+
+    # candidates scattered around the feasible cases, kept where the estimate is highest and spaced apart so the
+    # round covers the whole feasible set rather than a few clusters
+    def exploit(self, n) :
+        if n == 0:
+            return np.zeros((0, self.X.shape[1]))
+        feasibleX = self.X[self.y]
+        centers = feasibleX[self.rng.integers(len(feasibleX), size=20*n)]
+        candidates = np.clip(centers + self.rng.normal(scale=self.spread, size=centers.shape), 0, 1)
+        p = self.feasibility(candidates)
+
+        # a design next to the boundary is worth as much as one inside, so the estimate is capped before ranking
+        # and the spacing decides between them
+        score = np.minimum(p, 0.5) + (0.5*self.nearestDistance(candidates, self.X)/self.spread)
+        return self.greedySpaced(candidates[np.argsort(-score)], n, 0.5*self.spread)
+
+    # the remaining points of the round fill the largest gaps between the cases run so far
+    def exploreSpace(self, n, chosen) :
+        if n == 0:
+            return np.zeros((0, self.X.shape[1]))
+        candidates = self.rng.random((20*n, self.X.shape[1]))
+        gap = self.nearestDistance(candidates, np.vstack([self.X, chosen]))
+        return candidates[np.argsort(-gap)[:n]]
+
+    # distance from each point to the nearest of others
+    def nearestDistance(self, points, others) :
+        return np.sqrt(((points[:,np.newaxis,:] - others[np.newaxis,:,:])**2).sum(axis=-1)).min(axis=1)
+
+    # take points in order, skipping any closer than spacing to one already taken
+    def greedySpaced(self, ordered, n, spacing) :
+        taken = []
+        for point in ordered:
+            if all(np.sqrt(((point - t)**2).sum()) >= spacing for t in taken):
+                taken.append(point)
+                if len(taken) == n:
+                    break
+        return np.array(taken).reshape(-1, ordered.shape[1])
@@ -0,0 +1,116 @@
+# batchDOE.py - design of experiment that evaluates the whole sample matrix through the vectorized MUSV model
+# Rather than one run_model per case (om.DOEDriver), the Latin hypercube samples are pushed through MUSVv3 in
+# chunks of num_nodes designs and every output is kept as a column named after its model variable
+
+# package, function, and class imports
+from __future__ import division, print_function
+from musvModel import MUSVv3, v3Outputs, v3CSVFields
+from estGMT import estGMTVec
+from estParam import displacementVec, wettedSurfVec
+from poweringEstimate import poweringEstimateVec
+from weightCurves import grubisicHullWtsVec
+from constraints import constraintBounds, withinBounds, musvConstraints
+import openmdao.api as om
+import numpy as np
+
+# ---------
+# Latin hypercube sample matrix, one stratum per sample in every variable
+def lhsSamples(designVars, samples, seed=None) : # list of (name, lower, upper), number of samples, random seed
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for name, lower, upper in designVars:
+        # a random point in each of the equal strata, shuffled independently for each variable
+        u = (rng.permutation(samples) + rng.random(samples))/samples
+        columns[name] = lower + (u*(upper - lower))
+    return columns
+
+# ---------
+# reasons recorded in the 'prescreen.reason' column, 0 for designs that went on to the full model
+prescreenReasons = {0: 'passed',
+                    1: 'hull GMT outside the GMT bound',
+                    2: 'Disp below the Excess bound of the lower bound weight',
+                    3: 'PBsprint/PBcruise outside the PBratio bound'}
+
+# cheap feasibility checks of v3 designs, cheapest first, so the mission model is only run on designs that can pass
+# the GMT, Excess and PBratio constraints of constraints.py used by the case plotters
+def prescreen(Cb, T, L, B, spec=musvConstraints) : # inputs in unitless, meters, meters, meters - arrays, list of constraints
+    bounds = constraintBounds(spec)
+    reason = np.zeros(np.shape(Cb), dtype=int)
+
+    # upright stability from the hull alone
+    GMT, KB, BM, KG = estGMTVec(Cb, T, L, B)
+    reason[~withinBounds(GMT, *bounds['GMT'])] = 1
+
+    # the weight with no fuel and no engine is a lower bound on the model weight, a design whose excess over it is
+    # below the lower Excess bound stays below it for the full weight
+    rows = np.nonzero(reason == 0)[0]
+    lowerWt = grubisicHullWtsVec(Cb[rows], T[rows], L[rows], B[rows], 0)*1.05 # metric tonnes, 5% margin as in grubisicWtsNoFuelVec
+    Disp = displacementVec(Cb[rows], T[rows], L[rows], B[rows])
+    reason[rows[~withinBounds(Disp - lowerWt, bounds['Excess'][0], None, lowerWt)]] = 2
+
+    # sprint and cruise powering only, a fraction of the mission model, designs outside the resistance regression
+    # have no power estimate and are rejected
+    keep = reason[rows] == 0
+    rows, Disp = rows[keep], Disp[keep]
+    S = wettedSurfVec(Cb[rows], T[rows], L[rows], B[rows])
+    PBcruise, inRange = poweringEstimateVec(L[rows], S, Disp, Cb[rows], 16) #kW
+    PBsprint, inRange = poweringEstimateVec(L[rows], S, Disp, Cb[rows], 27) #kW
+    with np.errstate(divide='ignore', invalid='ignore'):
+        reason[rows[~withinBounds(PBsprint/PBcruise, *bounds['PBratio'])]] = 3
+
+    return reason
+
+# ---------
+# evaluate the columns of design variables with the vectorized model, chunk designs per run_model call
+# with screen=True, v3 designs rejected by prescreen are not evaluated, their outputs are nan and the reason is
+# kept in a 'prescreen.reason' column
+def runBatchDOE(samples, outputs=v3Outputs, chunk=10000, model=MUSVv3, screen=False) : # dict of design variable arrays, output names, chunk size, model group, pre-screen the designs
+    names = list(samples)
+    nCases = len(samples[names[0]])
+
+    results = {name: np.asarray(samples[name], dtype=float) for name in names}
+    for name in outputs:
+        results[name] = np.full(nCases, np.nan)
+
+    rows = np.arange(nCases)
+    if screen:
+        results['prescreen.reason'] = prescreen(results['indeps.Cb'], results['indeps.T'], results['indeps.L'], results['indeps.B'])
+        rows = np.nonzero(results['prescreen.reason'] == 0)[0]
+    if len(rows) == 0:
+        return results
+
+    nn = max(1, min(chunk, len(rows)))
+    prob = om.Problem(model(num_nodes=nn))
+    prob.setup()
+    prob.set_solver_print(level=0)
+
+    for start in range(0, len(rows), nn):
+        chunkRows = rows[start:start + nn]
+        # the last chunk is padded by repeating its final design, padded results are discarded
+        idx = chunkRows[np.minimum(np.arange(nn), len(chunkRows) - 1)]
+        for name in names:
+            prob[name] = results[name][idx]
+        prob.run_model()
+        for name in outputs:
+            results[name][chunkRows] = prob[name][:len(chunkRows)]
+
+    return results
+
+# ---------
+# write result columns to a .npz file, one array per variable name
+def writeColumns(filename, results) :
+    np.savez(filename, **results)
+
+# write result columns to the musvDOEv3cases.csv layout read by the case plotters
+def writeCSV(filename, results, fields=v3CSVFields) :
+    header = ','.join('"%s"' % label for label, name in fields)
+    data = np.column_stack([results[name] for label, name in fields])
+    np.savetxt(filename, data, fmt='%.17g', delimiter=',', header=header, comments='')
+
+# read a .csv file written by writeCSV back into result columns, named after the model variables of fields
+# columns of the file that are not in fields are skipped
+def readCSV(filename, fields=v3CSVFields) :
+    with open(filename) as f:
+        labels = [label.strip('"') for label in f.readline().strip().split(',')]
+    data = np.loadtxt(filename, delimiter=',', skiprows=1, ndmin=2)
+    return {name: data[:,labels.index(label)] for label, name in fields if label in labels}
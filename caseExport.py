@@ -0,0 +1,114 @@
+# caseExport.py - bulk export of recorded cases from an OpenMDAO SqliteRecorder file to result columns
+# om.CaseReader builds a Case object per case and get_case decodes one row at a time, which for a 15000 case DOE
+# takes about as long as the run. Here all cases of a table are read with one query, the requested variables are
+# pulled out of the stored JSON by SQLite (json_extract) and copied a batch of rows at a time into preallocated
+# columns, so memory grows with the number of columns rather than with per-case Python objects
+
+# package, function, and class imports
+from __future__ import division, print_function
+import numpy as np
+import sqlite3
+import json
+
+# recorder table and case name column of each case source
+caseTables = {'driver': ('driver_iterations', 'iteration_coordinate'),
+              'problem': ('problem_cases', 'case_name'),
+              'system': ('system_iterations', 'iteration_coordinate')}
+
+# ---------
+# read variables of every case of a recorder file into columns, in the order the cases were recorded
+# returns ({name: array of shape (cases,) or (cases, size)}, array of case names)
+def readCases(filename, names, source='driver', batch=5000) : # recorder file, output names, 'driver', 'problem' or 'system', rows per fetch
+    table, coord = caseTables[source]
+    db = sqlite3.connect(filename)
+    try:
+        nCases = db.execute('SELECT COUNT(*) FROM %s' % table).fetchone()[0]
+        first = db.execute('SELECT outputs FROM %s ORDER BY id LIMIT 1' % table).fetchone()
+        if first is not None and not isinstance(first[0], str):
+            raise ValueError("'%s' stores binary case data (an older recorder format), read it with om.CaseReader" % filename)
+
+        # variable sizes from the first case, vector variables get one column per element
+        sizes = {}
+        firstCase = json.loads(first[0]) if first is not None else {}
+        for name in names:
+            if first is not None and name not in firstCase:
+                raise KeyError("'%s' was not recorded in '%s'" % (name, filename))
+            sizes[name] = np.size(firstCase.get(name, 0))
+        columns = {name: np.full((nCases, sizes[name]), np.nan) for name in names}
+        cases = np.empty(nCases, dtype=object)
+
+        try:
+            readRowsSQL(db, table, coord, names, sizes, columns, cases, batch)
+        except sqlite3.OperationalError:
+            # SQLite built without JSON support, decode the rows in Python instead
+            readRowsJSON(db, table, coord, names, columns, cases, batch)
+    finally:
+        db.close()
+
+    results = {name: columns[name][:,0] if sizes[name] == 1 else columns[name] for name in names}
+    return results, cases.astype(str)
+
+# values pulled out of the JSON by SQLite, one float per variable element
+# json.dumps writes NaN and Infinity, which are not JSON, so they become null (read as nan) and an overflowing 9e999
+def readRowsSQL(db, table, coord, names, sizes, columns, cases, batch) :
+    text = "replace(replace(outputs, 'NaN', 'null'), 'Infinity', '9e999')"
+    paths = ['$."%s"[%d]' % (name, i) for name in names for i in range(sizes[name])]
+    values = ', '.join(['json_extract(clean, ?)']*len(paths)) or 'NULL'
+    cursor = db.execute('SELECT %s, %s FROM (SELECT id, %s, %s AS clean FROM %s) ORDER BY id' % (coord, values, coord, text, table), paths)
+
+    row = 0
+    while True:
+        rows = cursor.fetchmany(batch)
+        if not rows:
+            break
+        n = len(rows)
+        cases[row:row + n] = [r[0] for r in rows]
+        data = np.array([r[1:] for r in rows], dtype=float).reshape(n, -1)
+        col = 0
+        for name in names:
+            columns[name][row:row + n] = data[:,col:col + sizes[name]]
+            col += sizes[name]
+        row += n
+
+# the same rows decoded with the json module
+def readRowsJSON(db, table, coord, names, columns, cases, batch) :
+    cursor = db.execute('SELECT %s, outputs FROM %s ORDER BY id' % (coord, table))
+    row = 0
+    while True:
+        rows = cursor.fetchmany(batch)
+        if not rows:
+            break
+        for caseName, outputs in rows:
+            outputs = json.loads(outputs)
+            cases[row] = caseName
+            for name in names:
+                columns[name][row] = outputs[name]
+            row += 1
+
+# ---------
+# export the cases of a recorder file straight to a .npz file of named columns
+def exportCases(filename, npzFile, names, source='driver', batch=5000) : # recorder file, .npz file, output names, case source, rows per fetch
+    results, cases = readCases(filename, names, source, batch)
+    np.savez(npzFile, **results)
+    return results
+
+
+# debugging code, compares the bulk export with om.CaseReader
+if __name__ == "__main__":
+    import sys
+    import time
+    import openmdao.api as om
+
+    filename = sys.argv[1] if len(sys.argv) > 1 else 'musvDOEv4cases.sql'
+    cr = om.CaseReader(filename)
+    caseNames = cr.list_cases('driver', out_stream=None)
+    names = sorted(cr.get_case(caseNames[0]).outputs.keys())
+
+    t = time.time()
+    results, cases = readCases(filename, names)
+    print('readCases: %d cases, %d variables in %.3f s' % (len(cases), len(names), time.time() - t))
+
+    t = time.time()
+    reference = {name: np.array([cr.get_case(case).outputs[name][0] for case in caseNames]) for name in names}
+    print('CaseReader: %.3f s' % (time.time() - t))
+    print('identical:', all(np.array_equal(results[name], reference[name], equal_nan=True) for name in names))
@@ -0,0 +1,97 @@
+# constraints.py - declarative feasibility constraints shared by the DOE screening, the optimizer and the plotters
+# One spec names each constrained model variable and its bounds, optionally as fractions of another variable (a
+# tolerance such as |Excess| < 10% of Wt). feasibleMask evaluates the spec over result columns and addConstraints
+# declares the same spec to a model for a driver, so every stage works with the same feasible set
+
+# package, function, and class imports
+from __future__ import division, print_function
+import openmdao.api as om
+import numpy as np
+
+# ---------
+# (label, model variable, lower, upper, reference variable), None for an unbounded side or an absolute bound
+# the bounds of a constraint with a reference variable are fractions of it, the reference must be positive
+musvConstraints = [('GMT', 'stab.GMT', 0.0, None, None), # positive upright stability
+                   ('Excess', 'const.Excess', -0.1, 0.1, 'wts.Wt'), # displacement within 10% of weight
+                   ('PBratio', 'fuel.PBratio', None, 2.0, None)] # sprint power within twice cruise power
+
+# bounds of each constraint by label, {label: (lower, upper)}
+def constraintBounds(spec=musvConstraints) : # list of constraints
+    return {label: (lower, upper) for label, name, lower, upper, ref in spec}
+
+# model variables a spec reads, constrained and reference variables
+def constraintVariables(spec=musvConstraints) : # list of constraints
+    names = []
+    for label, name, lower, upper, ref in spec:
+        names += [n for n in (name, ref) if n is not None and n not in names]
+    return names
+
+# variable the driver bounds for each constraint, in declaration order, the ratio component of addConstraints for a
+# constraint with a reference variable
+def driverConstraints(spec=musvConstraints) : # list of constraints
+    return [name if ref is None else label + 'Ratio.ratio' for label, name, lower, upper, ref in spec]
+
+# ---------
+# values strictly inside the bounds, scaled by the reference values if given, nan is outside
+def withinBounds(values, lower, upper, ref=None) : # arrays of values, lower bound, upper bound, reference values
+    values = np.asarray(values)
+    scale = 1.0 if ref is None else np.asarray(ref)
+    inside = np.ones(np.broadcast(values, scale).shape, dtype=bool)
+    with np.errstate(invalid='ignore'):
+        if lower is not None:
+            inside &= values > lower*scale
+        if upper is not None:
+            inside &= values < upper*scale
+    return inside
+
+# feasible rows of a dict of result columns named after the model variables, a constraint with a reference variable
+# is read from the ratio column of addConstraints where there is one, e.g. in optimizer output
+def feasibleMask(columns, spec=musvConstraints) : # dict of result columns, list of constraints
+    feasible = True
+    for (label, name, lower, upper, ref), driverName in zip(spec, driverConstraints(spec)):
+        if driverName in columns:
+            feasible = feasible & withinBounds(columns[driverName], lower, upper)
+        else:
+            feasible = feasible & withinBounds(columns[name], lower, upper, columns[ref])
+    return feasible
+
+# ---------
+# declare the spec to a model before setup, a constraint with a reference variable gets an ExecComp named after its
+# label computing the ratio, which the driver bounds directly
+# call it after the model subsystems are added so the ratio components run after them, a Group that adds its
+# subsystems in setup (e.g. MUSVv3) has to be a subsystem of the model
+# drivers treat the bounds as inclusive where the mask is strict, the difference is only the designs on a bound
+def addConstraints(model, spec=musvConstraints) : # group, list of constraints
+    for label, name, lower, upper, ref in spec:
+        if ref is None:
+            model.add_constraint(name, lower=lower, upper=upper)
+            continue
+        comp = label + 'Ratio' # driverConstraints names its output
+        model.add_subsystem(comp, om.ExecComp('ratio=x/xRef', x={'shape_by_conn': True, 'units_by_conn': True},
+                                              xRef={'shape_by_conn': True, 'units_by_conn': True}, ratio={'copy_shape': 'x'}))
+        model.connect(name, comp + '.x')
+        model.connect(ref, comp + '.xRef')
+        model.add_constraint(comp + '.ratio', lower=lower, upper=upper)
+
+
+# debugging code, the driver constraints of a v3 model agree with the mask
+if __name__ == "__main__":
+    from musvModel import MUSVv3
+
+    prob = om.Problem()
+    prob.model.add_subsystem('musv', MUSVv3(num_nodes=4), promotes=['*'])
+    addConstraints(prob.model)
+    prob.setup()
+    prob['indeps.Cb'] = [0.531, 0.39, 0.41, 0.46]
+    prob['indeps.L'] = [25.61, 27.92, 37.1, 39.8]
+    prob['indeps.B'] = [11.71, 9.65, 7.68, 8.44]
+    prob['indeps.T'] = [3.88, 2.39, 3.66, 3.53]
+    prob['indeps.fwCap'] = [810, 867, 485, 969]
+    prob.run_model()
+
+    columns = {name: prob.get_val(name) for name in constraintVariables()}
+    constraints = prob.driver.get_constraint_values()
+    bounds = [(meta['lower'], meta['upper']) for meta in prob.model.get_constraints().values()]
+    driverFeasible = np.all([withinBounds(values, lower, upper) for values, (lower, upper) in zip(constraints.values(), bounds)], axis=0)
+    print('mask:  ', feasibleMask(columns))
+    print('driver:', driverFeasible)
@@ -0,0 +1,164 @@
+# diskCache.py - persistent cache of component evaluations shared across DOE and optimization runs
+# Entries live in a local SQLite file, keyed by a hash of the quantized inputs, the component and the version of the
+# calculation modules, so a rerun of the same designs reads its outputs back and any edit to e.g. weightCurves.py
+# changes every key and leaves the old entries to be evicted; the component signature (evalCache.componentSignature)
+# also hashes data the component was given, such as a Ratios table file or trained SurrogateComp surrogates
+# Use it through evalCache.cacheModel, e.g. cacheModel(prob.model, cache=DiskCache('musvCache.sqlite'))
+
+# package, function, and class imports
+from __future__ import division, print_function
+from evalCache import quantizeInputs
+import numpy as np
+import hashlib
+import sqlite3
+import pickle
+import atexit
+import os
+
+# modules whose source changes the results of the MUSV components
+calcModules = ['estParam.py', 'estGMT.py', 'flywheelWeight.py', 'fuelEstimate.py', 'poweringEstimate.py',
+               'resistanceCurves.py', 'weightCurves.py', 'RatioWeights.py', 'ratioTable.py', 'surrogateModel.py',
+               'Fuel.py', 'Weights.py', 'Stability.py', 'Resistance.py', 'Ratios.py', 'RatiosImp.py', 'Balance.py',
+               'musvModel.py']
+
+# ---------
+# hash of the source of the calculation modules, found next to this file
+def sourceVersion(modules=calcModules) : # list of file names
+    h = hashlib.sha256()
+    folder = os.path.dirname(os.path.abspath(__file__))
+    for name in modules:
+        h.update(name.encode())
+        with open(os.path.join(folder, name), 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+# ---------
+# SQLite cache with the same key/get/put/stats interface as evalCache.EvalCache
+# new entries are kept in memory and written in one short transaction per batch, and reads never write, so other
+# processes using the file are only locked out while a batch commits
+# under mpirun every rank should use its own file (rank=MPI.COMM_WORLD.rank), SQLite locking cannot be relied on
+# between nodes or on NFS; with a seeded generator each rank gets the same cases, and the same file, on a rerun
+class DiskCache(object):
+    """
+    Persistent least recently used cache of results in an SQLite file
+    """
+
+    def __init__(self, filename='musvCache.sqlite', maxBytes=256*2**20, bits=36, version=None, commitEvery=500, rank=None) : # cache file, size cap in bytes, mantissa bits kept in the keys, source version (sourceVersion() if None), puts kept in memory between commits, MPI rank (file <filename>_<rank>) or None
+        self.filename = filename if rank is None else '%s_%d' % (filename, rank)
+        self.maxBytes = maxBytes
+        self.bits = bits
+        self.version = sourceVersion() if version is None else version
+        self.commitEvery = commitEvery
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # entries not yet written {key: blob}, and the recency of entries read since the last commit {key: used}
+        self.pending = {}
+        self.touched = {}
+
+        # rollback journal rather than WAL, which needs shared memory and does not work on network file systems
+        self.db = sqlite3.connect(self.filename, timeout=60)
+        self.db.execute('PRAGMA journal_mode=DELETE')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.execute('CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value BLOB, size INTEGER, used INTEGER)')
+        self.db.execute('CREATE INDEX IF NOT EXISTS entries_used ON entries (used)')
+        self.db.commit()
+        self.used = self.db.execute('SELECT COALESCE(MAX(used), 0) FROM entries').fetchone()[0]
+        atexit.register(self.close)
+
+    # hex digest of the source version and the quantized inputs, None when any input is complex
+    def key(self, args) :
+        quantized = quantizeInputs(args, self.bits)
+        if quantized is None:
+            return None
+        h = hashlib.sha256(self.version.encode())
+        for x in quantized:
+            h.update(repr(x).encode())
+        return h.hexdigest()
+
+    # (True, value) for a cached key, (False, None) otherwise, a hit marks the entry as recently used in memory only
+    def get(self, key) :
+        blob = self.pending.get(key)
+        if blob is None:
+            row = self.db.execute('SELECT value FROM entries WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return False, None
+            blob = row[0]
+            self.used += 1
+            self.touched[key] = self.used
+        self.hits += 1
+        return True, pickle.loads(blob)
+
+    def put(self, key, value) :
+        self.pending[key] = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(self.pending) >= self.commitEvery:
+            self.flush()
+
+    # write the pending entries and recency of the entries read in one transaction, then evict the least recently
+    # used entries down to 90% of the size cap once it is exceeded
+    def flush(self) :
+        if not self.pending and not self.touched:
+            return
+        rows = []
+        for key, blob in self.pending.items():
+            self.used += 1
+            rows.append((key, blob, len(blob), self.used))
+        with self.db:
+            self.db.executemany('UPDATE entries SET used = ? WHERE key = ?', [(used, key) for key, used in self.touched.items()])
+            self.db.executemany('INSERT OR REPLACE INTO entries (key, value, size, used) VALUES (?, ?, ?, ?)', rows)
+            size = self.db.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+            if size > self.maxBytes:
+                removed = []
+                for key, entrySize in self.db.execute('SELECT key, size FROM entries ORDER BY used').fetchall():
+                    if size <= 0.9*self.maxBytes:
+                        break
+                    removed.append((key,))
+                    size -= entrySize
+                self.db.executemany('DELETE FROM entries WHERE key = ?', removed)
+                self.evictions += len(removed)
+        self.pending = {}
+        self.touched = {}
+
+    def stats(self) :
+        calls = self.hits + self.misses
+        size, count = self.db.execute('SELECT COALESCE(SUM(size), 0), COUNT(*) FROM entries').fetchone()
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions, 'size': count + len(self.pending),
+                'bytes': size + sum(len(blob) for blob in self.pending.values()), 'hitRate': self.hits/calls if calls > 0 else 0.0}
+
+    def clear(self) :
+        with self.db:
+            self.db.execute('DELETE FROM entries')
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.pending = {}
+        self.touched = {}
+
+    def close(self) :
+        if self.db is not None:
+            self.flush()
+            self.db.close()
+            self.db = None
+
+
+# debugging code, a second run of the same designs is read from the cache file
+if __name__ == "__main__":
+    import openmdao.api as om
+    from evalCache import cacheModel
+    from musvModel import MUSVv3
+
+    for run in range(2):
+        prob = om.Problem(MUSVv3(num_nodes=2))
+        prob.setup()
+        cache = DiskCache('musvCacheDebug.sqlite')
+        cacheModel(prob.model, cache=cache)
+        prob['indeps.Cb'] = [0.41, 0.46]
+        prob['indeps.L'] = [37.1, 39.8]
+        prob['indeps.B'] = [7.68, 8.44]
+        prob['indeps.T'] = [3.66, 3.53]
+        prob['indeps.fwCap'] = [485, 969]
+        prob.run_model()
+        print(prob['wts.Wt'], prob['fuel.fuelWt'], cache.stats())
+        cache.close()
+    os.remove('musvCacheDebug.sqlite')
@@ -0,0 +1,41 @@
+# downselect.py - vectorized feasibility downselect of recorded designs, used by the case plotters
+# The derived columns (cruise and sprint power, power ratio, percent fuel, dimension ratios) are computed for every
+# design at once and a single boolean mask of the constraints in constraints.py picks the feasible ones
+
+# package, function, and class imports
+from __future__ import division, print_function
+from estParam import wettedSurfVec
+from poweringEstimate import poweringEstimateVec
+from constraints import feasibleMask, musvConstraints
+import numpy as np
+
+# ---------
+# columns derived from the recorded ones for every design
+# designs outside the resistance regression have zero cruise power, so their ratio is nan or inf
+def derivedColumnsVec(Cb, T, L, B, Disp, Wt, fuelWt) : # inputs in unitless, meters, meters, meters, metric tonnes, metric tonnes, metric tonnes - arrays
+    S = wettedSurfVec(Cb, T, L, B)
+    PBcruise, inRange = poweringEstimateVec(L, S, Disp, Cb, 16) #kW
+    PBsprint, inRange = poweringEstimateVec(L, S, Disp, Cb, 27) #kW
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return {'PBcru': PBcruise,
+                'PBspr': PBsprint,
+                'PBratio': PBsprint/PBcruise,
+                'percentFuel': (fuelWt/Wt)*100, #convert to percentage
+                'LB': L/B,
+                'BT': B/T,
+                'TL': T/L}
+
+# ---------
+# feasible designs of a dict of result columns, named after the model variables as in v3CSVFields
+# returns the masked recorded columns under their CSV labels plus the masked derived columns
+# the .csv files do not record fuel.PBratio, the derived power ratio stands in for it
+def downselect(results, fields, spec=musvConstraints) : # dict of result columns, list of (CSV label, model variable), list of constraints
+    columns = {label: np.asarray(results[name]) for label, name in fields}
+    derived = derivedColumnsVec(columns['Cb'], columns['T'], columns['L'], columns['B'], columns['Disp'], columns['Wt'], columns['fuelWt'])
+    variables = dict(results)
+    variables.setdefault('fuel.PBratio', derived['PBratio'])
+    feasible = feasibleMask(variables, spec)
+
+    selected = {label: values[feasible] for label, values in columns.items()}
+    selected.update({name: values[feasible] for name, values in derived.items()})
+    return selected
@@ -1,11 +1,20 @@
 # estGMT.py - function to perform a rudimentary check up upright stability.  Returns transverse metacentric height
 # relies on a series of coefficient calculations
 
-import math
+import numpy as np
 
 # ---------
 # Based on Parsons' NA470 Coursepack
 def estGMT(Cb, T, L, B) : # inputs in unitless, meters, meters, meters
+    GM, KB, BM, KG = estGMTVec(Cb, T, L, B)
+    return GM
+
+# ---------
+# array form of estGMT, evaluates N hulls at once
+# returns GMT along with the KB, BM and KG it is built from
+def estGMTVec(Cb, T, L, B) : # inputs in unitless, meters, meters, meters - arrays or scalars
+    Cb, T, L, B = np.broadcast_arrays(*[np.asarray(x) for x in (Cb, T, L, B)])
+
     # constants/conversions
     Disp = Cb*T*L*B # displacement from hull parameters
 
@@ -31,4 +40,27 @@ def estGMT(Cb, T, L, B) : # inputs in unitless, meters, meters, meters
 
     GM = KB + BM - KG
 
-    return GM
+    return GM, KB, BM, KG
+
+# ---------
+# partial derivatives of the estGMTVec GMT with respect to (Cb, T, L, B), stacked along the first axis
+def estGMTVecDeriv(Cb, T, L, B) : # inputs in unitless, meters, meters, meters - arrays or scalars
+    Cb, T, L, B = np.broadcast_arrays(*[np.asarray(x) for x in (Cb, T, L, B)])
+
+    Cwp = 0.467 + (0.47*(0.384 + (0.565*Cb))) #unitless
+    dCwp = 0.47*0.565 # dCwp/dCb
+
+    # KB = 0.961*T*(1.048 - u)
+    u = Cb/(Cb + Cwp)
+    du = (Cwp - (Cb*dCwp))/((Cb + Cwp)*(Cb + Cwp)) # du/dCb
+
+    # BM = CI*L*B^3/(Cb*T*L*B) = CI*B^2/(Cb*T), independent of L
+    CI = (1.04*Cwp*Cwp)/12
+    dCI = (2*1.04*Cwp*dCwp)/12 # dCI/dCb
+    BM = (CI*B*B)/(Cb*T)
+
+    dGM = np.zeros((4,) + BM.shape)
+    dGM[0] = (-(0.961)*T*du) + ((dCI*B*B)/(Cb*T)) - (BM/Cb)
+    dGM[1] = ((0.961)*(1.048-u)) - (BM/T) - 0.8
+    dGM[3] = 2*BM/B
+    return dGM
@@ -1,31 +1,59 @@
 # estParam.py - functions to estimate hull parameters from principal characteristics
 
-import math
+import numpy as np
 
 # ---------
 def displacement(Cb, T, L, B) : # inputs in unitless, meters, meters, meters
-    # constants
-    rho = 1026 #kg/m^3
-    g = 9.81 #m/s^2
-
-    # calculate displacement
-    nabla = Cb*T*L*B # volume displacement from hull parameters
-    Disp = nabla*rho*(1/1000) # metric tonnes
-    return Disp
+    return displacementVec(Cb, T, L, B)
 
 
 # ---------
 # based on Grubisic 2012
 def wettedSurf(Cb, T, L, B) : # inputs in unitless, meters, meters, meters
+    return wettedSurfVec(Cb, T, L, B)
+
+# ---------
+# array form of displacement, evaluates N hulls at once
+def displacementVec(Cb, T, L, B) : # inputs in unitless, meters, meters, meters - arrays or scalars
     # constants
     rho = 1026 #kg/m^3
-    g = 9.81 #m/s^2
 
     # calculate displacement
-    nabla = Cb*T*L*B # volume displacement from hull parameters
+    nabla = np.asarray(Cb)*T*L*B # volume displacement from hull parameters
+    Disp = nabla*rho*(1/1000) # metric tonnes
+    return Disp
+
+# ---------
+# array form of wettedSurf, based on Grubisic 2012
+def wettedSurfVec(Cb, T, L, B) : # inputs in unitless, meters, meters, meters - arrays or scalars
+    # calculate displacement
+    nabla = np.asarray(Cb)*T*L*B # volume displacement from hull parameters
 
     # Estimation of wetted surface area
     C = 2.61 + (((B/T)*((B/T)-0.244))/81) # unitless
-    S = C*math.sqrt(L*nabla) #m^2
+    S = C*np.sqrt(L*nabla) #m^2
 
     return S
+
+# ---------
+# partial derivatives of displacementVec with respect to (Cb, T, L, B), stacked along the first axis
+def displacementVecDeriv(Cb, T, L, B) : # inputs in unitless, meters, meters, meters - arrays or scalars
+    Cb, T, L, B = np.broadcast_arrays(*[np.asarray(x) for x in (Cb, T, L, B)])
+    k = 1026*(1/1000) # metric tonnes per cubic meter
+    return np.stack([k*T*L*B, k*Cb*L*B, k*Cb*T*B, k*Cb*T*L])
+
+# ---------
+# partial derivatives of wettedSurfVec with respect to (Cb, T, L, B), stacked along the first axis
+def wettedSurfVecDeriv(Cb, T, L, B) : # inputs in unitless, meters, meters, meters - arrays or scalars
+    Cb, T, L, B = np.broadcast_arrays(*[np.asarray(x) for x in (Cb, T, L, B)])
+
+    # S = C(B/T)*G with G = sqrt(L*nabla) = L*sqrt(Cb*T*B)
+    r = B/T
+    C = 2.61 + ((r*(r-0.244))/81)
+    dC = ((2*r)-0.244)/81 # dC/dr
+    G = np.sqrt(L*Cb*T*L*B)
+
+    return np.stack([C*G/(2*Cb),
+                     (-dC*r*G/T) + (C*G/(2*T)),
+                     C*G/L,
+                     (dC*G/T) + (C*G/(2*B))])
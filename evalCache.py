@@ -0,0 +1,206 @@
+# evalCache.py - opt-in in-memory memoization of calculation kernels and component compute calls
+# Finite differencing, NSGA2 elitism and repeated DOE points send identical inputs to the same functions many times.
+# Inputs are quantized to a relative precision and used as the key of a least recently used (LRU) cache with a
+# bounded number of entries, so repeats are returned without recomputing
+# Complex inputs (complex step) are never cached, their imaginary parts carry the derivative
+
+# package, function, and class imports
+from __future__ import division, print_function
+from collections import OrderedDict
+import openmdao.api as om
+import numpy as np
+import functools
+import hashlib
+import pickle
+import os
+
+# ---------
+# LRU cache keyed by quantized inputs, with hit/miss statistics
+class EvalCache(object):
+    """
+    Least recently used cache of results keyed by inputs rounded to a relative precision
+    """
+
+    def __init__(self, maxsize=4096, bits=36) : # number of entries kept, mantissa bits kept in the keys (36 bits ~ 1e-11 relative)
+        self.maxsize = maxsize
+        self.bits = bits
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # hashable key of a list of inputs, None when any input is complex
+    def key(self, args) :
+        return quantizeInputs(args, self.bits)
+
+    # (True, value) for a cached key, (False, None) otherwise
+    def get(self, key) :
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return True, copyResult(self.entries[key])
+        self.misses += 1
+        return False, None
+
+    def put(self, key, value) :
+        self.entries[key] = copyResult(value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) :
+        calls = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions, 'size': len(self.entries),
+                'hitRate': self.hits/calls if calls > 0 else 0.0}
+
+    def clear(self) :
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+# hashable tuple of a list of inputs quantized to a relative precision, None when any input is complex
+# floats keep their exponent and a rounded mantissa, so inputs closer than the precision share a key while
+# finite difference steps (~1e-6 relative) still get their own
+def quantizeInputs(args, bits=36) : # list of arrays, scalars or strings, mantissa bits kept
+    key = []
+    for x in args:
+        if isinstance(x, (str, bool, type(None))):
+            key.append(x)
+            continue
+        x = np.asarray(x)
+        if np.iscomplexobj(x):
+            return None
+        if x.dtype.kind == 'f':
+            m, e = np.frexp(x)
+            x = np.stack([np.round(m*(2.0**bits)), e])
+        key.append((x.shape, x.dtype.str, x.tobytes()))
+    return tuple(key)
+
+# cached arrays are copied in and out, so callers that modify a result in place cannot change the cache
+def copyResult(value) :
+    if isinstance(value, np.ndarray):
+        return value.copy()
+    if isinstance(value, tuple):
+        return tuple(copyResult(v) for v in value)
+    if isinstance(value, list):
+        return [copyResult(v) for v in value]
+    if isinstance(value, dict):
+        return {k: copyResult(v) for k, v in value.items()}
+    return value
+
+# ---------
+# decorator for calculation kernels, e.g. poweringEstimateVec = memoize()(poweringEstimateVec)
+# the cache is available as the .cache attribute of the returned function
+def memoize(maxsize=4096, bits=36) : # number of entries kept, mantissa bits kept in the keys
+    def decorate(func):
+        cache = EvalCache(maxsize, bits)
+
+        @functools.wraps(func)
+        def cached(*args, **kwargs):
+            key = cache.key(list(args) + [k for item in sorted(kwargs.items()) for k in item])
+            if key is None:
+                return func(*args, **kwargs)
+            hit, value = cache.get(key)
+            if not hit:
+                value = func(*args, **kwargs)
+                cache.put(key, value)
+            return value
+
+        cached.cache = cache
+        return cached
+    return decorate
+
+# ---------
+# identity of a component for keys shared between components (e.g. a DiskCache), its class, path, variable names,
+# ExecComp expressions and the options that can change what compute returns
+# an option naming a file (e.g. the Ratios table) adds a hash of the file contents and any other option object (e.g.
+# the SurrogateComp surrogates) a hash of its pickle, so a rebuilt table or retrained surrogate gets new keys
+# returns None when an option cannot be pickled, such a component is not cached
+def componentSignature(comp) : # om.ExplicitComponent after setup
+    options = []
+    for name in comp.options:
+        try:
+            value = comp.options[name]
+        except RuntimeError:
+            continue # required option that was never set
+        if isinstance(value, str) and os.path.isfile(value):
+            with open(value, 'rb') as f:
+                value = (value, hashlib.sha256(f.read()).hexdigest())
+        elif not isinstance(value, (bool, int, float, str, type(None))):
+            try:
+                value = hashlib.sha256(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)).hexdigest()
+            except Exception:
+                return None
+        options.append((name, value))
+    return repr((type(comp).__name__, comp.pathname, sorted(comp.get_io_metadata(iotypes='input')),
+                 sorted(comp.get_io_metadata(iotypes='output')), getattr(comp, '_exprs', None), options))
+
+# cache the compute method of one explicit component, returns the cache
+# the key is every input of the component, the cached value every output, complex step runs bypass the cache
+# a cache passed in (e.g. one DiskCache for the whole model) is shared, so the key also holds the component signature,
+# a component without a signature is left uncached and None is returned
+def cacheCompute(comp, maxsize=1024, bits=36, cache=None) : # om.ExplicitComponent, number of entries kept, mantissa bits kept in the keys, shared cache
+    signature = [] if cache is None else [componentSignature(comp)]
+    if signature == [None]:
+        return None
+    if cache is None:
+        cache = EvalCache(maxsize, bits)
+    compute = comp.compute
+
+    def cachedCompute(inputs, outputs):
+        if comp.under_complex_step:
+            return compute(inputs, outputs)
+        key = cache.key(signature + [inputs[name] for name in inputs.keys()])
+        hit, value = cache.get(key)
+        if hit:
+            for name in value:
+                outputs[name] = value[name]
+            return
+        compute(inputs, outputs)
+        cache.put(key, {name: outputs[name] for name in outputs.keys()})
+
+    comp.compute = cachedCompute
+    comp.evalCache = cache
+    return cache
+
+# cache every explicit component with inputs in a model, call after prob.setup
+# returns {component pathname: cache}, the same cache for every component when one is passed in
+def cacheModel(model, maxsize=1024, bits=36, cache=None) : # om.Group, number of entries kept per component, mantissa bits kept in the keys, shared cache
+    caches = {}
+    for comp in model.system_iter(recurse=True, typ=om.ExplicitComponent):
+        if len(comp.get_io_metadata(iotypes='input')) > 0:
+            compCache = cacheCompute(comp, maxsize, bits, cache)
+            if compCache is not None:
+                caches[comp.pathname] = compCache
+    return caches
+
+# hit/miss statistics of a {name: cache} dict, one line per cache
+def cacheReport(caches) :
+    lines = []
+    for name, cache in caches.items():
+        s = cache.stats()
+        lines.append('%s: %d hits, %d misses (%.1f%% hit rate), %d evictions, %d entries' % (name, s['hits'], s['misses'],
+                                                                                              100*s['hitRate'], s['evictions'], s['size']))
+    return '\n'.join(lines)
+
+
+# debugging code, repeated designs are returned from the cache
+if __name__ == "__main__":
+    from musvModel import MUSVv3
+    prob = om.Problem(MUSVv3())
+    prob.setup()
+    caches = cacheModel(prob.model)
+
+    designs = [(0.41, 37.1, 7.68, 3.66, 485), (0.46, 39.8, 8.44, 3.53, 969)]
+    for i in range(3):
+        for Cb, L, B, T, fwCap in designs:
+            prob['indeps.Cb'] = Cb
+            prob['indeps.L'] = L
+            prob['indeps.B'] = B
+            prob['indeps.T'] = T
+            prob['indeps.fwCap'] = fwCap
+            prob.run_model()
+            print(prob['wts.Wt'], prob['fuel.fuelWt'])
+    print(cacheReport(caches))
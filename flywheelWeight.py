@@ -1,8 +1,5 @@
 # flywheelWeight.py - file to contain various flywheel energy storage device weight estimations defined for use as functions
 
-import math
-import statistics
-
 # ---------
 # helper funciton to turn power and time to megajoules
 def convertToE(P,t) : # inputs in kilowatts, hours
@@ -25,7 +22,7 @@ def fwWgt(E) : # inputs in megajoules
     # UT-Austin ALPS, 360 MJ, 8600 kg
     m3 = (360/8600) #MJ/kg
 
-    m = statistics.mean([m1,m2,m3])
+    m = (m1+m2+m3)/3 # average, written out so complex inputs pass through
     W = (E/m)/1000 # metric tonnes
 
     return W
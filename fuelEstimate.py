@@ -1,7 +1,7 @@
 # poweringEstimate.py - function to estimate brake powering required based on series64 resistance
 
-import math
-from poweringEstimate import poweringEstimate
+import numpy as np
+from poweringEstimate import poweringEstimate, poweringEstimateVec, poweringEstimateVecDeriv
 from flywheelWeight import convertToE, fwWgt
 
 # fuel estimation based on hypothetical mission profile
@@ -9,102 +9,116 @@ from flywheelWeight import convertToE, fwWgt
 
 # Initial Mission Analysis
 def missionFuel1(L, S, Disp, Cb) : #inputs in meters, meters^2, metric tonnes, unitless
-    # constants
-    rho = 1026.0 #kg/m^3
-    g = 9.81 #m/s^2
-
-    # define characteristics
-    range = 4500 #naut. mile
-    days = 60
-    vCruise = 16 #knots
-    vSprint = 27 #knots
-    hoursTot = (days*24)
-    hoursSprint = days
-    hoursComm = (days*2)
-    hoursCruise = (range/vCruise)
-    hoursLoiter = hoursTot - (hoursSprint+hoursComm+hoursCruise)
-    powSleep = 50 #kW
-    powNorm = 300 #kW
-    powMax = 500 #kW
-    SFC = 0.000196 #t/kWhr
+    return missionFuel1Vec(L, S, Disp, Cb)
 
+# Initial Mission Analysis WITH FLYWHEELS
+def missionFuel1FW(L, S, Disp, Cb, fwCap) : #inputs in meters, meters^2, metric tonnes, unitless, megajoules
+    return missionFuel1FWVec(L, S, Disp, Cb, fwCap)
+
+# ---------
+# Mission 1 profile, computed once at import rather than per call
+m1Range = 4500 #naut. mile
+m1Days = 60
+m1vCruise = 16 #knots
+m1vSprint = 27 #knots
+m1HoursTot = (m1Days*24)
+m1HoursSprint = m1Days
+m1HoursComm = (m1Days*2)
+m1HoursCruise = (m1Range/m1vCruise)
+m1HoursLoiter = m1HoursTot - (m1HoursSprint+m1HoursComm+m1HoursCruise)
+m1PowNorm = 300 #kW
+m1PowMax = 500 #kW
+m1SFC = 0.000196 #t/kWhr
+
+# segment powers of mission 1 for arrays of designs
+def mission1PowersVec(L, S, Disp, Cb, powSleep) : #inputs in meters, meters^2, metric tonnes, unitless, kilowatts
     # Calculate propulsion powering
-    PBCruise = poweringEstimate(L, S, Disp, Cb, vCruise) #kW
-    PBSprint = poweringEstimate(L, S, Disp, Cb, vSprint) #kW
+    PBCruise, cruiseOK = poweringEstimateVec(L, S, Disp, Cb, m1vCruise) #kW
+    PBSprint, sprintOK = poweringEstimateVec(L, S, Disp, Cb, m1vSprint) #kW
 
     # calculate total powers
-    PSprint = PBSprint + powNorm #kW
-    PComm = PBCruise + powMax #kW
-    PCruise = PBCruise + powNorm #kW
-    PLoiter = powSleep #kW
+    PSprint = PBSprint + m1PowNorm #kW
+    PComm = PBCruise + m1PowMax #kW
+    PCruise = PBCruise + m1PowNorm #kW
+    PLoiter = np.full_like(PCruise, powSleep) #kW
 
-    PMax = max(PSprint, PComm, PCruise, PLoiter) #kW
+    # compare on the real part so complex step inputs follow the same segment
+    PMax = PSprint
+    for P in (PComm, PCruise, PLoiter):
+        PMax = np.where(np.real(P) > np.real(PMax), P, PMax) #kW
 
-    # calculate fuel consumption
-    fuelSprint = SFC*PSprint*hoursSprint #t
-    fuelComm = SFC*PComm*hoursComm #t
-    fuelCruise = SFC*PCruise*hoursCruise #t
-    fuelLoiter = SFC*PLoiter*hoursLoiter #t
+    return PBCruise, PBSprint, PSprint, PComm, PCruise, PLoiter, PMax
 
-    fuelTot = fuelSprint + fuelComm + fuelCruise + fuelLoiter
+# Initial Mission Analysis for arrays of designs
+def missionFuel1Vec(L, S, Disp, Cb) : #inputs in meters, meters^2, metric tonnes, unitless - arrays or scalars
+    PBCruise, PBSprint, PSprint, PComm, PCruise, PLoiter, PMax = mission1PowersVec(L, S, Disp, Cb, 50) # 50 kW sleep load
+
+    # calculate fuel consumption
+    fuelTot = m1SFC*((PSprint*m1HoursSprint) + (PComm*m1HoursComm) + (PCruise*m1HoursCruise) + (PLoiter*m1HoursLoiter)) #t
 
     return fuelTot, PMax
 
-# Initial Mission Analysis WITH FLYWHEELS
-def missionFuel1FW(L, S, Disp, Cb, fwCap) : #inputs in meters, meters^2, metric tonnes, unitless, megajoules
-    # constants
-    rho = 1026.0 #kg/m^3
-    g = 9.81 #m/s^2
-
-    # define characteristics
-    range = 4500 #naut. mile
-    days = 60
-    vCruise = 16 #knots
-    vSprint = 27 #knots
-    hoursTot = (days*24)
-    hoursSprint = days
-    hoursComm = (days*2)
-    hoursCruise = (range/vCruise)
-    hoursLoiter = hoursTot - (hoursSprint+hoursComm+hoursCruise)
-    powSleep = 5 #kW
-    powNorm = 300 #kW
-    powMax = 500 #kW
-    SFC = 0.000196 #t/kWhr
+# Initial Mission Analysis WITH FLYWHEELS for arrays of designs
+# designs without a flywheel (fwCap == 0) are handled with masks rather than a branch, tested on the real part
+def missionFuel1FWVec(L, S, Disp, Cb, fwCap) : #inputs in meters, meters^2, metric tonnes, unitless, megajoules - arrays or scalars
+    L, S, Disp, Cb, fwCap = np.broadcast_arrays(*[np.asarray(x) for x in (L, S, Disp, Cb, fwCap)])
+    PBCruise, PBSprint, PSprint, PComm, PCruise, PLoiter, PMax = mission1PowersVec(L, S, Disp, Cb, 5) # 5 kW sleep load, engine off while the flywheel discharges
 
-    # Calculate propulsion powering
-    PBCruise = poweringEstimate(L, S, Disp, Cb, vCruise) #kW
-    PBSprint = poweringEstimate(L, S, Disp, Cb, vSprint) #kW
+    # designs outside the resistance regression have zero power, ratio is inf or nan there
+    with np.errstate(divide='ignore', invalid='ignore'):
+        PBratio = PBSprint/PBCruise # unitless
 
-    # calculate total powers
-    PSprint = PBSprint + powNorm #kW
-    PComm = PBCruise + powMax #kW
-    PCruise = PBCruise + powNorm #kW
-    PLoiter = powSleep #kW
-
-    PMax = max(PSprint, PComm, PCruise, PLoiter) #kW
-    PBratio = PBSprint/PBCruise # unitless
-
-    if (fwCap > 0.0):
-        # calculate flywheel charge/discharge times
-        tChg = (fwCap*1000000)/(((PCruise - PLoiter)*1000)) # seconds
-        tDischg = (fwCap*1000000)/((PLoiter*1000))# seconds
-        etaRun = tChg/(tChg + tDischg) # unitless
-        # calculate flywheel starts
-        nStarts = (hoursLoiter*60*60)/(tChg + tDischg) # unitless
-    else:
-        etaRun = 1
-        nStarts = 0
+    # calculate flywheel charge/discharge times, cycle time is set to 1 s where there is no flywheel
+    hasFW = np.real(fwCap) > 0.0
+    tChg = (fwCap*1000000)/(((PCruise - PLoiter)*1000)) # seconds
+    tDischg = (fwCap*1000000)/((PLoiter*1000))# seconds
+    tCycle = np.where(hasFW, tChg + tDischg, 1.0) # seconds
+    etaRun = np.where(hasFW, tChg/tCycle, 1.0) # unitless
+    nStarts = np.where(hasFW, (m1HoursLoiter*60*60)/tCycle, 0.0) # unitless
 
     # calculate fuel consumption
-    fuelSprint = SFC*PSprint*hoursSprint #t
-    fuelComm = SFC*PComm*hoursComm #t
-    fuelCruise = SFC*PCruise*hoursCruise #t
-    fuelLoiter = SFC*PLoiter*(hoursLoiter*etaRun) #t
+    fuelSprint = m1SFC*PSprint*m1HoursSprint #t
+    fuelComm = m1SFC*PComm*m1HoursComm #t
+    fuelCruise = m1SFC*PCruise*m1HoursCruise #t
+    fuelLoiter = m1SFC*PLoiter*(m1HoursLoiter*etaRun) #t
 
     fuelTot = fuelSprint + fuelComm + fuelCruise + fuelLoiter + fwWgt(fwCap)
 
     return fuelTot, PMax, etaRun, nStarts, PBratio
-    #return fuelTot, PMax, PBCruise, PBSprint, etaRun, nStarts
+
+# partial derivatives of missionFuel1FWVec with respect to (L, S, Disp, Cb, fwCap)
+# returns one gradient stack per output, in the order fuelTot, PMax, etaRun, nStarts, PBratio
+def missionFuel1FWVecDeriv(L, S, Disp, Cb, fwCap) : #inputs in meters, meters^2, metric tonnes, unitless, megajoules - arrays or scalars
+    L, S, Disp, Cb, fwCap = np.broadcast_arrays(*[np.asarray(x) for x in (L, S, Disp, Cb, fwCap)])
+    PBCruise, PBSprint, PSprint, PComm, PCruise, PLoiter, PMax = mission1PowersVec(L, S, Disp, Cb, 5)
+
+    # brake power gradients, fwCap has no effect on powering
+    zero = np.zeros((1,) + L.shape, dtype=PCruise.dtype)
+    dPBCruise = np.concatenate([poweringEstimateVecDeriv(L, S, Disp, Cb, m1vCruise), zero])
+    dPBSprint = np.concatenate([poweringEstimateVecDeriv(L, S, Disp, Cb, m1vSprint), zero])
+
+    # PMax follows whichever segment power is largest, PComm always exceeds PCruise
+    sprintMax = np.real(PSprint) >= np.real(PComm)
+    loiterMax = np.maximum(np.real(PSprint), np.real(PComm)) < np.real(PLoiter)
+    dPMax = np.where(sprintMax, dPBSprint, dPBCruise)*np.where(loiterMax, 0.0, 1.0)
+
+    # designs with zero cruise power have an undefined ratio, their gradient is set to zero
+    hasPB = PBCruise != 0
+    PBsafe = np.where(hasPB, PBCruise, 1.0)
+    dPBratio = np.where(hasPB, (dPBSprint/PBsafe) - (PBSprint*dPBCruise/(PBsafe*PBsafe)), 0.0)
+
+    # with a flywheel, etaRun = PLoiter/PCruise and nStarts = 3.6*hoursLoiter*(PCruise - PLoiter)*PLoiter/(fwCap*PCruise)
+    hasFW = np.real(fwCap) > 0.0
+    fwSafe = np.where(hasFW, fwCap, 1.0)
+    detaRun = np.where(hasFW, -PLoiter*dPBCruise/(PCruise*PCruise), 0.0)
+    dnStarts = np.where(hasFW, (3.6*m1HoursLoiter*PLoiter*PLoiter/fwSafe)*dPBCruise/(PCruise*PCruise), 0.0)
+    dnStarts[4] = np.where(hasFW, -(3.6*m1HoursLoiter*(PCruise - PLoiter)*PLoiter/(fwSafe*PCruise))/fwSafe, 0.0)
+
+    # fuel is linear in the segment powers and the flywheel weight is linear in capacity
+    dfuelTot = m1SFC*((dPBSprint*m1HoursSprint) + (dPBCruise*(m1HoursComm + m1HoursCruise)) + (PLoiter*m1HoursLoiter*detaRun))
+    dfuelTot[4] = fwWgt(1.0)
+
+    return dfuelTot, dPMax, detaRun, dnStarts, dPBratio
 
 # #fuel, MCR, cru, spr, run, starts = missionFuel1FW(26.32,189.727,198.55,.342,1000) #missionFuel1FW(L, S, Disp, Cb, fwCap) inputs in meters, meters^2, metric tonnes, unitless, megajoules
 # fuel, MCR, run, starts = missionFuel1FW(26.32,189.727,198.55,.342,1000) #missionFuel1FW(L, S, Disp, Cb, fwCap) inputs in meters, meters^2, metric tonnes, unitless, megajoules
@@ -3,15 +3,22 @@
 # Uses design estimates and regressions to create a vessel with modifications to include flywheel energy storage
 # Using case reading example from http://openmdao.org/twodocs/versions/latest/basic_guide/basic_recording.html
 # Creates a .csv file with designs generated to be further processed
+# Can be run in parallel with `mpirun -n <procs> python musvDOEv3.py`, cases are split across ranks and each rank
+# records to its own musvDOEv3cases.sql_<rank> file, which rank 0 consolidates into the .csv and .npz outputs
 
 # package, function, and class imports
 from __future__ import division, print_function
 from Weights import WeightsNoFuel
 from Stability import Stability
 from Fuel import Fuel
+from musvModel import v3CSVFields
+from batchDOE import writeColumns, writeCSV
+from resultsStore import writeResults
+from parallelDOE import mergeRankFiles
+from evalCache import cacheModel
+from diskCache import DiskCache
+from openmdao.utils.mpi import MPI
 import openmdao.api as om
-import math
-import csv
 
 # build the model, defining units in the process`
 prob = om.Problem()
@@ -62,33 +69,38 @@ prob.model.add_design_var('fuel.nStarts')
 # set driver for design of experiment
 #prob.driver = om.DOEDriver(om.UniformGenerator(num_samples=10000))
 # latin hypercube is much better at determining edge behavior
-prob.driver = om.DOEDriver(om.LatinHypercubeGenerator(samples=15000))
+# seeded, so every rank under mpirun and every rerun evaluates the same designs
+prob.driver = om.DOEDriver(om.LatinHypercubeGenerator(samples=15000, seed=0))
+# under mpirun each rank runs its share of the cases with its own copy of the model
+prob.driver.options['run_parallel'] = True
+prob.driver.options['procs_per_model'] = 1
 prob.driver.add_recorder(om.SqliteRecorder("musvDOEv3cases.sql"))
 
 # this is the meat of the OpenMDAO run
 prob.setup()
+# designs evaluated by an earlier run with the same calculation modules are read from the cache file
+# under mpirun each rank keeps its own musvCache.sqlite_<rank>, with the seeded generator a rerun gives it the same cases
+rank = MPI.COMM_WORLD.rank if MPI and MPI.COMM_WORLD.size > 1 else None
+cacheModel(prob.model, cache=DiskCache('musvCache.sqlite', rank=rank))
 prob.run_driver()
 prob.cleanup()
 
-# set up case reading
-cr = om.CaseReader("musvDOEv3cases.sql")
-cases = cr.list_cases('driver')
+# wait for every rank to finish recording, then consolidate the cases on rank 0
+nRanks = 1
+if MPI:
+    MPI.COMM_WORLD.barrier()
+    nRanks = MPI.COMM_WORLD.size
 
-# setup write to CSV with outputs
-with open('musvDOEv3cases.csv', mode='w') as csv_file:
-    #set up CSV file to use writer
-    fieldnames = ['Cb','L','B','T','FlywheelCapacity','GMT','Wt','Disp','Excess','MCR','fuelWt','etaRun','nStarts']
-    writer = csv.writer(csv_file,  quoting=csv.QUOTE_NONNUMERIC)
-    #write header
-    writer.writerow(fieldnames)
+if nRanks == 1 or MPI.COMM_WORLD.rank == 0:
+    # set up case reading, in the order the cases were generated
+    results = mergeRankFiles("musvDOEv3cases.sql", ['indeps.Cb', 'indeps.L', 'indeps.B', 'indeps.T', 'indeps.fwCap', 'stab.GMT', 'wts.Wt',
+                                                    'const.Disp', 'fuel.MCR', 'fuel.fuelWt', 'fuel.etaRun', 'fuel.nStarts'], nRanks)
+    results['const.Excess'] = results['const.Disp'] - results['wts.Wt']
 
-    for case in cases:
-        #read outputs from data file
-        outputs = cr.get_case(case).outputs
-
-        # write data in a csv (human readable)
-        # add float conversions
-        writer.writerow([float(outputs['indeps.Cb']),float(outputs['indeps.L']),float(outputs['indeps.B']),float(outputs['indeps.T']),float(outputs['indeps.fwCap']),float(outputs['stab.GMT']),float(outputs['wts.Wt']),float(outputs['const.Disp']),float(outputs['const.Disp']-outputs['wts.Wt']),float(outputs['fuel.MCR']),float(outputs['fuel.fuelWt']),float(outputs['fuel.etaRun']),float(outputs['fuel.nStarts'])])
+    # write data in a csv (human readable) and all columns to .npz and .mmap files
+    writeCSV('musvDOEv3cases.csv', results, v3CSVFields)
+    writeColumns('musvDOEv3cases.npz', results)
+    writeResults('musvDOEv3cases.mmap', results)
 
 # print(len(cases))
 #
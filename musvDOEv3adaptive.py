@@ -0,0 +1,38 @@
+# musvDOEv3adaptive.py - adaptive version of musvDOEv3.py
+# Same model and design variable ranges as musvDOEv3.py, but the cases come from AdaptiveFeasibleGenerator, which
+# samples in rounds and moves most of each round next to the feasible designs found so far (downselect of
+# musvDOEv3casePlotter.py); about a tenth of the cases of musvDOEv3.py give at least as many feasible designs
+# Creates a .csv file in the musvDOEv3cases.csv layout, plus a .npz file
+
+# package, function, and class imports
+from __future__ import division, print_function
+from musvModel import MUSVv3, v3DesignVars, v3Outputs
+from adaptiveDOE import AdaptiveFeasibleGenerator, v3Feasible
+from batchDOE import writeColumns, writeCSV
+from parallelDOE import mergeRankFiles
+import openmdao.api as om
+import os
+
+# build the model, the cases are run one at a time so feasibility is known before the next case is placed
+prob = om.Problem(MUSVv3())
+
+# set the range for the independent variables that will be explored
+for name, lower, upper in v3DesignVars:
+    prob.model.add_design_var(name, lower=lower, upper=upper)
+
+# 1500 cases in 10 rounds, a fifth of each round after the first spent exploring
+generator = AdaptiveFeasibleGenerator(v3Feasible, samples=1500, rounds=10)
+prob.driver = om.DOEDriver(generator)
+prob.driver.add_recorder(om.SqliteRecorder(os.path.abspath("musvDOEv3adaptive.sql")))
+prob.driver.recording_options['includes'] = ['*']
+
+# this is the meat of the OpenMDAO run
+prob.setup()
+prob.run_driver()
+prob.cleanup()
+print("%d of %d designs feasible" % (generator.y.sum(), len(generator.y)))
+
+# --- set up case reading, in the order the cases were generated
+results = mergeRankFiles("musvDOEv3adaptive.sql", [name for name, lower, upper in v3DesignVars] + v3Outputs)
+writeColumns('musvDOEv3adaptive.npz', results)
+writeCSV('musvDOEv3adaptive.csv', results)
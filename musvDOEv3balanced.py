@@ -0,0 +1,29 @@
+# musvDOEv3balanced.py - balanced version of musvDOEv3batch.py
+# L is no longer sampled, each design of Cb, T, B and flywheel capacity is given the length at which displacement
+# equals weight including its own mission fuel, so every design that can balance is balanced by construction
+# Creates a .npz file with every model variable as a column and a .csv file in the musvDOEv3.py layout
+
+# package, function, and class imports
+from __future__ import division, print_function
+from musvModel import MUSVv3Balanced, v3BalancedDesignVars, v3BalancedOutputs, v3BalancedCSVFields
+from batchDOE import lhsSamples, runBatchDOE, writeColumns, writeCSV
+import numpy as np
+import time
+
+numSamples = 15000
+
+# generate the sample matrix and evaluate it
+start = time.time()
+# seeded, so reruns evaluate the same designs
+samples = lhsSamples(v3BalancedDesignVars, numSamples, seed=0)
+results = runBatchDOE(samples, v3BalancedOutputs, chunk=5000, model=MUSVv3Balanced)
+elapsed = time.time() - start
+print("%d designs in %.3f s (%.0f designs/s)" % (numSamples, elapsed, numSamples/elapsed))
+
+# designs that cannot balance between 19 and 51 m are held at 51 m with inBound = 0 and keep a nonzero Excess
+balanced = results['balance.inBound'] == 1
+print("%d of %d designs balanced" % (np.count_nonzero(balanced), numSamples))
+
+# write outputs
+writeColumns('musvDOEv3balanced.npz', results)
+writeCSV('musvDOEv3balanced.csv', results, v3BalancedCSVFields)
@@ -0,0 +1,30 @@
+# musvDOEv3batch.py - batch version of musvDOEv3.py
+# Same model, design variable ranges and outputs as musvDOEv3.py, but the Latin hypercube sample matrix is
+# evaluated through the vectorized model in chunks instead of one run_model call per case
+# Designs are pre-screened with the cheap GMT, lower bound weight and powering checks first, and only designs that
+# pass go through the mission model; rejected designs are kept with nan outputs and the reason for rejection
+# Creates a .npz file with every model variable as a column and the same .csv file as musvDOEv3.py
+
+# package, function, and class imports
+from __future__ import division, print_function
+from musvModel import v3DesignVars, v3Outputs, v3CSVFields
+from batchDOE import lhsSamples, runBatchDOE, writeColumns, writeCSV, prescreenReasons
+import numpy as np
+import time
+
+numSamples = 15000
+
+# generate the sample matrix and evaluate it
+start = time.time()
+# seeded as in musvDOEv3.py, so a rerun evaluates the same designs
+samples = lhsSamples(v3DesignVars, numSamples, seed=0)
+results = runBatchDOE(samples, v3Outputs, chunk=5000, screen=True)
+elapsed = time.time() - start
+print("%d designs in %.3f s (%.0f designs/s)" % (numSamples, elapsed, numSamples/elapsed))
+for code, count in enumerate(np.bincount(results['prescreen.reason'], minlength=len(prescreenReasons))):
+    print("%-32s %d" % (prescreenReasons[code], count))
+
+# write outputs
+writeColumns('musvDOEv3cases.npz', results)
+# the rejection reason is an extra last column, the plotters read the columns before it by index
+writeCSV('musvDOEv3cases.csv', results, v3CSVFields + [('Prescreen', 'prescreen.reason')])
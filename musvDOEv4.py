@@ -3,6 +3,8 @@
 # Uses design estimates and regressions to create a vessel with modifications to include flywheel energy storage
 # Using case reading example from http://openmdao.org/twodocs/versions/latest/basic_guide/basic_recording.html
 # Creates a .csv file with designs generated to be further processed
+# Can be run in parallel with `mpirun -n <procs> python musvDOEv4.py`, cases are split across ranks and each rank
+# records to its own musvDOEv4cases.sql_<rank> file, which rank 0 consolidates into a .npz file
 
 # package, function, and class imports
 from __future__ import division, print_function
@@ -10,9 +12,14 @@ from Weights import WeightsNoFuel
 from Stability import Stability
 from Fuel import Fuel
 from Ratios import Ratios
+from musvModel import v4CSVFields
+from batchDOE import writeColumns, writeCSV
+from resultsStore import writeResults
+from parallelDOE import mergeRankFiles
+from evalCache import cacheModel
+from diskCache import DiskCache
+from openmdao.utils.mpi import MPI
 import openmdao.api as om
-import math
-import csv
 
 # build the model, defining units in the process`
 prob = om.Problem()
@@ -24,14 +31,15 @@ indeps.add_output('BT', 0.31) #unitless
 indeps.add_output('TL', 0.31) #unitless
 indeps.add_output('fwCap', 300, units='MJ') #megajoules
 
+# add the ratios component to solve for dimensions from Ratios.py
+# added first so the components below run on this case's dimensions rather than the previous case's
+prob.model.add_subsystem('ratios', Ratios())
 # add the fuel weight component from Fuel.py
 prob.model.add_subsystem('fuel', Fuel())
 # add the weights component from Weights.py
 prob.model.add_subsystem('wts', WeightsNoFuel())
 # add the stability component from Stability.py
 prob.model.add_subsystem('stab', Stability())
-# add the ratios component to solve for dimensions from Ratios.py
-prob.model.add_subsystem('ratios', Ratios())
 #ADD Reliability
 
 # define component whose output will be constrained
@@ -74,40 +82,43 @@ prob.model.add_design_var('fuel.nStarts')
 # set driver for design of experiment
 #prob.driver = om.DOEDriver(om.UniformGenerator(num_samples=10000))
 # latin hypercube is much better at determining edge behavior
-prob.driver = om.DOEDriver(om.LatinHypercubeGenerator(samples=50))
+# seeded, so every rank under mpirun and every rerun evaluates the same designs
+prob.driver = om.DOEDriver(om.LatinHypercubeGenerator(samples=50, seed=0))
+# under mpirun each rank runs its share of the cases with its own copy of the model
+prob.driver.options['run_parallel'] = True
+prob.driver.options['procs_per_model'] = 1
 prob.driver.add_recorder(om.SqliteRecorder("musvDOEv4cases.sql"))
 
 # this is the meat of the OpenMDAO run
 prob.setup()
+# designs evaluated by an earlier run with the same calculation modules are read from the cache file
+# under mpirun each rank keeps its own musvCache.sqlite_<rank>, with the seeded generator a rerun gives it the same cases
+rank = MPI.COMM_WORLD.rank if MPI and MPI.COMM_WORLD.size > 1 else None
+cacheModel(prob.model, cache=DiskCache('musvCache.sqlite', rank=rank))
 prob.run_driver()
 prob.cleanup()
 
-# --- set up case reading
-cr = om.CaseReader("musvDOEv4cases.sql")
-cases = cr.list_cases('driver')
-
-# # --- setup write to CSV with outputs
-# with open('musvDOEv4cases.csv', mode='w') as csv_file:
-#     #set up CSV file to use writer
-#     fieldnames = ['Cb','L','B','T','FlywheelCapacity','GMT','Wt','Disp','Excess','MCR','fuelWt','etaRun','nStarts']
-#     writer = csv.writer(csv_file,  quoting=csv.QUOTE_NONNUMERIC)
-#     #write header
-#     writer.writerow(fieldnames)
-#
-#     for case in cases:
-#         #read outputs from data file
-#         outputs = cr.get_case(case).outputs
-#
-#         # write data in a csv (human readable)
-#         # add float conversions
-#         writer.writerow([float(outputs['indeps.Cb']),float(outputs['ratios.L']),float(outputs['ratios.B']),float(outputs['ratios.T']),float(outputs['indeps.fwCap']),float(outputs['stab.GMT']),float(outputs['wts.Wt']),float(outputs['const.Disp']),float(outputs['const.Disp']-outputs['wts.Wt']),float(outputs['fuel.MCR']),float(outputs['fuel.fuelWt']),float(outputs['fuel.etaRun']),float(outputs['fuel.nStarts'])])
-
-print(len(cases))
-
-#printing related code
-values = []
-for case in cases:
-    outputs = cr.get_case(case).outputs
-    values.append((outputs['indeps.LB'], outputs['indeps.BT'], outputs['indeps.TL'], outputs['ratios.L'], outputs['indeps.Cb']))
-
-print("\n".join(["L/B: %5.2f, B/T: %5.2f, T/L: %5.2f, L: %6.2f, Cb: %6.2f" % xyf for xyf in values]))
+# wait for every rank to finish recording, then consolidate the cases on rank 0
+nRanks = 1
+if MPI:
+    MPI.COMM_WORLD.barrier()
+    nRanks = MPI.COMM_WORLD.size
+
+if nRanks == 1 or MPI.COMM_WORLD.rank == 0:
+    # --- set up case reading, in the order the cases were generated
+    results = mergeRankFiles("musvDOEv4cases.sql", ['indeps.Cb', 'indeps.LB', 'indeps.BT', 'indeps.TL', 'indeps.fwCap', 'ratios.L', 'ratios.B', 'ratios.T',
+                                                    'stab.GMT', 'wts.Wt', 'const.Disp', 'fuel.MCR', 'fuel.fuelWt', 'fuel.etaRun', 'fuel.nStarts'], nRanks)
+    results['const.Excess'] = results['const.Disp'] - results['wts.Wt']
+
+    # write data in a csv (human readable) and all columns to .npz and .mmap files, the .mmap last so the case
+    # plotter does not convert the .csv again
+    writeCSV('musvDOEv4cases.csv', results, v4CSVFields)
+    writeColumns('musvDOEv4cases.npz', results)
+    writeResults('musvDOEv4cases.mmap', results)
+
+    print(len(results['indeps.Cb']))
+
+    #printing related code
+    values = zip(results['indeps.LB'], results['indeps.BT'], results['indeps.TL'], results['ratios.L'], results['indeps.Cb'])
+
+    print("\n".join(["L/B: %5.2f, B/T: %5.2f, T/L: %5.2f, L: %6.2f, Cb: %6.2f" % xyf for xyf in values]))
@@ -0,0 +1,27 @@
+# musvDOEv4batch.py - batch version of musvDOEv4.py
+# Same model and design variable ranges as musvDOEv4.py, but the ratio sets are balanced all at once by the vectorized
+# bisection in RatioWeightsVec, so every sample lands on the weight = displacement balance before the other estimates
+# Creates a .npz file with every model variable as a column and a .csv file in the musvDOEv3.py layout
+
+# package, function, and class imports
+from __future__ import division, print_function
+from musvModel import MUSVv4, v4DesignVars, v4Outputs, v4CSVFields
+from batchDOE import lhsSamples, runBatchDOE, writeColumns, writeCSV
+import numpy as np
+import time
+
+numSamples = 15000
+
+# generate the sample matrix and evaluate it
+start = time.time()
+# seeded, the same matrix musvDOEv4parallel.py draws for the same number of samples
+samples = lhsSamples(v4DesignVars, numSamples, seed=0)
+results = runBatchDOE(samples, v4Outputs, chunk=5000, model=MUSVv4)
+elapsed = time.time() - start
+print("%d designs in %.3f s (%.0f designs/s)" % (numSamples, elapsed, numSamples/elapsed))
+# designs whose ratios cannot balance between 19 and 51 m have ratios.inBound = 0, with either balance component
+print("%d designs balanced" % np.count_nonzero(results['ratios.inBound'] == 1))
+
+# write outputs
+writeColumns('musvDOEv4cases.npz', results)
+writeCSV('musvDOEv4cases.csv', results, v4CSVFields)
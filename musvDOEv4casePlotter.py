@@ -1,76 +1,40 @@
-# musvDOEv3casePlotter.py - from
-# Reads musvDOEv3cases.csv and plots
+# musvDOEv4casePlotter.py - from
+# Reads musvDOEv4cases.mmap (written by musvDOEv4.py, or converted from musvDOEv4cases.csv) and plots
 
-import csv
 import matplotlib.pyplot as plt
 from mpl_toolkits.mplot3d import Axes3D  # noqa: F401 unused import
-from poweringEstimate import poweringEstimate
-from estParam import wettedSurf
-
-# setup write to CSV with outputs
-with open('musvDOEv4cases.csv', newline='') as csv_file:
-    # read csv file
-    reader = csv.reader(csv_file, quoting=csv.QUOTE_NONNUMERIC)
-
-    # skip header row
-    next(reader)
-
-    # set up lists for data
-    Cb = [] # index = 0
-    L = [] # index = 1
-    B = [] # index = 2
-    T = [] # index = 3
-    fwCap = [] # index = 4
-    GMT = [] # index = 5
-    Wt = [] # index = 6
-    Disp = [] # index = 7
-    Excess = [] # index = 8
-    MCR = [] # index = 9
-    fuelWt = [] # index = 10
-    etaRun = [] # index = 11
-    nStarts = [] # index = 12
-    percentFuel = []
-    PBcru = []
-    PBspr = []
-    PBratio = []
-    LB = []
-    BT = []
-    TL = []
-
-    # iterate through all designs
-    for row in reader:
-        # require positive GMT
-        if row[5] > 0:
-            # require weight/displacement within 10%
-            if abs(row[8]) < (0.1*row[6]):
-                # require sprint power within twice cruise power
-                PBcruise = poweringEstimate(row[1], wettedSurf(row[0], row[3], row[1], row[2]), row[7], row[0], 16) #kW
-                PBsprint = poweringEstimate(row[1], wettedSurf(row[0], row[3], row[1], row[2]), row[7], row[0], 27) #kW
-                if (PBsprint/PBcruise) < 2:
-                    #read data into lists
-                    Cb.append(row[0])
-                    L.append(row[1])
-                    B.append(row[2])
-                    T.append(row[3])
-                    fwCap.append(row[4])
-                    GMT.append(row[5])
-                    Wt.append(row[6])
-                    Disp.append(row[7])
-                    Excess.append(row[8])
-                    MCR.append(row[9])
-                    fuelWt.append(row[10])
-                    etaRun.append((row[11]*100)) #convert to percentage
-                    nStarts.append(row[12])
-                    percentFuel.append((row[10]/row[6])*100)  #convert to percentage
-                    PBcru.append(PBcruise)
-                    PBspr.append(PBspr)
-                    PBratio.append(PBsprint/PBcruise)
-                    LB.append(row[1]/row[2])
-                    BT.append(row[2]/row[3])
-                    TL.append(row[3]/row[1])
-                    # add reliability metric
-
-    numFeasible = len(Cb)
+from musvModel import v4CSVFields
+from batchDOE import readCSV
+from resultsStore import cachedResults
+from downselect import downselect
+
+# map the result columns, converted from musvDOEv4cases.csv the first time and whenever the .csv is newer
+results = cachedResults('musvDOEv4cases.mmap', 'musvDOEv4cases.csv', lambda filename: readCSV(filename, v4CSVFields))
+
+# downselect all designs to the feasible ones, recorded and derived columns as arrays
+designs = downselect(results, v4CSVFields)
+Cb = designs['Cb']
+L = designs['L']
+B = designs['B']
+T = designs['T']
+fwCap = designs['FlywheelCapacity']
+GMT = designs['GMT']
+Wt = designs['Wt']
+Disp = designs['Disp']
+Excess = designs['Excess']
+MCR = designs['MCR']
+fuelWt = designs['fuelWt']
+etaRun = designs['etaRun']*100 #convert to percentage
+nStarts = designs['nStarts']
+percentFuel = designs['percentFuel']
+PBcru = designs['PBcru']
+PBspr = designs['PBspr']
+PBratio = designs['PBratio']
+LB = designs['LB']
+BT = designs['BT']
+TL = designs['TL']
+
+numFeasible = len(Cb)
 
 #---- SOME PLOTS
 # # test of 3D plotting
@@ -0,0 +1,26 @@
+# musvDOEv4parallel.py - process pool version of musvDOEv4.py
+# Same model and design variable ranges as musvDOEv4.py, with the Latin hypercube cases spread over all cores by
+# parallelDOE.py; each worker records to its own musvDOEv4cases_<pid>.sql shard
+# Creates a .npz file with every model variable as a column and a .csv file in the musvDOEv3.py layout
+
+# package, function, and class imports
+from __future__ import division, print_function
+from musvModel import MUSVv4, v4DesignVars, v4Outputs, v4CSVFields
+from batchDOE import lhsSamples, writeColumns, writeCSV
+from parallelDOE import runParallelDOE
+import time
+
+numSamples = 1000
+
+# the guard keeps worker processes from re-running the study when they import this file
+if __name__ == "__main__":
+    start = time.time()
+    # seeded, so the pool run evaluates the designs musvDOEv4batch.py does for the same number of samples
+    samples = lhsSamples(v4DesignVars, numSamples, seed=0)
+    results = runParallelDOE(samples, MUSVv4, v4Outputs, shardPrefix='musvDOEv4cases')
+    elapsed = time.time() - start
+    print("%d designs in %.3f s (%.0f designs/s)" % (numSamples, elapsed, numSamples/elapsed))
+
+    # write outputs
+    writeColumns('musvDOEv4cases.npz', results)
+    writeCSV('musvDOEv4cases.csv', results, v4CSVFields)
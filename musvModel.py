@@ -0,0 +1,260 @@
+# musvModel.py - the MUSV model assembled as an OpenMDAO group
+# Same components and connections as musvDOEv3.py and musvOPTv1.py, with a num_nodes option so a batch of designs
+# is evaluated in one run_model call
+
+# package, function, and class imports
+from __future__ import division, print_function
+from Weights import WeightsNoFuel
+from Stability import Stability
+from Fuel import Fuel
+from Ratios import Ratios
+from RatiosImp import RatiosImp
+from Balance import Balance
+from surrogateModel import SurrogateComp, loadSurrogates
+import openmdao.api as om
+import numpy as np
+
+# design variables of the v3 model and the range explored in musvDOEv3.py
+v3DesignVars = [('indeps.Cb', 0.31, 0.59), #unitless
+                ('indeps.T', 2, 5), #meters
+                ('indeps.L', 25, 50), #meters
+                ('indeps.B', 3, 12), #meters
+                ('indeps.fwCap', 0, 1000)] #megajoules
+
+# outputs recorded for each design in musvDOEv3.py
+v3Outputs = ['wts.Wt', 'const.Disp', 'const.Excess', 'stab.GMT', 'fuel.fuelWt', 'fuel.MCR', 'fuel.etaRun', 'fuel.nStarts', 'fuel.PBratio']
+
+# CSV columns written by musvDOEv3.py, and the model variable each one comes from
+v3CSVFields = [('Cb', 'indeps.Cb'), ('L', 'indeps.L'), ('B', 'indeps.B'), ('T', 'indeps.T'), ('FlywheelCapacity', 'indeps.fwCap'),
+               ('GMT', 'stab.GMT'), ('Wt', 'wts.Wt'), ('Disp', 'const.Disp'), ('Excess', 'const.Excess'), ('MCR', 'fuel.MCR'),
+               ('fuelWt', 'fuel.fuelWt'), ('etaRun', 'fuel.etaRun'), ('nStarts', 'fuel.nStarts')]
+
+# objectives of the NSGA2 optimization in musvOPTv1.py, all minimized, in the order they are declared, its design
+# variables are v3DesignVars
+optObjectives = ['wts.Disp', 'fuel.nStarts']
+
+# design variables of the balanced v3 model, L is solved so that displacement equals weight
+v3BalancedDesignVars = [('indeps.Cb', 0.31, 0.59), #unitless
+                        ('indeps.T', 2, 5), #meters
+                        ('indeps.B', 3, 12), #meters
+                        ('indeps.fwCap', 0, 1000)] #megajoules
+
+# outputs recorded for each design of the balanced v3 model
+v3BalancedOutputs = ['balance.L', 'balance.inBound'] + v3Outputs
+
+# CSV columns for the balanced v3 model, length comes from the balance
+v3BalancedCSVFields = [('Cb', 'indeps.Cb'), ('L', 'balance.L'), ('B', 'indeps.B'), ('T', 'indeps.T'), ('FlywheelCapacity', 'indeps.fwCap'),
+                       ('GMT', 'stab.GMT'), ('Wt', 'wts.Wt'), ('Disp', 'const.Disp'), ('Excess', 'const.Excess'), ('MCR', 'fuel.MCR'),
+                       ('fuelWt', 'fuel.fuelWt'), ('etaRun', 'fuel.etaRun'), ('nStarts', 'fuel.nStarts')]
+
+# design variables of the v4 (ratios) model and the range explored in musvDOEv4.py
+v4DesignVars = [('indeps.Cb', 0.31, 0.59), #unitless
+                ('indeps.LB', 2, 7), #unitless
+                ('indeps.BT', 0.5, 6), #unitless
+                ('indeps.TL', 0.1, 0.2), #unitless
+                ('indeps.fwCap', 0, 1000)] #megajoules
+
+# outputs recorded for each design in musvDOEv4.py
+v4Outputs = ['ratios.L', 'ratios.B', 'ratios.T', 'ratios.inBound'] + v3Outputs
+
+# CSV columns for the v4 model, dimensions come from the ratios component
+v4CSVFields = [('Cb', 'indeps.Cb'), ('L', 'ratios.L'), ('B', 'ratios.B'), ('T', 'ratios.T'), ('FlywheelCapacity', 'indeps.fwCap'),
+               ('GMT', 'stab.GMT'), ('Wt', 'wts.Wt'), ('Disp', 'const.Disp'), ('Excess', 'const.Excess'), ('MCR', 'fuel.MCR'),
+               ('fuelWt', 'fuel.fuelWt'), ('etaRun', 'fuel.etaRun'), ('nStarts', 'fuel.nStarts')]
+
+# the definition of the v3 MUSV model
+class MUSVv3(om.Group):
+    """
+    Fuel, weight and stability estimates for a batch of designs described by Cb, T, L, B and flywheel capacity
+    """
+
+    def initialize(self) :
+        self.options.declare('num_nodes', types=int, default=1, desc='number of designs evaluated in each run_model call')
+
+    def setup(self) :
+        nn = self.options['num_nodes']
+
+        #define independent variables (to be explored)
+        indeps = self.add_subsystem('indeps', om.IndepVarComp())
+        indeps.add_output('Cb', 0.31*np.ones(nn)) #unitless
+        indeps.add_output('T', 2*np.ones(nn), units='m') #meters
+        indeps.add_output('L', 20*np.ones(nn), units='m') #meters
+        indeps.add_output('B', 5*np.ones(nn), units='m') #meters
+        indeps.add_output('fwCap', 300*np.ones(nn), units='MJ') #megajoules
+
+        self.add_subsystem('fuel', Fuel(num_nodes=nn))
+        self.add_subsystem('wts', WeightsNoFuel(num_nodes=nn))
+        self.add_subsystem('stab', Stability(num_nodes=nn))
+
+        # displacement and 'excess' displacement of the design
+        self.add_subsystem('const', om.ExecComp(['Disp=1.026*Cb*T*L*B', 'Excess=1.026*Cb*T*L*B-Wt'], has_diag_partials=True,
+                                                Disp={'units': 't', 'shape': nn}, Excess={'units': 't', 'shape': nn}, Wt={'units': 't', 'shape': nn},
+                                                Cb={'shape': nn}, T={'units': 'm', 'shape': nn}, L={'units': 'm', 'shape': nn}, B={'units': 'm', 'shape': nn}))
+
+        #connect components
+        self.connect('indeps.Cb', ['wts.Cb', 'stab.Cb', 'fuel.Cb', 'const.Cb'])
+        self.connect('indeps.T', ['wts.T', 'stab.T', 'fuel.T', 'const.T'])
+        self.connect('indeps.L', ['wts.L', 'stab.L', 'fuel.L', 'const.L'])
+        self.connect('indeps.B', ['wts.B', 'stab.B', 'fuel.B', 'const.B'])
+        self.connect('fuel.MCR', 'wts.MCR')
+        self.connect('fuel.fuelWt', 'wts.fuelWt')
+        self.connect('indeps.fwCap', 'fuel.fwCap')
+        self.connect('wts.Wt', 'const.Wt')
+
+# the definition of the v3 MUSV model with the physics components replaced by surrogates from surrogateModel.py
+# fuel, wts and stab keep their names and outputs, so the v3 CSV fields and batchDOE work unchanged
+class MUSVv3Surrogate(om.Group):
+    """
+    Fuel, weight and stability predicted by trained surrogates for a batch of designs described by Cb, T, L, B and
+    flywheel capacity
+    """
+
+    def initialize(self) :
+        self.options.declare('num_nodes', types=int, default=1, desc='number of designs evaluated in each run_model call')
+        self.options.declare('surrogates', types=(str, dict), desc='file saved by surrogateModel.saveSurrogates, or the dict of trained surrogates')
+
+    def setup(self) :
+        nn = self.options['num_nodes']
+        surrogates = self.options['surrogates']
+        if isinstance(surrogates, str):
+            surrogates = loadSurrogates(surrogates)
+
+        #define independent variables (to be explored)
+        indeps = self.add_subsystem('indeps', om.IndepVarComp())
+        indeps.add_output('Cb', 0.31*np.ones(nn)) #unitless
+        indeps.add_output('T', 2*np.ones(nn), units='m') #meters
+        indeps.add_output('L', 20*np.ones(nn), units='m') #meters
+        indeps.add_output('B', 5*np.ones(nn), units='m') #meters
+        indeps.add_output('fwCap', 300*np.ones(nn), units='MJ') #megajoules
+
+        # one surrogate component in place of each physics component, inputs in the order the surrogates were trained
+        inputs = [('Cb', None), ('L', 'm'), ('B', 'm'), ('T', 'm'), ('fwCap', 'MJ')]
+        units = {'Wt': 't', 'GMT': 'm', 'fuelWt': 't', 'MCR': 'kW', 'etaRun': None, 'nStarts': None, 'PBratio': None}
+        # PBratio is only an output when a surrogate was trained for it, e.g. from a .npz file of cases
+        for comp, outputs in [('fuel', ['fuelWt', 'MCR', 'etaRun', 'nStarts', 'PBratio']), ('wts', ['Wt']), ('stab', ['GMT'])]:
+            self.add_subsystem(comp, SurrogateComp(num_nodes=nn, inputs=inputs, surrogates={name: (surrogates[comp + '.' + name], units[name])
+                                                                                          for name in outputs if comp + '.' + name in surrogates}))
+            for name, inUnits in inputs:
+                self.connect('indeps.' + name, comp + '.' + name)
+
+        # displacement and 'excess' displacement of the design
+        self.add_subsystem('const', om.ExecComp(['Disp=1.026*Cb*T*L*B', 'Excess=1.026*Cb*T*L*B-Wt'], has_diag_partials=True,
+                                                Disp={'units': 't', 'shape': nn}, Excess={'units': 't', 'shape': nn}, Wt={'units': 't', 'shape': nn},
+                                                Cb={'shape': nn}, T={'units': 'm', 'shape': nn}, L={'units': 'm', 'shape': nn}, B={'units': 'm', 'shape': nn}))
+
+        #connect components
+        self.connect('indeps.Cb', 'const.Cb')
+        self.connect('indeps.T', 'const.T')
+        self.connect('indeps.L', 'const.L')
+        self.connect('indeps.B', 'const.B')
+        self.connect('wts.Wt', 'const.Wt')
+
+# the definition of the balanced v3 MUSV model, the fuel -> weight -> displacement loop is converged for every design
+class MUSVv3Balanced(om.Group):
+    """
+    Fuel, weight and stability estimates for a batch of designs described by Cb, T, B and flywheel capacity, with L
+    solved so that displacement equals weight
+    """
+
+    def initialize(self) :
+        self.options.declare('num_nodes', types=int, default=1, desc='number of designs evaluated in each run_model call')
+        self.options.declare('maxiter', types=int, default=20, desc='Newton iteration limit for each design')
+
+    def setup(self) :
+        nn = self.options['num_nodes']
+
+        #define independent variables (to be explored)
+        indeps = self.add_subsystem('indeps', om.IndepVarComp())
+        indeps.add_output('Cb', 0.31*np.ones(nn)) #unitless
+        indeps.add_output('T', 2*np.ones(nn), units='m') #meters
+        indeps.add_output('B', 5*np.ones(nn), units='m') #meters
+        indeps.add_output('fwCap', 300*np.ones(nn), units='MJ') #megajoules
+
+        # length is solved first, each design converging its own Fuel -> WeightsNoFuel -> displacement loop, so the
+        # components below only evaluate the balanced design
+        self.add_subsystem('balance', Balance(num_nodes=nn, maxiter=self.options['maxiter']))
+
+        self.add_subsystem('fuel', Fuel(num_nodes=nn))
+        self.add_subsystem('wts', WeightsNoFuel(num_nodes=nn))
+        self.add_subsystem('stab', Stability(num_nodes=nn))
+
+        # displacement and 'excess' displacement of the design
+        self.add_subsystem('const', om.ExecComp(['Disp=1.026*Cb*T*L*B', 'Excess=1.026*Cb*T*L*B-Wt'], has_diag_partials=True,
+                                                Disp={'units': 't', 'shape': nn}, Excess={'units': 't', 'shape': nn}, Wt={'units': 't', 'shape': nn},
+                                                Cb={'shape': nn}, T={'units': 'm', 'shape': nn}, L={'units': 'm', 'shape': nn}, B={'units': 'm', 'shape': nn}))
+
+        #connect components
+        self.connect('indeps.Cb', ['balance.Cb', 'wts.Cb', 'stab.Cb', 'fuel.Cb', 'const.Cb'])
+        self.connect('indeps.T', ['balance.T', 'wts.T', 'stab.T', 'fuel.T', 'const.T'])
+        self.connect('balance.L', ['wts.L', 'stab.L', 'fuel.L', 'const.L'])
+        self.connect('indeps.B', ['balance.B', 'wts.B', 'stab.B', 'fuel.B', 'const.B'])
+        self.connect('fuel.MCR', 'wts.MCR')
+        self.connect('fuel.fuelWt', 'wts.fuelWt')
+        self.connect('indeps.fwCap', ['balance.fwCap', 'fuel.fwCap'])
+        self.connect('wts.Wt', 'const.Wt')
+
+# the definition of the v4 MUSV model, dimensions found from ratios by balancing weight and displacement
+class MUSVv4(om.Group):
+    """
+    Fuel, weight and stability estimates for a batch of designs described by Cb, L/B, B/T, T/L and flywheel capacity
+    """
+
+    def initialize(self) :
+        self.options.declare('num_nodes', types=int, default=1, desc='number of designs evaluated in each run_model call')
+        self.options.declare('implicit', types=bool, default=False, desc='balance the ratios with RatiosImp and Newton instead of the Ratios component')
+
+    def setup(self) :
+        nn = self.options['num_nodes']
+
+        #define independent variables (to be explored)
+        indeps = self.add_subsystem('indeps', om.IndepVarComp())
+        indeps.add_output('Cb', 0.31*np.ones(nn)) #unitless
+        indeps.add_output('LB', 0.31*np.ones(nn)) #unitless
+        indeps.add_output('BT', 0.31*np.ones(nn)) #unitless
+        indeps.add_output('TL', 0.31*np.ones(nn)) #unitless
+        indeps.add_output('fwCap', 300*np.ones(nn), units='MJ') #megajoules
+
+        # ratios runs first so the other components see this design's dimensions
+        if self.options['implicit']:
+            # Newton on the implicit balance, promoted so the dimensions keep the ratios.L, ratios.B, ratios.T names
+            ratios = self.add_subsystem('ratios', om.Group())
+            ratios.add_subsystem('imp', RatiosImp(num_nodes=nn), promotes=['*'])
+            ratios.nonlinear_solver = om.NewtonSolver(solve_subsystems=False, maxiter=20, iprint=0)
+            ratios.nonlinear_solver.linesearch = om.BoundsEnforceLS()
+            ratios.linear_solver = om.DirectSolver()
+        else:
+            self.add_subsystem('ratios', Ratios(num_nodes=nn))
+        self.add_subsystem('fuel', Fuel(num_nodes=nn))
+        self.add_subsystem('wts', WeightsNoFuel(num_nodes=nn))
+        self.add_subsystem('stab', Stability(num_nodes=nn))
+
+        # displacement and 'excess' displacement of the design
+        self.add_subsystem('const', om.ExecComp(['Disp=1.026*Cb*T*L*B', 'Excess=1.026*Cb*T*L*B-Wt'], has_diag_partials=True,
+                                                Disp={'units': 't', 'shape': nn}, Excess={'units': 't', 'shape': nn}, Wt={'units': 't', 'shape': nn},
+                                                Cb={'shape': nn}, T={'units': 'm', 'shape': nn}, L={'units': 'm', 'shape': nn}, B={'units': 'm', 'shape': nn}))
+
+        #connect components
+        self.connect('indeps.Cb', ['ratios.Cb', 'wts.Cb', 'stab.Cb', 'fuel.Cb', 'const.Cb'])
+        self.connect('indeps.LB', 'ratios.LB')
+        self.connect('indeps.BT', 'ratios.BT')
+        self.connect('indeps.TL', 'ratios.TL')
+        self.connect('ratios.T', ['wts.T', 'stab.T', 'fuel.T', 'const.T'])
+        self.connect('ratios.L', ['wts.L', 'stab.L', 'fuel.L', 'const.L'])
+        self.connect('ratios.B', ['wts.B', 'stab.B', 'fuel.B', 'const.B'])
+        self.connect('fuel.MCR', 'wts.MCR')
+        self.connect('fuel.fuelWt', 'wts.fuelWt')
+        self.connect('indeps.fwCap', 'fuel.fwCap')
+        self.connect('wts.Wt', 'const.Wt')
+
+# debugging code, verifies that the batched model matches a single design
+if __name__ == "__main__":
+    prob = om.Problem(MUSVv3(num_nodes=3))
+    prob.setup()
+    prob['indeps.Cb'] = [0.41, 0.46, 0.35]
+    prob['indeps.L'] = [37.1, 39.8, 30.0]
+    prob['indeps.B'] = [7.68, 8.44, 6.0]
+    prob['indeps.T'] = [3.66, 3.53, 2.5]
+    prob['indeps.fwCap'] = [485, 969, 0]
+    prob.run_model()
+    for name in v3Outputs:
+        print(name, prob[name])
@@ -9,6 +9,10 @@ from __future__ import division, print_function
 from Weights import WeightsNoFuel
 from Stability import Stability
 from Fuel import Fuel
+from evalCache import cacheModel, cacheReport
+from diskCache import DiskCache
+from constraints import addConstraints
+from musvModel import v3DesignVars, optObjectives
 import openmdao.api as om
 import math
 import csv
@@ -37,7 +41,7 @@ prob.model.add_subsystem('stab',Stability())
 
 # define component whose output will be constrained
 # units defined, excess represents the 'excess' displacement of the design
-prob.model.add_subsystem('const', om.ExecComp('Excess=Disp-Wt', Disp={'units': 't'}, Wt={'units': 't'}))
+prob.model.add_subsystem('const', om.ExecComp('Excess=Disp-Wt', Excess={'units': 't'}, Disp={'units': 't'}, Wt={'units': 't'}))
 
 #connect components
 prob.model.connect('indeps.Cb', ['wts.Cb', 'stab.Cb', 'fuel.Cb'])
@@ -51,11 +55,9 @@ prob.model.connect('wts.Disp', 'const.Disp')
 prob.model.connect('wts.Wt','const.Wt')
 
 # set the range for the independent variables that will be explored
-prob.model.add_design_var('indeps.Cb', lower=0.31, upper=0.59)
-prob.model.add_design_var('indeps.T', lower=2, upper=5)
-prob.model.add_design_var('indeps.L', lower=25, upper=50)
-prob.model.add_design_var('indeps.B', lower=3, upper=12)
-prob.model.add_design_var('indeps.fwCap', lower=0, upper=1000)
+# the same ranges as musvDOEv3.py, musvOPTv1Plotter.py reads the output columns in this order
+for name, lower, upper in v3DesignVars:
+    prob.model.add_design_var(name, lower=lower, upper=upper)
 
 # add other design variables?
 # prob.model.add_design_var('wts.Wt')
@@ -65,18 +67,12 @@ prob.model.add_design_var('indeps.fwCap', lower=0, upper=1000)
 # prob.model.add_design_var('fuel.etaRun')
 
 # add the objectives to the model, all to be minimized
-model.add_objective('wts.Disp')
-model.add_objective('fuel.nStarts')
+for name in optObjectives:
+    model.add_objective(name)
 #model.add_objective('fuel.etaRun')
 
-# add the constraints to the model
-prob.model.add_constraint('wts.Wt', lower=0)
-prob.model.add_constraint('stab.GMT', lower=0.01)
-prob.model.add_constraint('fuel.MCR', lower=0, upper=3000)
-prob.model.add_constraint('fuel.fuelWt', lower=0, upper=100)
-prob.model.add_constraint('const.Excess', lower=-10, upper=10)
-prob.model.add_constraint('fuel.etaRun', lower=0)
-prob.model.add_constraint('fuel.PBratio', lower=0, upper=3)
+# add the constraints to the model, the feasible set of constraints.py shared with the DOE and the plotters
+addConstraints(prob.model)
 
 
 prob.driver = om.pyOptSparseDriver(optimizer='NSGA2')
@@ -88,7 +84,12 @@ prob.set_solver_print(level=0)
 
 #prob.setup(check=False, mode='rev')
 prob.setup(check=False)
+# designs evaluated by an earlier run are read from the cache file, and NSGA2 keeps the best designs of each
+# generation, so the same designs are evaluated again, the in-memory cache in front answers those
+cacheModel(prob.model, cache=DiskCache('musvCache.sqlite'))
+caches = cacheModel(prob.model, maxsize=4*240)
 prob.run_driver()
+print(cacheReport(caches))
 
 
 
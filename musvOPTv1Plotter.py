@@ -1,76 +1,68 @@
 # musvOPTv1Plotter.py - from
 # Reads output from NSGA2 optimization and plots
 
-import csv
+import numpy as np
 import matplotlib.pyplot as plt
 from mpl_toolkits.mplot3d import Axes3D  # noqa: F401 unused import
+from resultsStore import cachedResults
+from constraints import feasibleMask, driverConstraints
+from musvModel import v3DesignVars, v3Outputs, optObjectives
+from batchDOE import runBatchDOE
 
 outpath = './results/OPTv1/'
 
-# setup read of output file
-with open('nsga2_best_pop.out', newline='') as csv_file:
-    # skip header rows
-    next(csv_file)
-    next(csv_file)
-
-    # read csv file
-    reader = csv.reader(csv_file, delimiter='	', quoting=csv.QUOTE_NONNUMERIC)
-
-    # -- set up lists for data
-    # objectives
-    Disp = [] # index = 0
-    nStarts = [] # index = 1
-
-    # constraints
-    Wt = [] # index = 3
-    GMT = [] # index = 5
-    MCR = [] # index = 7
-    fuelWt = [] # index = 9
-    Excess = [] # index = 11
-    etaRun = [] # index = 13
-    PBratio = [] # index = 15
-
-    # design variables
-    Cb = [] # index = 16
-    T = [] # index = 17
-    L = [] # index = 18
-    B = [] # index = 19
-    fwCap = [] # index = 20
-
-    # calculated values
-    percentFuel = []
-    LB = []
-    BT = []
-    TL = []
-
-    # iterate through all designs
-    for row in reader:
-        #read data into lists
-        Disp.append(row[0])
-        nStarts.append(row[1])
-
-        Wt.append(row[3])
-        GMT.append(row[5])
-        MCR.append(row[7])
-        fuelWt.append(row[9])
-        Excess.append(row[11])
-        etaRun.append((row[13]*100)) #convert to percentage
-        PBratio.append(row[15])
-
-        Cb.append(row[16])
-        T.append(row[17])
-        L.append(row[18])
-        B.append(row[19])
-        fwCap.append(row[20])
-
-        percentFuel.append((row[9]/row[3])*100)  #convert to percentage
-
-        LB.append(row[18]/row[19])
-        BT.append(row[19]/row[17])
-        TL.append(row[17]/row[18])
-        print("L: ",row[18]," B: ",row[19]," T: ",row[17]," Cb: ",row[16])
-
-    numFeasible = len(Disp)
+# model variable in each column of the NSGA2 output, in the order musvOPTv1.py declares them: objectives, constraints
+# (two columns each, the value in the second) then design variables
+designVars = [name for name, lower, upper in v3DesignVars]
+nsga2Names = optObjectives + [n for name in driverConstraints() for n in (None, name)] + designVars
+nsga2Columns = {i: name for i, name in enumerate(nsga2Names) if name is not None}
+
+# read the tab separated NSGA2 output into columns, skipping the two header rows, unnamed columns are kept in order
+# the output holds no model outputs besides the objectives and constraints, the others are evaluated again for the
+# final designs with the v3 model, the same model as musvOPTv1.py
+def readNSGA2(filename) :
+    data = np.loadtxt(filename, delimiter='\t', skiprows=2, ndmin=2)
+    columns = {nsga2Columns.get(i, 'column%d' % i): data[:,i] for i in range(data.shape[1])}
+    evaluated = runBatchDOE({name: columns[name] for name in designVars})
+    columns.update({name: evaluated[name] for name in v3Outputs if name not in columns})
+    return columns
+
+# map the result columns, converted from nsga2_best_pop.out the first time and whenever the output is newer
+results = cachedResults('nsga2_best_pop.mmap', 'nsga2_best_pop.out', readNSGA2)
+
+# keep the designs feasible under the constraints of constraints.py, the same downselect as the DOE case plotters
+feasible = feasibleMask(results)
+
+# objectives
+Disp = results['wts.Disp'][feasible]
+nStarts = results['fuel.nStarts'][feasible]
+
+# constraints and other model outputs
+Wt = results['wts.Wt'][feasible]
+GMT = results['stab.GMT'][feasible]
+MCR = results['fuel.MCR'][feasible]
+fuelWt = results['fuel.fuelWt'][feasible]
+Excess = results['const.Excess'][feasible]
+etaRun = results['fuel.etaRun'][feasible]*100 #convert to percentage
+PBratio = results['fuel.PBratio'][feasible]
+
+# design variables
+Cb = results['indeps.Cb'][feasible]
+T = results['indeps.T'][feasible]
+L = results['indeps.L'][feasible]
+B = results['indeps.B'][feasible]
+fwCap = results['indeps.fwCap'][feasible]
+
+# calculated values
+percentFuel = (fuelWt/Wt)*100 #convert to percentage
+LB = L/B
+BT = B/T
+TL = T/L
+
+for l, b, t, cb in zip(L, B, T, Cb):
+    print("L: ",l," B: ",b," T: ",t," Cb: ",cb)
+
+numFeasible = len(Disp)
 
 
 #---- SOME PLOTS ---
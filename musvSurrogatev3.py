@@ -0,0 +1,34 @@
+# musvSurrogatev3.py - trains surrogates of the v3 model from the musvDOEv3.py cases
+# Reads musvDOEv3cases.csv (as written by musvDOEv3.py or musvDOEv3batch.py), reports k-fold cross validation errors
+# of kriging and radial basis function surrogates, then saves both sets of trained surrogates for MUSVv3Surrogate
+# Kriging is trained on a random subset of the cases, its training cost grows with the cube of the number of points
+
+# package, function, and class imports
+from __future__ import division, print_function
+from musvModel import MUSVv3Surrogate, v3DesignVars
+from batchDOE import readCSV, lhsSamples, runBatchDOE
+from surrogateModel import trainSurrogates, crossValidate, saveSurrogates, surrogateOutputs
+import functools
+import time
+
+# training points for each method, None uses every recorded case
+methods = [('rbf', 5000), ('kriging', 300)]
+
+results = readCSV('musvDOEv3cases.csv')
+
+for method, samples in methods:
+    # --- cross validation
+    errors = crossValidate(results, method, folds=5, samples=samples, seed=0)
+    print("-- %s, %s training points, 5-fold cross validation --" % (method, samples))
+    print("\n".join(["%-14s RMS error: %10.4g, mean error: %5.1f%%" % (name, rms, 100*rel) for name, (rms, rel) in errors.items()]))
+
+    # --- train on the same points and save
+    surrogates = trainSurrogates(results, method, samples=samples, seed=0)
+    saveSurrogates('musvSurrogatev3_%s.pkl' % method, surrogates)
+
+    # --- surrogate model throughput
+    samplesLHS = lhsSamples(v3DesignVars, 10000)
+    start = time.time()
+    runBatchDOE(samplesLHS, surrogateOutputs + ['const.Disp', 'const.Excess'], chunk=10000, model=functools.partial(MUSVv3Surrogate, surrogates=surrogates))
+    elapsed = time.time() - start
+    print("surrogate model: 10000 designs in %.3f s (%.0f designs/s)" % (elapsed, 10000/elapsed))
@@ -0,0 +1,103 @@
+# parallelDOE.py - design of experiment spread over a pool of worker processes
+# Each worker builds its own Problem with its own SqliteRecorder shard and evaluates chunks of cases pulled from a
+# shared queue, so slow cases (e.g. a long RatioWeights scan) do not hold up the other workers
+# When all chunks are done the shards are merged back into columns in the original case order
+
+# package, function, and class imports
+from __future__ import division, print_function
+from multiprocessing import Pool
+from caseExport import readCases
+import openmdao.api as om
+import numpy as np
+import glob
+import os
+
+# the Problem owned by this worker process, built once by initWorker
+_prob = None
+
+# ---------
+# worker setup, builds the model and attaches a recorder writing to this process's own shard
+def initWorker(model, shardPrefix) : # model group class, shard file prefix
+    global _prob
+    _prob = om.Problem(model())
+    recorder = om.SqliteRecorder(os.path.abspath('%s_%d.sql' % (shardPrefix, os.getpid())))
+    _prob.add_recorder(recorder)
+    _prob.recording_options['record_inputs'] = False
+    _prob.recording_options['record_residuals'] = False
+    _prob.recording_options['includes'] = ['*']
+    _prob.setup()
+    _prob.set_solver_print(level=0)
+    _prob.final_setup()
+
+# evaluate one chunk of cases, each recorded under its index in the sample matrix
+def runChunk(chunk) : # list of (case index, {design variable: value})
+    for idx, case in chunk:
+        for name, value in case.items():
+            _prob[name] = value
+        _prob.run_model()
+        _prob.record('case_%d' % idx)
+    return len(chunk)
+
+# ---------
+# run the sample matrix on a process pool, returning the merged result columns
+def runParallelDOE(samples, model, outputs, shardPrefix='parallelDOE', processes=None, chunk=20) : # dict of design variable arrays, model group class, output names, shard file prefix, number of workers, cases per chunk
+    names = list(samples)
+    nCases = len(samples[names[0]])
+
+    # remove shards left over from a previous run
+    for shard in glob.glob('%s_*.sql' % shardPrefix):
+        os.remove(shard)
+
+    # small chunks handed out one at a time keep the workers balanced
+    cases = [(idx, {name: float(samples[name][idx]) for name in names}) for idx in range(nCases)]
+    chunks = [cases[start:start + chunk] for start in range(0, nCases, chunk)]
+
+    pool = Pool(processes, initializer=initWorker, initargs=(model, shardPrefix))
+    try:
+        for n in pool.imap_unordered(runChunk, chunks, chunksize=1):
+            pass
+    finally:
+        pool.close()
+        pool.join()
+
+    return mergeShards(glob.glob('%s_*.sql' % shardPrefix), names + list(outputs), nCases)
+
+# read every shard and place each recorded case back at its index in the sample matrix
+def mergeShards(shards, names, nCases) : # shard files, variable names, number of cases
+    results = {name: np.full(nCases, np.nan) for name in names}
+    for shard in shards:
+        columns, cases = readCases(shard, names, source='problem')
+        idx = np.char.rpartition(cases, 'case_')[:,2].astype(int)
+        for name in names:
+            results[name][idx] = columns[name]
+    return results
+
+# ---------
+# read the driver cases of a DOEDriver run back into columns, including runs under mpirun with run_parallel
+# each rank then records to <filename>_<rank>, draws the whole sample matrix from its own copy of the generator and
+# runs the cases i with i % nRanks == rank, numbering them 0, 1, ... in its iteration coordinate. Case i of the
+# generator is iteration i // nRanks of rank i % nRanks, so sorting on (iteration, rank) restores the order of the
+# generator, provided the generator is seeded (e.g. LatinHypercubeGenerator(seed=0)) so every rank draws the same matrix
+def mergeRankFiles(filename, names, nRanks=1) : # recorder file name, variable names, number of MPI ranks
+    if nRanks > 1:
+        files = ['%s_%d' % (filename, rank) for rank in range(nRanks)]
+    else:
+        files = [filename]
+
+    columns = {name: [] for name in names}
+    iteration = []
+    ranks = []
+    for rank, caseFile in enumerate(files):
+        results, cases = readCases(caseFile, names)
+        for name in names:
+            columns[name].append(results[name])
+        iteration.append(np.char.rpartition(cases, '|')[:,2].astype(int))
+        ranks.append(np.full(len(cases), rank))
+    # rank r runs ceil((cases - r)/nRanks) cases, anything else is a missing or leftover rank file
+    counts = np.array([len(i) for i in iteration])
+    expected = -(-(counts.sum() - np.arange(len(files))) // len(files))
+    if not np.array_equal(counts, expected):
+        raise ValueError("rank files of '%s' hold %s cases, expected %s" % (filename, counts.tolist(), expected.tolist()))
+    order = np.lexsort((np.concatenate(ranks), np.concatenate(iteration)))
+
+    return {name: np.concatenate(columns[name])[order] for name in names}
@@ -1,7 +1,15 @@
 # poweringEstimate.py - function to estimate brake powering required based on series64 resistance
 
-import math
-from resistanceCurves import series64
+from resistanceCurves import series64, series64Vec, series64VecDeriv
+
+# ---------
+# propulsion efficiencies shared by the scalar and array estimates, from Parsons' NA470 Coursepack
+etaH = 1.2 #hull efficiency
+etaRR = 0.97 #propeller rotative efficiency
+etaO = 0.55 #propeller open water efficiency
+etaSBG = 0.98 #stern tube, bearing, gear efficiency - taken assuming machinery aft
+fracMCR = 0.85 #brake power assuming 85% MCR
+knotsPerMS = 1.944 #knots per m/s
 
 # Series 64 resistance taken from Ship Resistance and Propulsion by Molland
 # Powering estimate based on Parsons' NA470 Coursepack
@@ -11,7 +19,7 @@ def poweringEstimate(L, S, Disp, Cb, Vk) : #inputs in meters, meters^2, metric t
     g = 9.81 #m/s^2
 
     # conversions
-    v = Vk/(1.944) #m/s
+    v = Vk/(knotsPerMS) #m/s
 
     # resistance
     R = series64(L, S, Disp, Cb, Vk) #N
@@ -20,17 +28,32 @@ def poweringEstimate(L, S, Disp, Cb, Vk) : #inputs in meters, meters^2, metric t
     PE = (R*v)/1000 #kW
 
     # delivered power
-    eta_H = 1.2 #hull efficiency
-    eta_RR = 0.97 #propeller rotative efficiency
-    eta_O = 0.55 #propeller open water efficiency
-    PD = PE/(eta_H*eta_RR*eta_O)
+    PD = PE/(etaH*etaRR*etaO)
 
     # brake power
-    eta_SBG = 0.98 #stern tube, bearing, gear efficiency - taken assuming machinery aft
-    PB = (PD/eta_SBG)*(0.85) #kW, brake power assuming 85% MCR
+    PB = (PD/etaSBG)*(fracMCR) #kW, brake power assuming 85% MCR
 
     return PB
 
+# array form of poweringEstimate, evaluates N designs at once
+# also returns the series64Vec mask of designs outside the resistance regression
+def poweringEstimateVec(L, S, Disp, Cb, Vk) : #inputs in meters, meters^2, metric tonnes, unitless, knots - arrays or scalars
+    # resistance
+    R, inRange = series64Vec(L, S, Disp, Cb, Vk) #N
+
+    # effective, delivered and brake power, same efficiencies as poweringEstimate
+    PE = (R*(Vk/(knotsPerMS)))/1000 #kW
+    PD = PE/(etaH*etaRR*etaO)
+    PB = (PD/etaSBG)*(fracMCR) #kW, brake power assuming 85% MCR
+
+    return PB, inRange
+
+# partial derivatives of poweringEstimateVec with respect to (L, S, Disp, Cb), brake power is linear in resistance
+def poweringEstimateVecDeriv(L, S, Disp, Cb, Vk) : #inputs in meters, meters^2, metric tonnes, unitless, knots - arrays or scalars
+    dR = series64VecDeriv(L, S, Disp, Cb, Vk)
+    dPB = dR*((Vk/(knotsPerMS))/1000/(etaH*etaRR*etaO)/etaSBG*(fracMCR))
+    return dPB
+
 # P1 = poweringEstimate(40,400,250,.45,16)
 # print(P1)
 #
@@ -0,0 +1,65 @@
+# ratioTable.py - precomputed table of the weight/displacement balance length
+# The balance from RatioWeightsVec is solved once over a grid of B/T, T/L and Cb and saved to a .npz file, then
+# answered by multilinear interpolation; L/B does not enter the balance so it is not a table axis
+# The table is solved over 8-120 m so cells next to the 19-51 m limits interpolate cleanly, the limits are applied
+# to the interpolated length; grid points with no balance at all are flagged in the 'valid' array
+
+# package, function, and class imports
+from __future__ import division, print_function
+from scipy.interpolate import RegularGridInterpolator
+from RatioWeights import RatioWeightsVec, balanceStep
+import numpy as np
+
+# default grid, covers the ratio ranges explored in musvDOEv4.py
+tableBT = np.linspace(0.5, 6, 56) # 0.1 steps
+tableTL = np.linspace(0.03, 0.2, 35) # 0.005 steps
+tableCb = np.linspace(0.3, 0.6, 31) # 0.01 steps
+
+# ---------
+# solve the balance at every grid point and save the table
+def buildRatioTable(filename, BT=tableBT, TL=tableTL, Cb=tableCb) : # output file, grid axes
+    gBT, gTL, gCb = np.meshgrid(BT, TL, Cb, indexing='ij')
+    L,B,T,inBound = RatioWeightsVec(1, gBT, gTL, gCb, tol=1e-8, lower_length=8, upper_length=120)
+    np.savez_compressed(filename, BT=BT, TL=TL, Cb=Cb, L=L, valid=(inBound == 1))
+
+# balance length lookup from a table saved by buildRatioTable
+class RatioTable(object):
+    """
+    Interpolates the balance length from a precomputed table
+    """
+
+    def __init__(self, filename) :
+        data = np.load(filename)
+        # length scales close to a power of B/T and T/L, so interpolating in logs is nearly exact
+        axes = (np.log(data['BT']), np.log(data['TL']), data['Cb'])
+        # log length and the valid flag share one interpolator, the interpolated flag is the fraction of the
+        # surrounding grid points that balance; points outside the grid return nan and count as not balanced
+        values = np.stack((np.log(data['L']), data['valid'].astype(float)), axis=-1)
+        self.interp = RegularGridInterpolator(axes, values, bounds_error=False, fill_value=np.nan)
+
+    # returns the balance length and a mask of designs that balance between 19 and 51 m
+    # the table is interpolated at the real parts, complex inputs get their imaginary part from balanceStep
+    def lookup(self, B_to_T, T_to_L, Cb) : # inputs unitless
+        B_to_T, T_to_L, Cb = np.broadcast_arrays(*[np.asarray(x) for x in (B_to_T, T_to_L, Cb)])
+        points = np.stack((np.log(np.real(B_to_T)), np.log(np.real(T_to_L)), np.real(Cb)), axis=-1)
+        values = self.interp(points)
+        L = np.exp(values[...,0])
+        inBound = ((values[...,1] > 1 - 1e-9) & (L >= 19) & (L <= 51)).astype(int)
+        # designs that do not balance take the last length, as in RatioWeights
+        L = np.where(inBound == 1, L, 51.0)
+        return balanceStep(L, B_to_T, T_to_L, Cb, inBound), inBound
+
+# debugging code, builds the table and compares it to the direct solve at random ratio sets
+if __name__ == "__main__":
+    buildRatioTable('ratioTable.npz')
+    table = RatioTable('ratioTable.npz')
+
+    rng = np.random.default_rng(0)
+    BT = rng.uniform(0.5, 6, 10000)
+    TL = rng.uniform(0.1, 0.2, 10000)
+    Cb = rng.uniform(0.31, 0.59, 10000)
+    L, inBound = table.lookup(BT, TL, Cb)
+    Ls, Bs, Ts, inBounds = RatioWeightsVec(1, BT, TL, Cb)
+    both = (inBound == 1) & (inBounds == 1)
+    print("balanced: table %d, solve %d, disagree %d" % (inBound.sum(), inBounds.sum(), np.count_nonzero(inBound != inBounds)))
+    print("max length error: %.4f m" % np.max(np.abs(L - Ls)[both]))
@@ -1,90 +1,184 @@
 # resistanceCurves.py - file to contain various resistance curves defined for use as functions
 
-import math
+import numpy as np
+from scipy.interpolate import make_interp_spline, NdBSpline
 
 # Series 64 resistance taken from Ship Resistance and Propulsion by Molland
 # NOTE: this returns zero resistance if Block Coefficient or Froude number is out of bounds!
 def series64(L, S, displ, Cb, Vk) : #inputs in meters, meters^2, metric tonnes, unitless, knots
+    R, inRange = series64Vec(L, S, displ, Cb, Vk)
+    return R
+
+# ---------
+# Series 64 regression coefficients as a binned table for the vectorized evaluator
+# rows are block coefficient bins, columns are Froude number bins
+# bin i covers edges[i] <= x < edges[i+1], anything outside the table has zero residuary resistance
+s64CbEdges = np.array([0.3, 0.4, 0.5, 0.6])
+s64FnEdges = np.array([0.35, 0.45, 0.55, 0.65, 0.75, 0.85, 0.95, 1.05])
+s64a = np.array([[288, 751, 758, 279, 106, 47, 25],
+                 [36726, 55159, 42184, 29257, 27130, 20657, 11644],
+                 [926, 1775, 1642, 1106, 783, 458, 199]], dtype=float)
+s64n = np.array([[-2.33, -2.76, -2.81, -2.42, -2.06, -1.74, -1.50],
+                 [-4.41, -4.61, -4.56, -4.47, -4.51, -4.46, -4.24],
+                 [-2.74, -3.05, -3.08, -2.98, -2.90, -2.73, -2.38]])
+
+# look up the Series 64 (a, n) coefficients for arrays of block coefficient and Froude number
+# out of range designs get a = n = 0 and are False in the returned mask
+# bins are chosen on the real part so complex step inputs select the same coefficients
+def series64Coeffs(Cb, Fn) : #inputs unitless
+    iCb = np.digitize(np.real(Cb), s64CbEdges) - 1
+    iFn = np.digitize(np.real(Fn), s64FnEdges) - 1
+    inRange = (iCb >= 0) & (iCb < s64a.shape[0]) & (iFn >= 0) & (iFn < s64a.shape[1])
+    iCb = np.where(inRange, iCb, 0)
+    iFn = np.where(inRange, iFn, 0)
+    a = np.where(inRange, s64a[iCb, iFn], 0)
+    n = np.where(inRange, s64n[iCb, iFn], 0)
+    return a, n, inRange
+
+# Series 64 resistance for arrays of designs, real or complex
+# returns resistance and a mask that is False where Cb or Fn fall outside the regression (R = 0 there)
+def series64Vec(L, S, displ, Cb, Vk) : #inputs in meters, meters^2, metric tonnes, unitless, knots - arrays or scalars
     #constants
     rho = 1026.0 #kg/m^3
     g = 9.81 #m/s^2
 
+    L, S, displ, Cb, Vk = np.broadcast_arrays(*[np.asarray(x) for x in (L, S, displ, Cb, Vk)])
+
     #conversion
     V = Vk/1.944 #m/s
-    Fn = V/math.sqrt(g*L) #unitless
+    Fn = V/np.sqrt(g*L) #unitless
     nabla = (displ*1000)/(rho)
-    D3 = math.pow(nabla,(1/3)) #meters
+    D3 = np.power(nabla,(1/3)) #meters
     # a check to avoid division by zero in optimization
-    if D3 < 1:
-        D3 = 1
-
-    # set up equation for C_R
-    # switch based on block coefficient, modify formula based on Froude number
-    if Cb < 0.3:
-        a, n = 0, 0
-    elif Cb < 0.4 and Cb >= 0.3 :
-        if Fn < 0.35:
-            a, n = 0, 0
-        elif Fn < 0.45 and Fn >= 0.35 :
-            a, n = 288, -2.33
-        elif Fn < 0.55 and Fn >= 0.45 :
-            a, n = 751, -2.76
-        elif Fn < 0.65 and Fn >= 0.55 :
-            a, n = 758, -2.81
-        elif Fn < 0.75 and Fn >= 0.65 :
-            a, n = 279, -2.42
-        elif Fn < 0.85 and Fn >= 0.75 :
-            a, n = 106, -2.06
-        elif Fn < 0.95 and Fn >= 0.85 :
-            a, n = 47, -1.74
-        elif Fn < 1.05 and Fn >= 0.95 :
-            a, n = 25, -1.50
-        else:
-            a,n = 0,0
-    elif Cb < 0.5 and Cb >= 0.4 :
-        if Fn < 0.35:
-            a, n = 0, 0
-        elif Fn < 0.45 and Fn >= 0.35 :
-            a, n = 36726, -4.41
-        elif Fn < 0.55 and Fn >= 0.45 :
-            a, n = 55159, -4.61
-        elif Fn < 0.65 and Fn >= 0.55 :
-            a, n = 42184, -4.56
-        elif Fn < 0.75 and Fn >= 0.65 :
-            a, n = 29257, -4.47
-        elif Fn < 0.85 and Fn >= 0.75 :
-            a, n = 27130, -4.51
-        elif Fn < 0.95 and Fn >= 0.85 :
-            a, n = 20657, -4.46
-        elif Fn < 1.05 and Fn >= 0.95 :
-            a, n = 11644, -4.24
-        else:
-            a,n = 0,0
-    elif Cb < 0.6 and Cb >= 0.5 :
-        if Fn < 0.35:
-            a, n = 0, 0
-        elif Fn < 0.45 and Fn >= 0.35 :
-            a, n = 926, -2.74
-        elif Fn < 0.55 and Fn >= 0.45 :
-            a, n = 1775, -3.05
-        elif Fn < 0.65 and Fn >= 0.55 :
-            a, n = 1642, -3.08
-        elif Fn < 0.75 and Fn >= 0.65 :
-            a, n = 1106, -2.98
-        elif Fn < 0.85 and Fn >= 0.75 :
-            a, n = 783, -2.90
-        elif Fn < 0.95 and Fn >= 0.85 :
-            a, n = 458, -2.73
-        elif Fn < 1.05 and Fn >= 0.95 :
-            a, n = 199, -2.38
-        else:
-            a,n = 0,0
-    else:
-        a, n = 0, 0
+    D3 = np.where(np.real(D3) < 1, 1, D3)
+
+    # look up (a, n) from the binned table, out of range bins are masked
+    a, n, inRange = series64Coeffs(Cb, Fn)
 
     #estimate C_R
-    C = (a*(math.pow((L/D3),n)))/1000 #unitless
+    C = (a*(np.power((L/D3),n)))/1000 #unitless
 
     #calulate and return R
     R = C*(0.5)*rho*S*V*V #newtons
-    return R
+    return R, inRange
+
+# partial derivatives of series64Vec with respect to (L, S, displ, Cb), stacked along the first axis
+# (a, n) are constant within each bin, so Cb has no effect and the bin edges are not differentiated
+def series64VecDeriv(L, S, displ, Cb, Vk) : #inputs in meters, meters^2, metric tonnes, unitless, knots - arrays or scalars
+    rho = 1026.0 #kg/m^3
+    g = 9.81 #m/s^2
+    L, S, displ, Cb, Vk = np.broadcast_arrays(*[np.asarray(x) for x in (L, S, displ, Cb, Vk)])
+
+    V = Vk/1.944 #m/s
+    Fn = V/np.sqrt(g*L) #unitless
+    D3 = np.power((displ*1000)/(rho),(1/3)) #meters
+    clamped = np.real(D3) < 1
+    D3 = np.where(clamped, 1, D3)
+    a, n, inRange = series64Coeffs(Cb, Fn)
+
+    # R = C*q*S with C = a*(L/D3)^n/1000 and q the dynamic pressure
+    q = (0.5)*rho*V*V
+    C = (a*(np.power((L/D3),n)))/1000
+    R = C*q*S
+
+    dR = np.zeros((4,) + R.shape, dtype=R.dtype)
+    dR[0] = n*R/L
+    dR[1] = C*q
+    dR[2] = np.where(clamped, 0, -n*R/(3*displ))
+    return dR
+
+# ---------
+# Smooth Series 64 resistance from a structured table of log C_R over (Cb, Fn, L/nabla^(1/3))
+# each regression bin holds its (a, n) at the bin center and the edge bins extend to the outer bin edges, so the
+# table spans the same Cb and Fn ranges as the binned regression; log C_R = log(a/1000) + n*log(L/nabla^(1/3)) is
+# tabulated and interpolated with a tensor product cubic spline, which passes through every grid point and has
+# continuous first and second derivatives, like the 'scipy_cubic' method of om.MetaModelStructuredComp
+# designs outside the table are evaluated at the nearest table edge rather than given zero resistance, and are
+# False in the returned mask
+s64TableCb = np.concatenate([s64CbEdges[:1], 0.5*(s64CbEdges[:-1] + s64CbEdges[1:]), s64CbEdges[-1:]])
+s64TableFn = np.concatenate([s64FnEdges[:1], 0.5*(s64FnEdges[:-1] + s64FnEdges[1:]), s64FnEdges[-1:]])
+s64TableSlender = np.linspace(2, 14, 25) # L/nabla^(1/3), 0.5 steps
+
+# log C_R at every grid point from the binned (a, n) coefficients
+def series64TableValues(Cb=s64TableCb, Fn=s64TableFn, slender=s64TableSlender) : #inputs unitless
+    iCb = np.clip(np.digitize(Cb, s64CbEdges) - 1, 0, s64a.shape[0] - 1)
+    iFn = np.clip(np.digitize(Fn, s64FnEdges) - 1, 0, s64a.shape[1] - 1)
+    a = s64a[iCb][:,iFn]
+    n = s64n[iCb][:,iFn]
+    return np.log(a/1000)[:,:,np.newaxis] + (n[:,:,np.newaxis]*np.log(slender))
+
+# spline coefficients fit one axis at a time, make_interp_spline moves the fitted axis to the front
+def series64TableSpline(points=(s64TableCb, s64TableFn, s64TableSlender), values=None) : #grid axes, log C_R on the grid
+    c = series64TableValues(*points) if values is None else values
+    knots = []
+    for axis, grid in enumerate(points):
+        spline = make_interp_spline(grid, c, k=3, axis=axis)
+        c = np.moveaxis(spline.c, 0, axis)
+        knots.append(spline.t)
+    return NdBSpline(tuple(knots), c, 3)
+
+s64Table = series64TableSpline()
+
+# log C_R and its gradient over (Cb, Fn, L/nabla^(1/3)) for a list of table points
+# the spline is evaluated at the real part, complex step inputs carry the gradient in the imaginary part
+def series64TableLookup(x) : #inputs unitless - list of arrays of the same shape
+    points = np.column_stack([np.real(xi).ravel() for xi in x])
+    logC = s64Table(points).reshape(x[0].shape)
+    dlogC = [s64Table(points, nu=nu).reshape(x[0].shape) for nu in np.eye(3, dtype=int)]
+    if np.iscomplexobj(x[0]) or np.iscomplexobj(x[1]) or np.iscomplexobj(x[2]):
+        logC = logC + 1j*sum(dlogC[i]*np.imag(x[i]) for i in range(3))
+    return logC, dlogC
+
+# table inputs clamped to the grid, with a mask of the inputs that were inside it
+def series64TablePoints(L, displ, Cb, V) : #inputs in meters, metric tonnes, unitless, meters/second - arrays
+    rho = 1026.0 #kg/m^3
+    g = 9.81 #m/s^2
+
+    Fn = V/np.sqrt(g*L) #unitless
+    D3 = np.power((displ*1000)/(rho),(1/3)) #meters
+    clampedD3 = np.real(D3) < 1
+    D3 = np.where(clampedD3, 1, D3)
+    slender = L/D3 #unitless
+
+    x = [Cb, Fn, slender]
+    inside = []
+    for i, grid in enumerate((s64TableCb, s64TableFn, s64TableSlender)):
+        inside.append((np.real(x[i]) >= grid[0]) & (np.real(x[i]) <= grid[-1]))
+        x[i] = np.where(np.real(x[i]) < grid[0], grid[0], np.where(np.real(x[i]) > grid[-1], grid[-1], x[i]))
+    return x, inside, Fn, slender, D3, clampedD3
+
+# smooth Series 64 resistance for arrays of designs, real or complex
+# returns resistance and a mask that is False where Cb, Fn or L/nabla^(1/3) fall outside the table
+def series64SmoothVec(L, S, displ, Cb, Vk) : #inputs in meters, meters^2, metric tonnes, unitless, knots - arrays or scalars
+    rho = 1026.0 #kg/m^3
+    L, S, displ, Cb, Vk = np.broadcast_arrays(*[np.asarray(x) for x in (L, S, displ, Cb, Vk)])
+
+    V = Vk/1.944 #m/s
+    x, inside, Fn, slender, D3, clampedD3 = series64TablePoints(L, displ, Cb, V)
+    logC, dlogC = series64TableLookup(x)
+
+    R = np.exp(logC)*(0.5)*rho*S*V*V #newtons
+    return R, inside[0] & inside[1] & inside[2]
+
+# partial derivatives of series64SmoothVec with respect to (L, S, displ, Cb), stacked along the first axis
+# inputs clamped to a table edge have no effect through that axis
+def series64SmoothVecDeriv(L, S, displ, Cb, Vk) : #inputs in meters, meters^2, metric tonnes, unitless, knots - arrays or scalars
+    rho = 1026.0 #kg/m^3
+    L, S, displ, Cb, Vk = np.broadcast_arrays(*[np.asarray(x) for x in (L, S, displ, Cb, Vk)])
+
+    V = Vk/1.944 #m/s
+    x, inside, Fn, slender, D3, clampedD3 = series64TablePoints(L, displ, Cb, V)
+    logC, dlogC = series64TableLookup(x)
+    dCb, dFn, dSlender = [np.where(inside[i], dlogC[i], 0) for i in range(3)]
+
+    # R = C*q*S with log C from the table, Fn = V/sqrt(g*L) and L/nabla^(1/3) = L/D3
+    C = np.exp(logC)
+    q = (0.5)*rho*V*V
+    R = C*q*S
+
+    dR = np.zeros((4,) + R.shape, dtype=R.dtype)
+    dR[0] = R*((dFn*(-Fn/(2*L))) + (dSlender/D3))
+    dR[1] = C*q
+    dR[2] = np.where(clampedD3, 0, R*dSlender*(-slender/(3*displ)))
+    dR[3] = R*dCb
+    return dR
@@ -0,0 +1,93 @@
+# resultsStore.py - memory-mapped columnar file of result columns, shared by the DOE scripts and the plotters
+# The file holds a small JSON header describing each column (name, dtype, shape, byte offset) followed by the columns
+# as raw typed arrays. loadResults maps the file once and returns read-only NumPy views of each column, so opening a
+# large DOE reads nothing until a column is used and the data lives in the page cache rather than in Python floats
+
+# package, function, and class imports
+from __future__ import division, print_function
+import numpy as np
+import struct
+import json
+import os
+
+# file layout: magic, header length (little endian uint64), JSON header, columns aligned to 64 bytes
+resultsMagic = b'MUSVCOLS'
+resultsAlign = 64
+
+def aligned(offset) :
+    return -(-offset // resultsAlign)*resultsAlign
+
+# ---------
+# write result columns, every column must have the same number of rows
+def writeResults(filename, results) : # file name, dict of result columns
+    columns = [(name, np.ascontiguousarray(values)) for name, values in results.items()]
+    rows = len(columns[0][1]) if columns else 0
+    for name, values in columns:
+        if len(values) != rows:
+            raise ValueError("column '%s' has %d rows, expected %d" % (name, len(values), rows))
+
+    # column offsets are relative to the first aligned byte after the header
+    header = {'format': 1, 'rows': rows, 'columns': []}
+    offset = 0
+    for name, values in columns:
+        header['columns'].append({'name': name, 'dtype': values.dtype.str, 'shape': list(values.shape), 'offset': offset})
+        offset = aligned(offset + values.nbytes)
+    text = json.dumps(header).encode()
+    dataStart = aligned(len(resultsMagic) + 8 + len(text))
+
+    with open(filename, 'wb') as f:
+        f.write(resultsMagic + struct.pack('<Q', len(text)) + text)
+        for column, (name, values) in zip(header['columns'], columns):
+            f.seek(dataStart + column['offset'])
+            f.write(values.tobytes())
+        # pad to the end of the last column so every view lies inside the file
+        f.truncate(max(dataStart + offset, f.tell()))
+
+# schema of a results file, {'format', 'rows', 'columns': [{'name', 'dtype', 'shape', 'offset'}]} and the byte at
+# which the columns start
+def readHeader(filename) :
+    with open(filename, 'rb') as f:
+        if f.read(len(resultsMagic)) != resultsMagic:
+            raise ValueError("'%s' is not a results file written by writeResults" % filename)
+        size = struct.unpack('<Q', f.read(8))[0]
+        header = json.loads(f.read(size).decode())
+    header['dataStart'] = aligned(len(resultsMagic) + 8 + size)
+    return header
+
+# read-only views of every column (or the named columns), backed by one memory map of the file
+def loadResults(filename, names=None) : # file name, column names (all if None)
+    header = readHeader(filename)
+    mapped = np.memmap(filename, dtype=np.uint8, mode='r')
+    results = {}
+    for column in header['columns']:
+        if names is not None and column['name'] not in names:
+            continue
+        dtype = np.dtype(column['dtype'])
+        start = header['dataStart'] + column['offset']
+        nbytes = int(np.prod(column['shape']))*dtype.itemsize
+        results[column['name']] = mapped[start:start + nbytes].view(dtype).reshape(column['shape'])
+    return results
+
+# ---------
+# results file next to a text source (e.g. a .csv), converted once with convert(source) -> dict of columns and
+# rewritten whenever the source is newer
+def cachedResults(filename, source, convert) : # results file, source file, function reading the source into columns
+    if not os.path.exists(filename) or (os.path.exists(source) and os.path.getmtime(source) > os.path.getmtime(filename)):
+        writeResults(filename, convert(source))
+    return loadResults(filename)
+
+
+# debugging code, writes and maps a million row file
+if __name__ == "__main__":
+    import time
+    rng = np.random.default_rng(0)
+    results = {name: rng.random(1000000) for name in ['indeps.Cb', 'indeps.L', 'indeps.B', 'indeps.T', 'indeps.fwCap', 'stab.GMT', 'wts.Wt']}
+    results['case'] = np.arange(1000000)
+    writeResults('resultsStoreDebug.mmap', results)
+
+    t = time.time()
+    loaded = loadResults('resultsStoreDebug.mmap')
+    print('opened %d columns of %d rows in %.2f ms' % (len(loaded), len(loaded['case']), 1000*(time.time() - t)))
+    print('identical:', all(np.array_equal(loaded[name], results[name]) for name in results))
+    del loaded
+    os.remove('resultsStoreDebug.mmap')
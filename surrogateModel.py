@@ -0,0 +1,171 @@
+# surrogateModel.py - surrogates of the v3 physics components trained from recorded design of experiment cases
+# The recorded columns (e.g. musvDOEv3cases.npz or .csv) are fit with kriging or radial basis functions, checked with
+# k-fold cross validation and pickled; SurrogateComp then predicts with the trained surrogates inside an OpenMDAO
+# model, see MUSVv3Surrogate in musvModel.py
+
+# package, function, and class imports
+from __future__ import division, print_function
+from scipy.interpolate import RBFInterpolator
+import openmdao.api as om
+import numpy as np
+import pickle
+
+# inputs of every surrogate, in the order SurrogateComp adds them, and the outputs fit
+surrogateInputs = ['indeps.Cb', 'indeps.L', 'indeps.B', 'indeps.T', 'indeps.fwCap']
+surrogateOutputs = ['wts.Wt', 'stab.GMT', 'fuel.fuelWt', 'fuel.MCR', 'fuel.etaRun', 'fuel.nStarts']
+
+# ---------
+# radial basis function interpolation from scipy, thin plate splines over the nearest training points
+# scipy does not give the gradient of the interpolant, so linearize uses central differences
+class RBFSurrogate(om.SurrogateModel):
+    """
+    Radial basis function surrogate based on scipy.interpolate.RBFInterpolator
+    """
+
+    def _declare_options(self) :
+        self.options.declare('neighbors', default=50, types=int, allow_none=True, desc='training points used for each prediction, None uses all of them')
+        self.options.declare('kernel', default='thin_plate_spline', desc='RBFInterpolator kernel')
+        self.options.declare('smoothing', default=0.0, desc='RBFInterpolator smoothing, 0 interpolates the training points')
+
+    def train(self, x, y) :
+        super(RBFSurrogate, self).train(x, y)
+        self.interp = RBFInterpolator(np.asarray(x), np.asarray(y), neighbors=self.options['neighbors'],
+                                      kernel=self.options['kernel'], smoothing=self.options['smoothing'])
+
+    def predict(self, x) :
+        super(RBFSurrogate, self).predict(x)
+        return self.interp(np.atleast_2d(x))
+
+    def linearize(self, x) :
+        x = np.asarray(x, dtype=float)
+        h = 1e-6
+        steps = h*np.eye(len(x))
+        return ((self.interp(x + steps) - self.interp(x - steps))/(2*h)).T
+
+# the surrogates are trained on inputs scaled to the unit cube over the training data, and on log outputs when every
+# training value is positive (the fuel and weight outputs span orders of magnitude), this wraps either surrogate
+# so that predict and linearize work in the model's own units
+class ScaledSurrogate(om.SurrogateModel):
+    """
+    Scales inputs and outputs around another surrogate
+    """
+
+    def __init__(self, surrogate, **kwargs) :
+        super(ScaledSurrogate, self).__init__(**kwargs)
+        self.surrogate = surrogate
+
+    def train(self, x, y) :
+        super(ScaledSurrogate, self).train(x, y)
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float).reshape(len(x), -1)
+        self.lower = x.min(axis=0)
+        self.scale = np.where(x.max(axis=0) > self.lower, x.max(axis=0) - self.lower, 1.0)
+        self.log = bool(np.all(y > 0))
+        self.surrogate.train((x - self.lower)/self.scale, np.log(y) if self.log else y)
+
+    def predict(self, x) :
+        super(ScaledSurrogate, self).predict(x)
+        y = np.real(self.surrogate.predict((np.atleast_2d(x) - self.lower)/self.scale))
+        return np.exp(y) if self.log else y
+
+    def linearize(self, x) :
+        x = np.asarray(x, dtype=float)
+        jac = np.atleast_2d(self.surrogate.linearize((x - self.lower)/self.scale))/self.scale
+        if self.log:
+            jac = jac*self.predict(x).reshape(-1, 1)
+        return jac
+
+# ---------
+# the definition of the SurrogateComp component, predicts a batch of designs with trained surrogates in one call
+# the surrogates are om.SurrogateModel objects and also work in om.MetaModelUnStructuredComp, but its vec_size
+# option predicts one design at a time
+class SurrogateComp(om.ExplicitComponent):
+    """
+    Predicts outputs with surrogates trained by trainSurrogates
+    """
+
+    def initialize(self) :
+        self.options.declare('num_nodes', types=int, default=1, desc='number of designs evaluated in each compute call')
+        self.options.declare('inputs', types=list, desc='(name, units) of each input, in the order the surrogates were trained')
+        self.options.declare('surrogates', types=dict, desc='{output name: (trained surrogate, units)}')
+
+    def setup(self) :
+        nn = self.options['num_nodes']
+        for name, units in self.options['inputs']:
+            self.add_input(name, np.ones(nn), units=units)
+        for name, (surrogate, units) in self.options['surrogates'].items():
+            self.add_output(name, np.ones(nn), units=units)
+
+        # each design only depends on its own inputs
+        ar = np.arange(nn)
+        self.declare_partials('*', '*', rows=ar, cols=ar)
+
+    def compute(self, inputs, outputs) :
+        x = np.column_stack([inputs[name] for name, units in self.options['inputs']])
+        for name, (surrogate, units) in self.options['surrogates'].items():
+            outputs[name] = surrogate.predict(x).ravel()
+
+    def compute_partials(self, inputs, partials) :
+        x = np.column_stack([inputs[name] for name, units in self.options['inputs']])
+        for name, (surrogate, units) in self.options['surrogates'].items():
+            jac = np.array([surrogate.linearize(row)[0] for row in x])
+            for i, (inName, inUnits) in enumerate(self.options['inputs']):
+                partials[name, inName] = jac[:,i]
+
+# ---------
+# new untrained surrogate of the given method
+def newSurrogate(method) : # 'kriging' or 'rbf'
+    if method == 'kriging':
+        return ScaledSurrogate(om.KrigingSurrogate())
+    elif method == 'rbf':
+        return ScaledSurrogate(RBFSurrogate())
+    raise ValueError("unknown surrogate method '%s', expected 'kriging' or 'rbf'" % method)
+
+# rows of recorded results usable for training, designs with nan outputs (e.g. pre-screened) are skipped
+def trainingData(results, inputs=surrogateInputs, outputs=surrogateOutputs) : # dict of result columns, input names, output names
+    x = np.column_stack([results[name] for name in inputs])
+    y = np.column_stack([results[name] for name in outputs])
+    rows = np.all(np.isfinite(x), axis=1) & np.all(np.isfinite(y), axis=1)
+    return x[rows], y[rows]
+
+# a random subset of at most samples rows, kriging solves a dense system in the number of training points so it is
+# usually trained on a few hundred of the recorded cases
+def subsample(x, y, samples=None, seed=None) : # training inputs, outputs, number of rows kept, random seed
+    if samples is None or samples >= len(x):
+        return x, y
+    rows = np.random.default_rng(seed).choice(len(x), samples, replace=False)
+    return x[rows], y[rows]
+
+# ---------
+# train one surrogate per output, returns {output name: surrogate}
+def trainSurrogates(results, method='rbf', samples=None, seed=None, inputs=surrogateInputs, outputs=surrogateOutputs) : # dict of result columns, 'kriging' or 'rbf', training points, random seed, input names, output names
+    x, y = subsample(*trainingData(results, inputs, outputs), samples=samples, seed=seed)
+    surrogates = {}
+    for i, name in enumerate(outputs):
+        surrogates[name] = newSurrogate(method)
+        surrogates[name].train(x, y[:,i:i+1])
+    return surrogates
+
+# k-fold cross validation, returns {output name: (RMS error, mean absolute error relative to the mean output)}
+def crossValidate(results, method='rbf', folds=5, samples=None, seed=None, inputs=surrogateInputs, outputs=surrogateOutputs) : # dict of result columns, 'kriging' or 'rbf', number of folds, training points, random seed, input names, output names
+    x, y = subsample(*trainingData(results, inputs, outputs), samples=samples, seed=seed)
+    fold = np.random.default_rng(seed).permutation(len(x)) % folds
+    predicted = np.empty_like(y)
+    for k in range(folds):
+        for i, name in enumerate(outputs):
+            surrogate = newSurrogate(method)
+            surrogate.train(x[fold != k], y[fold != k,i:i+1])
+            predicted[fold == k,i] = surrogate.predict(x[fold == k]).ravel()
+
+    error = predicted - y
+    return {name: (np.sqrt(np.mean(error[:,i]**2)), np.mean(np.abs(error[:,i]))/np.abs(np.mean(y[:,i]))) for i, name in enumerate(outputs)}
+
+# ---------
+# save and load trained surrogates
+def saveSurrogates(filename, surrogates) :
+    with open(filename, 'wb') as f:
+        pickle.dump(surrogates, f)
+
+def loadSurrogates(filename) :
+    with open(filename, 'rb') as f:
+        return pickle.load(f)
@@ -1,6 +1,6 @@
 # weightCurves.py - file to contain various weight estimations defined for use as functions
 
-import math
+import numpy as np
 
 # ---------
 # Based on Parsons' NA470 Coursepack
@@ -12,12 +12,12 @@ def parsonsWts(Cb, D, T, L, B, MCR, Vk) : # inputs in unitless, meters, meters,
 
     # structural weights
     CbPrime = Cb + ((1-Cb)*(((0.8*D) - T)/(3*T))) # unitless, NA470 Coursepack Page 141
-    Ws = K*math.pow(E,1.36)*(1+(0.5*(CbPrime-0.7))) # tonnes, NA470 Coursepack Page 141
+    Ws = K*np.power(E,1.36)*(1+(0.5*(CbPrime-0.7))) # tonnes, NA470 Coursepack Page 141
     #Ws = Ws/2.9 # tonnes, conversion to Aluminium construction
     Ws = Ws*g*1000 # newtons, conversion to newtons
 
     # machinery weights
-    Wm = 0.72*math.pow(MCR,0.78) # tonnes, NA470 Coursepack Page 143
+    Wm = 0.72*np.power(MCR,0.78) # tonnes, NA470 Coursepack Page 143
     Wm = Wm*g*1000 # newtons, conversion to newtons
 
     # fuel weights
@@ -53,10 +53,10 @@ def grubisicWts(Cb, T, L, B, MCR, Vk) : # inputs in unitless, meters, meters, me
     Disp = (rho/1000)*Cb*L*B*T #metric tonnes
 
     # Approximate depth based on draft, eqn from Grubisic 2012
-    D = (2.493)*math.pow(T,0.582)
+    D = (2.493)*np.power(T,0.582)
 
     # estimate surface areas
-    S1 = 2.825*math.sqrt((Disp/rho)*L) #bottom
+    S1 = 2.825*np.sqrt((Disp/rho)*L) #bottom
     S2 = 1.09*(2*(L+B))*(D-T) #sides
     S3 = 0.823*L*B #deck
     Nwtb = L/5 #Approximating number of watertight bulkheads
@@ -68,7 +68,7 @@ def grubisicWts(Cb, T, L, B, MCR, Vk) : # inputs in unitless, meters, meters, me
     DispLR = 0.125*((L*L)-15.8) #tonnes
     nabla = (DispLR + Disp)/rho
     fdis = 0.7 + (2.4*(nabla/((L*L)-15.8)))
-    CTD = 1.144*math.pow((T/(D+0.0001)),0.244) #modified to prevent a divide by zero
+    CTD = 1.144*np.power((T/(D+0.0001)),0.244) #modified to prevent a divide by zero
 
     # structural numeral
     Es = fdis*CTD*SR # meters^2
@@ -79,12 +79,12 @@ def grubisicWts(Cb, T, L, B, MCR, Vk) : # inputs in unitless, meters, meters, me
     K = 0.002 + (0.0064*Gf*Sf) # weight constant for aluminium hull
 
     # structural weights
-    W100 = K*math.pow(Es,1.33) # metric tonnes
+    W100 = K*np.power(Es,1.33) # metric tonnes
 
     # machinery weights
     W250 = MCR/286 # metric tonnes, propulsion engine weight
-    Wmach = math.pow(L*B*D,0.94)/45.66 # metric tonnes, remaining machinery`
-    Wspp = math.pow(MCR,1.271)/8375 # metric tonnes, approximate weight of controllable pitch propeller
+    Wmach = np.power(L*B*D,0.94)/45.66 # metric tonnes, remaining machinery`
+    Wspp = np.power(MCR,1.271)/8375 # metric tonnes, approximate weight of controllable pitch propeller
     W200 = Wmach+W250+Wspp # metric tonnes
 
     # fuel weights
@@ -94,13 +94,13 @@ def grubisicWts(Cb, T, L, B, MCR, Vk) : # inputs in unitless, meters, meters, me
 
     # electrical, auxilary machinery, outfit weights
     # NOTE - THESE ARE THE MOST VARIABLE
-    W300 = math.pow(L*B*D,1.24)/592 # metric tonnes, electrical machinery weights
-    W400 = math.pow(L,2.254)/1887 # metric tonnes, electronic equipment weights
-    W500 = math.pow(L*B,1.784)/1295 # metric tonnes, auxilary machinery weights
-    W600 = math.pow(L,2.132)/102.5 # metric tonnes, outfit weights
+    W300 = np.power(L*B*D,1.24)/592 # metric tonnes, electrical machinery weights
+    W400 = np.power(L,2.254)/1887 # metric tonnes, electronic equipment weights
+    W500 = np.power(L*B,1.784)/1295 # metric tonnes, auxilary machinery weights
+    W600 = np.power(L,2.132)/102.5 # metric tonnes, outfit weights
 
     # special systems weights
-    W700 = math.pow(L*B*D,1.422)/3000 # metric tonnes, special systems weights
+    W700 = np.power(L*B*D,1.422)/3000 # metric tonnes, special systems weights
 
     # cargo weights
     massContainer = 30000 # kg, from Wikipedia for shipping containers
@@ -124,10 +124,10 @@ def grubisicWtsNoFuel(Cb, T, L, B, MCR, fuel) : # inputs in unitless, meters, me
     Disp = (rho/1000)*Cb*L*B*T #metric tonnes
 
     # Approximate depth based on draft, eqn from Grubisic 2012
-    D = (2.493)*math.pow(T,0.582)
+    D = (2.493)*np.power(T,0.582)
 
     # estimate surface areas
-    S1 = 2.825*math.sqrt((Disp/rho)*L) #bottom
+    S1 = 2.825*np.sqrt((Disp/rho)*L) #bottom
     S2 = 1.09*(2*(L+B))*(D-T) #sides
     S3 = 0.823*L*B #deck
     Nwtb = L/5 #Approximating number of watertight bulkheads
@@ -139,7 +139,7 @@ def grubisicWtsNoFuel(Cb, T, L, B, MCR, fuel) : # inputs in unitless, meters, me
     DispLR = 0.125*((L*L)-15.8) #tonnes
     nabla = (DispLR + Disp)/rho
     fdis = 0.7 + (2.4*(nabla/((L*L)-15.8)))
-    CTD = 1.144*math.pow((T/(D+0.0001)),0.244) #modified to prevent a divide by zero
+    CTD = 1.144*np.power((T/(D+0.0001)),0.244) #modified to prevent a divide by zero
 
     # structural numeral
     Es = fdis*CTD*SR # meters^2
@@ -150,24 +150,24 @@ def grubisicWtsNoFuel(Cb, T, L, B, MCR, fuel) : # inputs in unitless, meters, me
     K = 0.002 + (0.0064*Gf*Sf) # weight constant for aluminium hull
 
     # structural weights
-    W100 = K*math.pow(Es,1.33) # metric tonnes
+    W100 = K*np.power(Es,1.33) # metric tonnes
 
     # machinery weights
     W250 = MCR/286 # metric tonnes, propulsion engine weight
-    Wmach = math.pow(L*B*D,0.94)/45.66 # metric tonnes, remaining machinery`
-    Wspp = math.pow(MCR,1.271)/8375 # metric tonnes, approximate weight of controllable pitch propeller
+    Wmach = np.power(L*B*D,0.94)/45.66 # metric tonnes, remaining machinery`
+    Wspp = np.power(MCR,1.271)/8375 # metric tonnes, approximate weight of controllable pitch propeller
     W200 = Wmach+W250+Wspp # metric tonnes
     Wfuel = fuel # FUEL WEIGHT IS AN INPUT
 
     # electrical, auxilary machinery, outfit weights
     # NOTE - THESE ARE THE MOST VARIABLE
-    W300 = math.pow(L*B*D,1.24)/592 # metric tonnes, electrical machinery weights
-    W400 = math.pow(L,2.254)/1887 # metric tonnes, electronic equipment weights
-    W500 = math.pow(L*B,1.784)/1295 # metric tonnes, auxilary machinery weights
-    W600 = math.pow(L,2.132)/102.5 # metric tonnes, outfit weights
+    W300 = np.power(L*B*D,1.24)/592 # metric tonnes, electrical machinery weights
+    W400 = np.power(L,2.254)/1887 # metric tonnes, electronic equipment weights
+    W500 = np.power(L*B,1.784)/1295 # metric tonnes, auxilary machinery weights
+    W600 = np.power(L,2.132)/102.5 # metric tonnes, outfit weights
 
     # special systems weights
-    W700 = math.pow(L*B*D,1.422)/3000 # metric tonnes, special systems weights
+    W700 = np.power(L*B*D,1.422)/3000 # metric tonnes, special systems weights
 
     # cargo weights
     massContainer = 30000 # kg, from Wikipedia for shipping containers
@@ -178,3 +178,153 @@ def grubisicWtsNoFuel(Cb, T, L, B, MCR, fuel) : # inputs in unitless, meters, me
     W = W100 + W200 + Wfuel + W300 + W400 + W500 + W600 + W700 + Wcargo # metric tonnes
     W = W*1.05 # metric tonnes, 5% margin
     return W
+
+# ---------
+# Vectorized forms of the estimates above, inputs may be arrays or scalars and are broadcast together
+
+# Based on Parsons' NA470 Coursepack, see parsonsWts
+def parsonsWtsVec(Cb, D, T, L, B, MCR, Vk) : # inputs in unitless, meters, meters, meters, meters, kilowatts, knots
+    g = 9.81 #m/s^2
+    K = 0.044 # from NA470 Coursepack for Tugs
+    E = 400 # from NA470 Coursepack for Tugs
+    Cb, D, T, L, B, MCR, Vk = np.broadcast_arrays(*[np.asarray(x) for x in (Cb, D, T, L, B, MCR, Vk)])
+
+    CbPrime = Cb + ((1-Cb)*(((0.8*D) - T)/(3*T))) # unitless
+    Ws = K*np.power(E,1.36)*(1+(0.5*(CbPrime-0.7))) # tonnes, structural
+    Wm = 0.72*np.power(MCR,0.78) # tonnes, machinery
+    Wfuel = 0.000196*MCR*(4500/Vk)*1.05 # tonnes, fuel
+    Wo = 0.4*L*B # tonnes, outfit
+    Wcargo = g*2*30000/(g*1000) # tonnes, two shipping containers
+
+    W = (Ws + Wm + Wfuel + Wo + Wcargo)*1.05 # tonnes, 5% margin
+    return W
+
+# Based on Grubisic and Begovic, 2009, see grubisicWts
+# returns every weight group except fuel, before the 5% margin
+# depth, L*B*D and the powers of L and L*B*D are computed once for the whole batch
+def grubisicHullWtsVec(Cb, T, L, B, MCR) : # inputs in unitless, meters, meters, meters, kilowatts
+    rho = 1026.0 #kg/m^3
+    Cb, T, L, B, MCR = np.broadcast_arrays(*[np.asarray(x) for x in (Cb, T, L, B, MCR)])
+
+    # shared sub-expressions
+    Disp = (rho/1000)*Cb*L*B*T #metric tonnes
+    D = (2.493)*np.power(T,0.582) # depth from draft, Grubisic 2012
+    LB = L*B
+    LBD = LB*D
+    LL = L*L
+    logL = np.log(L)
+    logLBD = np.log(LBD)
+
+    # estimate surface areas
+    S1 = 2.825*np.sqrt((Disp/rho)*L) #bottom
+    S2 = 1.09*(2*(L+B))*(D-T) #sides
+    S3 = 0.823*LB #deck
+    S4 = 0.6*(L/5)*B*D #Bulkheads, approximating L/5 watertight bulkheads
+    SR = S1 + (0.73*S2) + (0.69*S3) + (0.65*S4) #total reduced surface area
+
+    # correction factors and structural numeral
+    nabla = ((0.125*(LL-15.8)) + Disp)/rho
+    fdis = 0.7 + (2.4*(nabla/(LL-15.8)))
+    CTD = 1.144*np.power((T/(D+0.0001)),0.244) #modified to prevent a divide by zero
+    Es = fdis*CTD*SR # meters^2
+
+    # structural weights, aluminium hull for patrol craft in unrestricted service
+    K = 0.002 + (0.0064*1.20*1.25)
+    W100 = K*np.power(Es,1.33) # metric tonnes
+
+    # machinery weights
+    W200 = (np.exp(0.94*logLBD)/45.66) + (MCR/286) + (np.power(MCR,1.271)/8375) # metric tonnes
+
+    # electrical, electronic, auxilary, outfit and special systems weights
+    W300 = np.exp(1.24*logLBD)/592 # metric tonnes
+    W400 = np.exp(2.254*logL)/1887 # metric tonnes
+    W500 = np.power(LB,1.784)/1295 # metric tonnes
+    W600 = np.exp(2.132*logL)/102.5 # metric tonnes
+    W700 = np.exp(1.422*logLBD)/3000 # metric tonnes
+
+    # cargo weights, two shipping containers
+    Wcargo = 2*30000/1000 # metric tonnes
+
+    return W100 + W200 + W300 + W400 + W500 + W600 + W700 + Wcargo # metric tonnes
+
+# constant speed mission fuel, see grubisicWts
+def grubisicWtsVec(Cb, T, L, B, MCR, Vk) : # inputs in unitless, meters, meters, meters, kilowatts, knots
+    Wfuel = 0.000196*np.asarray(MCR)*(4500/np.asarray(Vk))*1.05 # tonnes, NA470 Coursepack Page 143
+    W = (grubisicHullWtsVec(Cb, T, L, B, MCR) + Wfuel)*1.05 # metric tonnes, 5% margin
+    return W
+
+# fuel weight as an input, see grubisicWtsNoFuel
+def grubisicWtsNoFuelVec(Cb, T, L, B, MCR, fuel) : # inputs in unitless, meters, meters, meters, kilowatts, metric tonnes
+    W = (grubisicHullWtsVec(Cb, T, L, B, MCR) + np.asarray(fuel))*1.05 # metric tonnes, 5% margin
+    return W
+
+# ---------
+# Partial derivatives of the vectorized Grubisic estimates
+# gradients are stacked along the first axis in the order of the function arguments
+
+# partial derivatives of grubisicHullWtsVec with respect to (Cb, T, L, B, MCR)
+def grubisicHullWtsVecDeriv(Cb, T, L, B, MCR) : # inputs in unitless, meters, meters, meters, kilowatts
+    rho = 1026.0 #kg/m^3
+    Cb, T, L, B, MCR = np.broadcast_arrays(*[np.asarray(x) for x in (Cb, T, L, B, MCR)])
+    zero = np.zeros_like(Cb)
+    one = np.ones_like(Cb)
+
+    # intermediate values and their (Cb, T, L, B) gradients
+    Disp = (rho/1000)*Cb*L*B*T
+    dDisp = (rho/1000)*np.stack([L*B*T, Cb*L*B, Cb*B*T, Cb*L*T])
+    D = (2.493)*np.power(T,0.582)
+    dD = np.stack([zero, 0.582*D/T, zero, zero])
+    dL = np.stack([zero, zero, one, zero])
+    dB = np.stack([zero, zero, zero, one])
+    LB = L*B
+    dLB = (dL*B) + (L*dB)
+    LBD = LB*D
+    dLBD = (dLB*D) + (LB*dD)
+
+    # surface areas
+    S1 = 2.825*np.sqrt((Disp/rho)*L)
+    dS1 = (2.825*2.825/(2*S1))*((dDisp*L) + (Disp*dL))/rho
+    dS2 = 1.09*2*(((dL + dB)*(D-T)) + ((L+B)*(dD - np.stack([zero, one, zero, zero]))))
+    dS3 = 0.823*dLB
+    dS4 = 0.12*dLBD
+    SR = S1 + (0.73*1.09*(2*(L+B))*(D-T)) + (0.69*0.823*LB) + (0.65*0.12*LBD)
+    dSR = dS1 + (0.73*dS2) + (0.69*dS3) + (0.65*dS4)
+
+    # correction factors, fdis = 0.7 + 2.4*(0.125*Q + Disp)/(rho*Q) with Q = L^2 - 15.8
+    Q = (L*L)-15.8
+    fdis = 0.7 + (2.4*(((0.125*Q) + Disp)/rho)/Q)
+    dfdis = (2.4/rho)*((dDisp/Q) - (Disp*2*L*dL/(Q*Q)))
+    ratio = T/(D+0.0001)
+    CTD = 1.144*np.power(ratio,0.244)
+    dratio = (np.stack([zero, one, zero, zero])/(D+0.0001)) - (T*dD/((D+0.0001)*(D+0.0001)))
+    dCTD = 0.244*CTD*dratio/ratio
+
+    # structural weight
+    Es = fdis*CTD*SR
+    dEs = (dfdis*CTD*SR) + (fdis*dCTD*SR) + (fdis*CTD*dSR)
+    K = 0.002 + (0.0064*1.20*1.25)
+    W100 = K*np.power(Es,1.33)
+    dW100 = 1.33*W100*dEs/Es
+
+    # remaining groups are powers of L, L*B and L*B*D
+    dW = dW100
+    dW = dW + (0.94*(np.power(LBD,0.94)/45.66)*dLBD/LBD)
+    dW = dW + (1.24*(np.power(LBD,1.24)/592)*dLBD/LBD)
+    dW = dW + (2.254*(np.power(L,2.254)/1887)*dL/L)
+    dW = dW + (1.784*(np.power(LB,1.784)/1295)*dLB/LB)
+    dW = dW + (2.132*(np.power(L,2.132)/102.5)*dL/L)
+    dW = dW + (1.422*(np.power(LBD,1.422)/3000)*dLBD/LBD)
+
+    dMCR = (1/286) + (1.271*np.power(MCR,0.271)/8375)
+    return np.concatenate([dW, dMCR[np.newaxis]])
+
+# partial derivatives of grubisicWtsVec with respect to (Cb, T, L, B, MCR)
+def grubisicWtsVecDeriv(Cb, T, L, B, MCR, Vk) : # inputs in unitless, meters, meters, meters, kilowatts, knots
+    dW = grubisicHullWtsVecDeriv(Cb, T, L, B, MCR)
+    dW[4] = dW[4] + (0.000196*(4500/np.asarray(Vk))*1.05)
+    return dW*1.05
+
+# partial derivatives of grubisicWtsNoFuelVec with respect to (Cb, T, L, B, MCR, fuel)
+def grubisicWtsNoFuelVecDeriv(Cb, T, L, B, MCR, fuel) : # inputs in unitless, meters, meters, meters, kilowatts, metric tonnes
+    dW = grubisicHullWtsVecDeriv(Cb, T, L, B, MCR)
+    return np.concatenate([dW, np.ones_like(dW[:1])])*1.05